@@ -0,0 +1,266 @@
+"""
+contech1 Admission Control
+Limits how much work reaches the LLM at once, and sheds the rest early
+
+A request must get a slot before it calls the model:
+- at most ADMIT_MAX_CONCURRENT requests talk to the model at once
+- each client (X-Client-Id header, else its IP) has at most ADMIT_PER_CLIENT
+  requests running or waiting
+- optional requests-per-minute and tokens-per-minute budgets, matched to the
+  provider's rate limits, so a spike waits here instead of failing there
+
+Requests that can't start right away wait in a bounded FIFO queue for at most
+ADMIT_QUEUE_TIMEOUT seconds. A full queue, a client over its cap, or a wait
+that can't finish before the deadline is refused at once with Rejected, which
+the app turns into 429 + Retry-After.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+
+from tracing import span
+
+# Admission settings (override with environment variables)
+ADMIT_MAX_CONCURRENT = int(os.getenv("ADMIT_MAX_CONCURRENT", "32"))  # 0 = no admission control
+ADMIT_PER_CLIENT = int(os.getenv("ADMIT_PER_CLIENT", "8"))
+ADMIT_QUEUE_SIZE = int(os.getenv("ADMIT_QUEUE_SIZE", "64"))
+ADMIT_QUEUE_TIMEOUT = float(os.getenv("ADMIT_QUEUE_TIMEOUT", "10"))
+ADMIT_REQUESTS_PER_MINUTE = float(os.getenv("ADMIT_REQUESTS_PER_MINUTE", "0"))  # 0 = no limit
+ADMIT_TOKENS_PER_MINUTE = float(os.getenv("ADMIT_TOKENS_PER_MINUTE", "0"))  # 0 = no limit
+# Output tokens assumed per request when charging the token budget
+ADMIT_COMPLETION_TOKENS = int(os.getenv("ADMIT_COMPLETION_TOKENS", "400"))
+
+
+class Rejected(Exception):
+    """The request can't be admitted in time - answer 429 and ask the client to come back later"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class RateBucket:
+    """Token bucket refilled at `per_minute`, holding at most a minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 = now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+class _Waiter:
+    __slots__ = ("future", "tokens")
+
+    def __init__(self, future: asyncio.Future, tokens: int):
+        self.future = future
+        self.tokens = tokens
+
+
+class AdmissionController:
+    """
+    Concurrency, per-client and rate limits with a bounded wait queue - event loop only
+
+    Args:
+        max_concurrent: Requests admitted at once (0 = admit everything)
+        per_client: Requests one client may have running or waiting
+        queue_size: Requests allowed to wait for a slot
+        queue_timeout: Seconds a request may wait before it's refused
+        requests_per_minute: Request budget (0 = none)
+        tokens_per_minute: Token budget (0 = none)
+    """
+
+    def __init__(self, max_concurrent: int = ADMIT_MAX_CONCURRENT, per_client: int = ADMIT_PER_CLIENT,
+                 queue_size: int = ADMIT_QUEUE_SIZE, queue_timeout: float = ADMIT_QUEUE_TIMEOUT,
+                 requests_per_minute: float = ADMIT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = ADMIT_TOKENS_PER_MINUTE):
+        self.max_concurrent = max_concurrent
+        self.per_client = per_client
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.requests = RateBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = RateBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.in_flight = 0
+        self.counters = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+        self._clients = Counter()   # client -> requests running or waiting
+        self._waiters = deque()
+        self._timer = None
+        self._hold_time = 1.0       # moving average of seconds a slot is held
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrent > 0
+
+    def _rate_wait(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.wait_time(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    def _start(self, tokens: int):
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def _wake(self):
+        """Admit waiters from the front of the queue while there's room"""
+        self._timer = None
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.future.done():
+                self._waiters.popleft()
+                continue
+            if self.in_flight >= self.max_concurrent:
+                return
+            wait = self._rate_wait(waiter.tokens)
+            if wait > 0:
+                # Rate budget is short - try again when it has refilled
+                self._timer = asyncio.get_running_loop().call_later(wait, self._wake)
+                return
+            self._waiters.popleft()
+            self._start(waiter.tokens)
+            waiter.future.set_result(True)
+
+    def _retry_after(self, tokens: int) -> float:
+        # Rough time for the queue ahead to drain, or for the rate budget to refill
+        backlog = (len(self._waiters) + 1) * self._hold_time / max(1, self.max_concurrent)
+        return max(backlog, self._rate_wait(tokens))
+
+    def _reject(self, message: str, retry_after: float):
+        self.counters["rejected"] += 1
+        raise Rejected(message, retry_after)
+
+    async def acquire(self, client: str, tokens: int = 0):
+        """
+        Wait for a slot
+
+        Args:
+            client: Who is asking (for the per-client cap)
+            tokens: Estimated tokens the request will use (prompt + completion)
+
+        Raises:
+            Rejected: queue full, client over its cap, or no slot before the deadline
+        """
+        if self.per_client and self._clients[client] >= self.per_client:
+            self._reject(f"Too many requests in progress for this client ({self.per_client})", self._hold_time)
+
+        # Fast path - nobody waiting and room to run
+        if not self._waiters and self.in_flight < self.max_concurrent and self._rate_wait(tokens) == 0:
+            self._clients[client] += 1
+            self._start(tokens)
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self._reject("Server is busy - too many requests waiting", self._retry_after(tokens))
+        rate_wait = self._rate_wait(tokens)
+        if rate_wait > self.queue_timeout:
+            # Would time out anyway - refuse now and keep the budget for requests that can finish
+            self._reject("Rate budget exhausted", rate_wait)
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens)
+        self._waiters.append(waiter)
+        self._clients[client] += 1
+        self.counters["queued"] += 1
+        if self._timer is None:
+            self._wake()
+
+        try:
+            with span("admission_wait"):
+                await asyncio.wait({waiter.future}, timeout=self.queue_timeout)
+        except BaseException:
+            # Cancelled while waiting (client went away) - give back whatever we hold
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(client)
+            else:
+                self._leave_queue(waiter, client)
+            raise
+        if not waiter.future.done():
+            # Deadline passed - give up the place in line
+            self._leave_queue(waiter, client)
+            self.counters["timed_out"] += 1
+            self._reject(f"No capacity within {self.queue_timeout:g} seconds", self._retry_after(tokens))
+
+    def _leave_queue(self, waiter: _Waiter, client: str):
+        waiter.future.cancel()
+        self._waiters.remove(waiter)
+        self._release_client(client)
+
+    def _release_client(self, client: str):
+        self._clients[client] -= 1
+        if self._clients[client] <= 0:
+            del self._clients[client]
+
+    def release(self, client: str, held: float = None):
+        """Give a slot back (held = seconds it was held, for Retry-After estimates)"""
+        self.in_flight -= 1
+        self._release_client(client)
+        if held is not None:
+            self._hold_time = 0.8 * self._hold_time + 0.2 * held
+        if self._timer is None:
+            self._wake()
+
+    async def lease(self, client: str, tokens: int = 0):
+        """
+        Take a slot for work that outlives one block (e.g. a streamed response)
+
+        Returns:
+            release() - gives the slot back; safe to call more than once
+        """
+        if not self.enabled:
+            return lambda: None
+        await self.acquire(client, tokens)
+        started = time.monotonic()
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.release(client, time.monotonic() - started)
+
+        return release
+
+    @asynccontextmanager
+    async def admit(self, client: str, tokens: int = 0):
+        """async with admit(client, tokens): ... - holds a slot for the block"""
+        release = await self.lease(client, tokens)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "clients": len(self._clients),
+            "requests_budget": round(self.requests.level, 1) if self.requests is not None else None,
+            "tokens_budget": round(self.tokens.level) if self.tokens is not None else None,
+            **self.counters,
+        }
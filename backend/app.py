@@ -3,16 +3,18 @@ contech1 Backend - FastAPI Server
 Action-based construction AI assistant with integrated tools
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Optional
 import os
 import sys
 from pathlib import Path
-from openai import OpenAI
 import json
+import asyncio
+import time
 from dotenv import load_dotenv
 import logging
 
@@ -25,27 +27,26 @@ env_path = Path(__file__).parent / ".env"
 load_dotenv(env_path)
 logger.info(f"Loaded .env from: {env_path}")
 
-# Add tools directory to path
+# Add backend, tools and integrations directories to path
+sys.path.append(str(Path(__file__).parent))
 sys.path.append(str(Path(__file__).parent.parent / "tools"))
+sys.path.append(str(Path(__file__).parent.parent / "integrations"))
 
-# Import estimating tools
-try:
-    from estimating_tools import (
-        calculate_material_cost,
-        calculate_labor_cost,
-        calculate_equipment_cost,
-        estimate_project_cost
-    )
-except ImportError:
-    # If tools not available, define stubs
-    def calculate_material_cost(*args, **kwargs):
-        return {"error": "Estimating tools not loaded"}
-    def calculate_labor_cost(*args, **kwargs):
-        return {"error": "Estimating tools not loaded"}
-    def calculate_equipment_cost(*args, **kwargs):
-        return {"error": "Estimating tools not loaded"}
-    def estimate_project_cost(*args, **kwargs):
-        return {"error": "Estimating tools not loaded"}
+from admission import ADMIT_COMPLETION_TOKENS, AdmissionController, Rejected
+from cache import CompletionCache, ToolResultCache
+from construction_tools import (
+    PRICING_STORE, pin_pricing, pricing_version, proposal_backend, proposal_jobs, proposal_workers, registry
+)
+from history import (
+    HISTORY_STATS, HISTORY_TOKEN_BUDGET, compact_history, estimate_prompt_tokens, load_encoding, record_compaction
+)
+from llm import LLM_MODEL, LazyClient, RateLimited, create_client, create_completion, pool_limits, stream_completion
+from metrics import REGISTRY, MetricsMiddleware
+from renderers import RENDER_STATS, RESPONSE_RENDERING, record_render, render_tool_results
+from sessions import SessionStore
+from singleflight import SingleFlight
+from tool_runner import append_tool_results, run_tool_call, run_tool_calls, tool_calls_from_message
+from tracing import TraceMiddleware
 
 app = FastAPI(title="contech1 - Construction AI Assistant")
 
@@ -65,16 +66,103 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-Id", "Retry-After"],
 )
 
-# Initialize AI client
+# Request latency, status and in-flight counts for /metrics
+app.add_middleware(MetricsMiddleware)
+# Per-request spans: Server-Timing header, X-Request-Id and a JSON trace log line
+app.add_middleware(TraceMiddleware)
+
+# Direct JSON estimating endpoints (no LLM) for ERP and other machine clients
+try:
+    from estimating_api import router as estimating_router
+    app.include_router(estimating_router)
+except ImportError as exc:
+    logger.warning(f"Estimating API disabled: {exc}")
+
+# AI client - built on the first LLM call, so a cold start doesn't pay for importing openai
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
-    logger.error("OPENAI_API_KEY not found in environment variables!")
-    raise ValueError("OPENAI_API_KEY not set. Please set it in backend/.env file")
-    
-client = OpenAI(api_key=api_key)
-logger.info("OpenAI client initialized successfully")
+    logger.warning("OPENAI_API_KEY not set - chat will fail until it's set in backend/.env")
+
+cassette = None
+
+
+def build_client():
+    """Create the OpenAI client (and the LLM cassette transport, if one is configured)"""
+    global cassette
+    from cassette import LLM_CASSETTE_MODE, cassette_transport
+
+    # Replaying an LLM cassette (LLM_CASSETTE_MODE=replay) never calls the API, so it needs no key
+    if not api_key and LLM_CASSETTE_MODE != "replay":
+        raise RuntimeError("OPENAI_API_KEY not set. Please set it in backend/.env file")
+    cassette = cassette_transport(pool_limits())
+    return create_client(api_key or "replay", transport=cassette)
+
+
+client = LazyClient(build_client)
+
+
+# Pricing hot-reload: watch the HCSS exports (PRICING_WATCH=1) and/or use the admin endpoint
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PRICING_WATCH = os.getenv("PRICING_WATCH", "0").lower() in ("1", "true", "yes")
+PRICING_WATCH_INTERVAL = float(os.getenv("PRICING_WATCH_INTERVAL", "5"))
+
+
+@app.on_event("startup")
+async def start_pricing_watcher():
+    """Reload pricing in the background when the source files change"""
+    if PRICING_STORE is not None and PRICING_WATCH:
+        PRICING_STORE.watch(PRICING_WATCH_INTERVAL)
+
+
+# Warm-up: do the slow first-use work (openai import, connection pool, tokenizer) before the
+# first chat needs it. STARTUP_WARMUP=1 runs it in the background as soon as the app starts;
+# GET /warmup runs it on demand (e.g. a scheduled ping keeping a serverless instance warm).
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "0").lower() in ("1", "true", "yes")
+
+
+def warm_up() -> dict:
+    """Build everything that's otherwise created on first use; returns ms per step"""
+    timings = {}
+    for name, step in (("llm_client", client.get), ("tokenizer", load_encoding)):
+        started = time.perf_counter()
+        try:
+            step()
+            timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as exc:
+            logger.warning(f"Warm-up step {name} failed: {exc}")
+            timings[name] = f"failed: {exc}"
+    return timings
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Warm up in a thread so the server accepts requests right away"""
+    if STARTUP_WARMUP:
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+
+
+@app.get("/warmup")
+async def warmup():
+    """Run the warm-up now (fast once everything is built)"""
+    return {"warm_up_ms": await asyncio.to_thread(warm_up)}
+
+
+@app.on_event("shutdown")
+async def close_client():
+    """Release pooled LLM connections"""
+    await client.close()
+    completion_cache.close()
+    if PRICING_STORE is not None:
+        PRICING_STORE.stop()
+    await proposal_jobs.close()
+    if proposal_workers is not None:
+        await proposal_workers.close()
+    if proposal_backend is not None:
+        await proposal_backend.close()
+    sessions.close()
 
 # Request/Response models
 class ChatMessage(BaseModel):
@@ -83,277 +171,29 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     messages: List[ChatMessage]
+    session_id: Optional[str] = None  # with a session, send only the new message
 
 class ChatResponse(BaseModel):
     response: str
     tools_used: List[str] = []
+    session_id: Optional[str] = None
+
+# Server-held conversations (see sessions.py)
+sessions = SessionStore()
 
-# Define your construction tools
+# Construction tools - declared once in construction_tools.py
 def get_construction_tools():
-    """Define available construction tools"""
-    return [
-        {
-            "type": "function",
-            "function": {
-                "name": "list_available_tools",
-                "description": "Lists all available construction tools and what they do in simple language. Use when user asks what tools are available, what can you do, or what are my options.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "generate_proposal",
-                "description": "Generates a construction proposal PDF. Use when user asks to create, generate, or build a proposal for a construction project.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "project_name": {"type": "string", "description": "Name of the construction project"},
-                        "client_name": {"type": "string", "description": "Name of the client"},
-                        "project_description": {"type": "string", "description": "Description of the work"},
-                        "materials": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "List of materials needed"
-                        },
-                        "labor_hours": {"type": "number", "description": "Total labor hours"},
-                        "total_cost": {"type": "number", "description": "Total project cost"}
-                    },
-                    "required": ["project_name", "client_name", "total_cost"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "calculate_materials",
-                "description": "Calculates material quantities needed for a project. Use when user asks about quantities, materials needed, or takeoffs.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "material_type": {"type": "string", "description": "Type of material (pipe, wire, conduit, etc.)"},
-                        "length_ft": {"type": "number", "description": "Length in feet"},
-                        "diameter_inches": {"type": "number", "description": "Diameter in inches if applicable"}
-                    },
-                    "required": ["material_type", "length_ft"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "calculate_material_cost",
-                "description": "Calculates material cost using real pricing data. Use when user asks about material costs, pricing, or cost estimates.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "material_type": {"type": "string", "description": "Type of material (pipe, concrete, rebar, etc.)"},
-                        "quantity": {"type": "number", "description": "Quantity needed"},
-                        "size": {"type": "string", "description": "Size specification (e.g., '4' for 4-inch pipe, '3000_psi' for concrete)"}
-                    },
-                    "required": ["material_type", "quantity"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "calculate_labor_cost",
-                "description": "Calculates labor cost based on labor rates. Use when user asks about labor costs, crew costs, or hourly rates.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "labor_type": {"type": "string", "description": "Type of laborer (operator, laborer, foreman, electrician, ironworker)"},
-                        "hours": {"type": "number", "description": "Number of hours"}
-                    },
-                    "required": ["labor_type", "hours"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "calculate_equipment_cost",
-                "description": "Calculates equipment rental cost. Use when user asks about equipment costs or rental rates.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "equipment_type": {"type": "string", "description": "Type of equipment (excavator, auger, compactor)"},
-                        "days": {"type": "number", "description": "Number of days needed"}
-                    },
-                    "required": ["equipment_type", "days"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "estimate_project_cost",
-                "description": "Creates a complete project cost estimate with materials, labor, equipment, and markup. Use when user asks for a full estimate, project cost, or bid estimate.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "materials": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "type": {"type": "string"},
-                                    "quantity": {"type": "number"},
-                                    "size": {"type": "string"}
-                                }
-                            },
-                            "description": "List of materials with type, quantity, and size"
-                        },
-                        "labor": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "type": {"type": "string"},
-                                    "hours": {"type": "number"}
-                                }
-                            },
-                            "description": "List of labor with type and hours"
-                        },
-                        "equipment": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "type": {"type": "string"},
-                                    "days": {"type": "number"}
-                                }
-                            },
-                            "description": "Optional list of equipment with type and days"
-                        },
-                        "markup": {"type": "number", "description": "Markup percentage as decimal (default 0.15 for 15%)"}
-                    },
-                    "required": ["materials", "labor"]
-                }
-            }
-        }
-    ]
+    """Function schemas for the model (built once, not per request)"""
+    return registry.schemas()
 
-# Tool execution functions
-def execute_tool(tool_name: str, parameters: dict):
-    """Execute a construction tool"""
-    
-    if tool_name == "list_available_tools":
-        # Return available tools in simple, straightforward language
-        return {
-            "status": "success",
-            "tools": [
-                {
-                    "name": "Generate Proposal",
-                    "description": "Creates a construction proposal PDF with project details, materials, labor, and costs.",
-                    "example": "Generate a proposal for a 1000ft waterline project"
-                },
-                {
-                    "name": "Calculate Material Quantities",
-                    "description": "Figures out how much material you need for a project (like pipe, wire, or concrete).",
-                    "example": "How much 4-inch pipe do I need for 500 feet?"
-                },
-                {
-                    "name": "Calculate Material Cost",
-                    "description": "Tells you how much materials will cost using real pricing data.",
-                    "example": "What's the cost for 1000 feet of 4-inch pipe?"
-                },
-                {
-                    "name": "Calculate Labor Cost",
-                    "description": "Calculates how much labor will cost based on hourly rates for operators, laborers, foremen, electricians, etc.",
-                    "example": "How much will 40 hours of operator time cost?"
-                },
-                {
-                    "name": "Calculate Equipment Cost",
-                    "description": "Figures out equipment rental costs for excavators, augers, compactors, etc.",
-                    "example": "How much does it cost to rent an excavator for 5 days?"
-                },
-                {
-                    "name": "Full Project Estimate",
-                    "description": "Creates a complete project cost estimate with materials, labor, equipment, and markup all included.",
-                    "example": "Give me a full estimate for installing 1000ft of waterline"
-                }
-            ],
-            "summary": "I have 6 tools available: proposal generation, material calculations, cost estimates, labor costs, equipment costs, and full project estimates. Just tell me what you need and I'll use the right tool."
-        }
-    
-    elif tool_name == "generate_proposal":
-        # TODO: Call your actual Proposal Generator Swift tool
-        # For now, return mock response
-        return {
-            "status": "success",
-            "message": f"Proposal generated for {parameters.get('project_name')}",
-            "pdf_path": f"/proposals/{parameters.get('project_name')}.pdf"
-        }
-    
-    elif tool_name == "calculate_materials":
-        # Custom Python tool - calculate materials
-        material_type = parameters.get("material_type", "")
-        length_ft = parameters.get("length_ft", 0)
-        diameter = parameters.get("diameter_inches", 0)
-        
-        # Simple calculation logic
-        if material_type.lower() == "pipe":
-            # Add 10% waste factor
-            quantity = length_ft * 1.1
-            return {
-                "status": "success",
-                "material_type": material_type,
-                "quantity": round(quantity, 2),
-                "unit": "feet",
-                "waste_factor": "10%"
-            }
-        else:
-            return {
-                "status": "success",
-                "material_type": material_type,
-                "quantity": length_ft,
-                "unit": "feet"
-            }
-    
-    elif tool_name == "calculate_material_cost":
-        # Use estimating tools
-        result = calculate_material_cost(
-            parameters.get("material_type"),
-            parameters.get("quantity"),
-            parameters.get("size")
-        )
-        return {"status": "success", **result}
-    
-    elif tool_name == "calculate_labor_cost":
-        # Use estimating tools
-        result = calculate_labor_cost(
-            parameters.get("labor_type"),
-            parameters.get("hours")
-        )
-        return {"status": "success", **result}
-    
-    elif tool_name == "calculate_equipment_cost":
-        # Use estimating tools
-        result = calculate_equipment_cost(
-            parameters.get("equipment_type"),
-            parameters.get("days")
-        )
-        return {"status": "success", **result}
-    
-    elif tool_name == "estimate_project_cost":
-        # Use estimating tools for full project estimate
-        result = estimate_project_cost(
-            parameters.get("materials", []),
-            parameters.get("labor", []),
-            parameters.get("equipment", []),
-            parameters.get("markup", 0.15)
-        )
-        return {"status": "success", **result}
-    
-    else:
-        logger.warning(f"Unknown tool requested: {tool_name}")
-        return {"status": "error", "message": f"Unknown tool: {tool_name}"}
+# Tool execution: O(1) dispatch by name through the registry
+execute_tool = registry.execute
+
+# Memoize pure pricing tools - dropped automatically when pricing changes
+tool_cache = ToolResultCache(pricing_version)
+# Identical tool calls running at the same time (from any request) share one run
+tool_flight = SingleFlight()
+cached_execute_tool = tool_flight.wrap(tool_cache.wrap(execute_tool), pricing_version)
 
 # Health check endpoint
 @app.get("/health")
@@ -362,25 +202,125 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "contech1",
-        "tools_available": 7,
-        "ai_model": "gpt-4o-mini"
+        "tools_available": len(registry),
+        "ai_model": LLM_MODEL,
+        "llm_client_ready": client.ready,
+        "response_rendering": RESPONSE_RENDERING,
+        "completions_saved": RENDER_STATS["completions_saved"],
+        "pricing_version": pricing_version(),
+        "tool_cache": tool_cache.stats(),
+        "tool_workers": proposal_workers.stats() if proposal_workers is not None else None,
+        "tool_backends": {proposal_backend.name: proposal_backend.stats()} if proposal_backend is not None else {},
+        "jobs": proposal_jobs.stats(),
+        "completion_cache": completion_cache.stats(),
+        "history": {"token_budget": HISTORY_TOKEN_BUDGET, **HISTORY_STATS},
+        "sessions": sessions.stats(),
+        "admission": admission.stats(),
+        "coalescing": {"chat": chat_flight.stats(), "tools": tool_flight.stats()},
+        "llm_cassette": cassette.stats() if cassette is not None else None
     }
 
+# Prometheus metrics - LLM and tool latency histograms, token counts, plus
+# every component's stats() (the same numbers /health shows) as gauges
+REGISTRY.register_stats("tool_cache", lambda: tool_cache.stats())
+REGISTRY.register_stats("completion_cache", lambda: completion_cache.stats())
+REGISTRY.register_stats("render", lambda: RENDER_STATS)
+REGISTRY.register_stats("history", lambda: HISTORY_STATS)
+REGISTRY.register_stats("sessions", lambda: sessions.stats())
+REGISTRY.register_stats("admission", lambda: admission.stats())
+REGISTRY.register_stats("coalescing", lambda: {"chat": chat_flight.stats(), "tools": tool_flight.stats()})
+REGISTRY.register_stats("jobs", lambda: proposal_jobs.stats())
+REGISTRY.register_stats("llm_cassette", lambda: cassette.stats() if cassette is not None else {})
+REGISTRY.register_stats("tool_workers", lambda: proposal_workers.stats() if proposal_workers is not None else {})
+REGISTRY.register_stats(
+    "tool_backends", lambda: {proposal_backend.name: proposal_backend.stats()} if proposal_backend is not None else {}
+)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # List tools endpoint
 @app.get("/tools")
 async def list_tools():
     """List all available tools"""
-    return {
-        "tools": [
-            {"name": "list_available_tools", "description": "Lists all available construction tools"},
-            {"name": "generate_proposal", "description": "Generates a construction proposal PDF"},
-            {"name": "calculate_materials", "description": "Calculates material quantities needed"},
-            {"name": "calculate_material_cost", "description": "Calculates material costs using real pricing"},
-            {"name": "calculate_labor_cost", "description": "Calculates labor costs based on hourly rates"},
-            {"name": "calculate_equipment_cost", "description": "Calculates equipment rental costs"},
-            {"name": "estimate_project_cost", "description": "Creates a complete project cost estimate"}
-        ]
-    }
+    return Response(content=registry.catalog_json(), media_type="application/json")
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status of a background job (e.g. a proposal PDF)"""
+    job = proposal_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (or expired)")
+    return job.info()
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """
+    Result of a finished job
+    
+    202 while it's still queued or running, 500 if it failed.
+    """
+    job = proposal_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (or expired)")
+    if job.status == "done":
+        return {**job.info(), "result": job.result}
+    if job.status == "failed":
+        return JSONResponse(status_code=500, content=job.info())
+    return JSONResponse(status_code=202, content=job.info(), headers={"Retry-After": "1"})
+
+@app.post("/sessions")
+async def create_session():
+    """Start a server-held conversation - pass its session_id to /chat with just the new message"""
+    return {"session_id": sessions.create()}
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """The conversation so far"""
+    messages = sessions.get(session_id)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Session not found (or expired)")
+    return {"session_id": session_id, "messages": messages}
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Forget a conversation"""
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found (or expired)")
+    return {"deleted": session_id}
+
+def require_admin(token: Optional[str]):
+    """Admin endpoints are off unless ADMIN_TOKEN is set, and need it as X-Admin-Token"""
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/admin/pricing")
+async def pricing_info(x_admin_token: Optional[str] = Header(None)):
+    """Show the live pricing version"""
+    require_admin(x_admin_token)
+    if PRICING_STORE is None:
+        raise HTTPException(status_code=503, detail="Estimating tools not loaded")
+    return {**PRICING_STORE.current().info(), "reloads": PRICING_STORE.reloads,
+            "reloads_collapsed": PRICING_STORE.reloads_collapsed}
+
+
+@app.post("/admin/pricing/reload")
+async def reload_pricing(x_admin_token: Optional[str] = Header(None)):
+    """
+    Load a new pricing version in the background and swap it in atomically
+    
+    Requests already running keep the version they started with.
+    """
+    require_admin(x_admin_token)
+    if PRICING_STORE is None:
+        raise HTTPException(status_code=503, detail="Estimating tools not loaded")
+    previous = PRICING_STORE.current().version
+    pricing = await asyncio.to_thread(PRICING_STORE.reload)
+    return {**pricing.info(), "previous_version": previous, "changed": pricing.version != previous}
+
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -482,6 +422,9 @@ async def root():
                 messagesDiv.scrollTop = messagesDiv.scrollHeight;
             }
             
+            // The server keeps the conversation - each request sends only the new message
+            let sessionId = null;
+            
             async function sendMessage() {
                 const message = userInput.value.trim();
                 if (!message) return;
@@ -489,19 +432,70 @@ async def root():
                 addMessage('user', message);
                 userInput.value = '';
                 
+                // Stream the answer in as it is written
+                const answerDiv = document.createElement('div');
+                answerDiv.className = 'message assistant';
+                messagesDiv.appendChild(answerDiv);
+                
                 try {
-                    const response = await fetch('/chat', {
+                    if (!sessionId) {
+                        const session = await fetch('/sessions', {method: 'POST'});
+                        sessionId = (await session.json()).session_id;
+                    }
+                    const response = await fetch('/chat/stream', {
                         method: 'POST',
                         headers: {'Content-Type': 'application/json'},
                         body: JSON.stringify({
+                            session_id: sessionId,
                             messages: [{role: 'user', content: message}]
                         })
                     });
+                    if (response.status === 404) {
+                        // Session expired - start a new one next time
+                        sessionId = null;
+                        answerDiv.textContent = 'Your session expired - please send that again.';
+                        return;
+                    }
                     
-                    const data = await response.json();
-                    addMessage('assistant', data.response, data.tools_used || []);
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = '';
+                    
+                    while (true) {
+                        const {value, done} = await reader.read();
+                        if (done) break;
+                        buffer += decoder.decode(value, {stream: true});
+                        
+                        // Server-sent events are separated by a blank line
+                        const events = buffer.split('\n\n');
+                        buffer = events.pop();
+                        events.forEach(handleEvent);
+                    }
                 } catch (error) {
-                    addMessage('assistant', 'Error: ' + error.message);
+                    answerDiv.textContent += 'Error: ' + error.message;
+                }
+                
+                function handleEvent(raw) {
+                    let event = 'message';
+                    let data = '';
+                    raw.split('\n').forEach(line => {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    });
+                    if (!data) return;
+                    const payload = JSON.parse(data);
+                    
+                    if (event === 'token') {
+                        answerDiv.textContent += payload.text;
+                    } else if (event === 'tool_start' || event === 'tool_end') {
+                        const toolDiv = document.createElement('div');
+                        toolDiv.className = 'tool-used';
+                        toolDiv.textContent = `🔧 ${payload.message}`;
+                        messagesDiv.insertBefore(toolDiv, answerDiv);
+                    } else if (event === 'error') {
+                        answerDiv.textContent += payload.message;
+                    }
+                    messagesDiv.scrollTop = messagesDiv.scrollHeight;
                 }
             }
             
@@ -513,22 +507,8 @@ async def root():
     </html>
     """
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """Handle chat requests with AI and tool calling"""
-    
-    logger.info(f"Received chat request: {request.messages[0].content[:50] if request.messages else 'empty'}...")
-    
-    tools = get_construction_tools()
-    tools_used = []
-    
-    # Convert messages to OpenAI format
-    messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
-    
-    # Add system message - Action-based model, not just language
-    messages.insert(0, {
-        "role": "system",
-        "content": """You are contech1, an action-based construction assistant. Your primary job is to execute tasks using tools, not just chat.
+# System prompt - Action-based model, not just language
+SYSTEM_PROMPT = """You are contech1, an action-based construction assistant. Your primary job is to execute tasks using tools, not just chat.
 
 IMPORTANT:
 - You are ACTION-BASED: When users ask for something, USE THE TOOLS to do it
@@ -545,63 +525,309 @@ Your tools can:
 - Create full project estimates
 
 When users ask questions, use the appropriate tool to give them real answers with actual calculations."""
-    })
+
+
+def new_messages(request: ChatRequest) -> list:
+    """The request's messages in OpenAI format"""
+    return [{"role": msg.role, "content": msg.content} for msg in request.messages]
+
+
+def session_history(request: ChatRequest) -> list:
+    """Stored messages for the request's session (none without one; 404 if it's gone)"""
+    if request.session_id is None:
+        return []
+    history = sessions.get(request.session_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Session not found (or expired)")
+    return history
+
+
+def build_messages(request: ChatRequest, history: list = ()) -> list:
+    """Convert a chat request to OpenAI format with the system prompt and session history first"""
+    return [{"role": "system", "content": SYSTEM_PROMPT}, *history, *new_messages(request)]
+
+
+def save_turn(request: ChatRequest, exchange: list, answer: str):
+    """Add the new messages, any tool calls and the answer to the request's session"""
+    if request.session_id is not None:
+        turn = new_messages(request) + exchange + [{"role": "assistant", "content": answer}]
+        sessions.append(request.session_id, turn)
+
+
+# Optional cache of whole answers for repeated conversations (COMPLETION_CACHE=1)
+completion_cache = CompletionCache(LLM_MODEL, SYSTEM_PROMPT, get_construction_tools())
+
+
+def completion_cache_key(raw_request: Request, messages: list):
+    """
+    Cache key for this conversation, or None when the cache is off or the
+    client asked to skip it (X-Cache-Bypass: 1 or Cache-Control: no-cache)
+    """
+    if not completion_cache.enabled:
+        return None
+    bypass = raw_request.headers.get("x-cache-bypass", "").lower() in ("1", "true", "yes")
+    if bypass or "no-cache" in raw_request.headers.get("cache-control", "").lower():
+        completion_cache.bypassed += 1
+        return None
+    return completion_cache.key(messages, pricing_version())
+
+
+# Identical conversations being answered at the same time share one answer
+chat_flight = SingleFlight()
+
+# Caps on how much work reaches the model at once (see admission.py)
+admission = AdmissionController()
+
+
+def client_key(raw_request: Request) -> str:
+    """Who a request counts against for per-client limits"""
+    return raw_request.headers.get("x-client-id") or (raw_request.client.host if raw_request.client else "unknown")
+
+
+def request_tokens(messages: list) -> int:
+    """Tokens a request is expected to use, for the token budget"""
+    return estimate_prompt_tokens(messages) + ADMIT_COMPLETION_TOKENS
+
+
+async def answer_chat(messages: list, tools: list) -> dict:
+    """
+    Run the model and any tools for one conversation
     
-    # Call AI model
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",  # Start with cheaper model, upgrade later
-        messages=messages,
-        tools=tools,
-        tool_choice="auto"
-    )
+    Returns:
+        {"response", "tools_used", "exchange" (tool call messages), "tokens_saved"}
+    """
+    tools_used = []
+    exchange = []
+    
+    # Long conversations are trimmed to the token budget before the model sees them
+    messages, history = compact_history(messages)
+    record_compaction(history)
+    
+    # Call AI model (async - other requests keep running while we wait)
+    response = await create_completion(client, messages, tools=tools)
     
     message = response.choices[0].message
     final_response = message.content or ""
     
-    # Handle tool calls
+    # Handle tool calls - independent calls from one turn run concurrently
     if message.tool_calls:
-        for tool_call in message.tool_calls:
-            tool_name = tool_call.function.name
-            parameters = json.loads(tool_call.function.arguments)
-            
-            tools_used.append(tool_name)
-            
-            # Execute tool
-            tool_result = execute_tool(tool_name, parameters)
-            
-            # Add tool result to conversation
-            messages.append({
-                "role": "assistant",
-                "content": None,
-                "tool_calls": [{
-                    "id": tool_call.id,
-                    "type": "function",
-                    "function": {
-                        "name": tool_name,
-                        "arguments": tool_call.function.arguments
-                    }
-                }]
-            })
-            
-            messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": json.dumps(tool_result)
-            })
+        calls = tool_calls_from_message(message)
+        tools_used.extend(call["name"] for call in calls)
+        
+        results = await run_tool_calls(cached_execute_tool, calls)
         
-        # Get final response after tool execution
-        final_response_obj = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages
-        )
-        final_response = final_response_obj.choices[0].message.content
+        # Add all tool results to conversation as one assistant turn
+        append_tool_results(exchange, results)
+        messages = messages + exchange
+        
+        # Deterministic results are rendered from templates - only ask the
+        # model again when it needs to reason over the results
+        rendered = render_tool_results(results)
+        record_render(rendered is not None)
+        if rendered is not None:
+            final_response = rendered
+        else:
+            # Get final response after tool execution
+            final_response_obj = await create_completion(client, messages)
+            final_response = final_response_obj.choices[0].message.content
     
     logger.info(f"Tools used: {tools_used}")
     logger.info(f"Response length: {len(final_response)} chars")
     
+    return {
+        "response": final_response,
+        "tools_used": tools_used,
+        "exchange": exchange,
+        "tokens_saved": history["tokens_saved"]
+    }
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest, raw_request: Request, http_response: Response):
+    """Handle chat requests with AI and tool calling"""
+    
+    logger.info(f"Received chat request: {request.messages[0].content[:50] if request.messages else 'empty'}...")
+    
+    tools = get_construction_tools()
+    
+    # Every tool call in this request prices from the same version, even if a reload lands
+    pin_pricing()
+    
+    # Convert messages to OpenAI format (after the session's earlier turns)
+    messages = build_messages(request, session_history(request))
+    
+    # Repeated conversation - answer from cache without spending tokens
+    cache_key = completion_cache_key(raw_request, messages)
+    if cache_key:
+        cached = completion_cache.get(cache_key)
+        if cached is not None:
+            http_response.headers["X-Cache"] = "HIT"
+            save_turn(request, [], cached["response"])
+            return ChatResponse(**cached, session_id=request.session_id)
+        http_response.headers["X-Cache"] = "MISS"
+    
+    # Only the request that actually calls the model needs a slot
+    async def admitted_answer():
+        async with admission.admit(client_key(raw_request), request_tokens(messages)):
+            return await answer_chat(messages, tools)
+    
+    # Same conversation already being answered - wait for that answer instead
+    answer, shared = await chat_flight.do(completion_cache.key(messages, pricing_version()), admitted_answer)
+    http_response.headers["X-Coalesced"] = "1" if shared else "0"
+    http_response.headers["X-History-Tokens-Saved"] = str(0 if shared else answer["tokens_saved"])
+    
+    if cache_key and not shared:
+        completion_cache.set(cache_key, {"response": answer["response"], "tools_used": answer["tools_used"]})
+    save_turn(request, answer["exchange"], answer["response"])
+    
     return ChatResponse(
-        response=final_response,
-        tools_used=tools_used
+        response=answer["response"],
+        tools_used=answer["tools_used"],
+        session_id=request.session_id
+    )
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, raw_request: Request):
+    """
+    Stream chat responses as server-sent events
+    
+    Events:
+        token       - {"text": ...} a piece of the answer as the model writes it
+        tool_start  - {"tool": ..., "message": "calling <tool>"}
+        tool_end    - {"tool": ..., "elapsed_ms": ..., "message": "tool finished in N ms"}
+        done        - {"tools_used": [...]}
+        error       - {"message": ...}
+    """
+    
+    logger.info(f"Received stream request: {request.messages[0].content[:50] if request.messages else 'empty'}...")
+    
+    tools = get_construction_tools()
+    pin_pricing()
+    messages = build_messages(request, session_history(request))
+    cache_key = completion_cache_key(raw_request, messages)
+    cached = completion_cache.get(cache_key) if cache_key else None
+    
+    # Wait for a slot (or get a 429) before the response starts; held until the stream ends
+    release = lambda: None
+    if cached is None:
+        release = await admission.lease(client_key(raw_request), request_tokens(messages))
+    
+    messages, history = compact_history(messages)
+    record_compaction(history)
+    
+    async def events():
+        tools_used = []
+        answer = []
+        exchange = []
+        try:
+            # Repeated conversation - replay the cached answer
+            if cached is not None:
+                save_turn(request, exchange, cached["response"])
+                yield sse_event("token", {"text": cached["response"]})
+                yield sse_event("done", {"tools_used": cached["tools_used"], "cached": True})
+                return
+            
+            # First completion - stream tokens, collect tool call pieces by index
+            tool_calls = {}
+            async for chunk in stream_completion(client, messages, tools=tools):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    answer.append(delta.content)
+                    yield sse_event("token", {"text": delta.content})
+                for call in delta.tool_calls or []:
+                    entry = tool_calls.setdefault(call.index, {"id": "", "name": "", "arguments": ""})
+                    if call.id:
+                        entry["id"] = call.id
+                    if call.function and call.function.name:
+                        entry["name"] += call.function.name
+                    if call.function and call.function.arguments:
+                        entry["arguments"] += call.function.arguments
+            
+            # Handle tool calls concurrently, reporting progress as each one finishes
+            if tool_calls:
+                calls = [tool_calls[index] for index in sorted(tool_calls)]
+                for call in calls:
+                    tools_used.append(call["name"])
+                    yield sse_event("tool_start", {"tool": call["name"], "message": f"calling {call['name']}"})
+                
+                tasks = [asyncio.create_task(run_tool_call(cached_execute_tool, call)) for call in calls]
+                try:
+                    for finished in asyncio.as_completed(tasks):
+                        item = await finished
+                        yield sse_event("tool_end", {
+                            "tool": item["name"],
+                            "elapsed_ms": item["elapsed_ms"],
+                            "message": f"tool finished in {item['elapsed_ms']:.0f} ms"
+                        })
+                finally:
+                    # Client went away mid-stream - don't leave tools running
+                    for task in tasks:
+                        task.cancel()
+                
+                results = [task.result() for task in tasks]
+                append_tool_results(exchange, results)
+                messages.extend(exchange)
+                
+                rendered = render_tool_results(results)
+                record_render(rendered is not None)
+                if rendered is not None:
+                    answer = [rendered]
+                    yield sse_event("token", {"text": rendered})
+                else:
+                    # Stream the final response after tool execution
+                    answer = []
+                    async for chunk in stream_completion(client, messages):
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            answer.append(chunk.choices[0].delta.content)
+                            yield sse_event("token", {"text": chunk.choices[0].delta.content})
+            
+            logger.info(f"Tools used: {tools_used}")
+            if cache_key:
+                completion_cache.set(cache_key, {"response": "".join(answer), "tools_used": tools_used})
+            save_turn(request, exchange, "".join(answer))
+            yield sse_event("done", {"tools_used": tools_used})
+        except Exception as exc:
+            # Headers are already sent, so report the error in-stream
+            logger.error(f"Stream failed: {exc}")
+            yield sse_event("error", {"message": f"An error occurred: {str(exc)}"})
+        finally:
+            release()
+    
+    return StreamingResponse(
+        events(),
+        background=BackgroundTask(release),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-History-Tokens-Saved": str(history["tokens_saved"])
+        }
+    )
+
+# Overloaded - ask the client to come back instead of failing with a 500
+@app.exception_handler(Rejected)
+async def admission_rejected_handler(request, exc):
+    return JSONResponse(
+        status_code=429,
+        content={"response": f"The assistant is busy right now: {exc}. Please try again shortly.", "tools_used": []},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(RateLimited)
+async def provider_rate_limit_handler(request, exc):
+    logger.warning(f"LLM provider rate limit: {exc}")
+    return JSONResponse(
+        status_code=429,
+        content={"response": "The assistant is busy right now. Please try again shortly.", "tools_used": []},
+        headers={"Retry-After": exc.retry_after}
     )
 
 # Error handler
@@ -0,0 +1,290 @@
+"""
+contech1 Caches
+Bounded LRU + TTL cache, the memoized tool-result cache that sits in front of
+execute_tool (keyed on the pricing version, so price changes take effect at once), and the optional
+conversation-level completion cache for repeated /chat queries.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Tool cache settings (override with environment variables)
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "300"))
+
+# Pure pricing tools - same inputs + same pricing version = same result
+CACHEABLE_TOOLS = {
+    "calculate_material_cost",
+    "calculate_labor_cost",
+    "calculate_equipment_cost",
+    "estimate_project_cost",
+}
+
+class TTLCache:
+    """
+    Thread-safe LRU cache where entries also expire after `ttl` seconds
+
+    Tool handlers run in worker threads, so every operation takes the lock.
+    Cached values are shared - treat them as read-only.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def canonical_key(tool_name: str, parameters: dict) -> str:
+    """Same tool + same parameters (in any key order) = same key"""
+    return tool_name + ":" + json.dumps(parameters, sort_keys=True, separators=(",", ":"))
+
+
+class ToolResultCache:
+    """
+    Memoizes pure tool results, keyed on pricing version + tool name + canonical parameters
+
+    Args:
+        version_fn: Returns the pricing version in use. It's part of every key,
+            so a pricing change makes old results unreachable right away (they
+            age out of the LRU), while requests still pinned to the old version
+            keep hitting their own entries.
+        maxsize: Max cached results (LRU eviction)
+        ttl: Seconds a result stays valid
+    """
+
+    def __init__(self, version_fn, maxsize: int = TOOL_CACHE_SIZE, ttl: float = TOOL_CACHE_TTL):
+        self.cache = TTLCache(maxsize, ttl)
+        self.version_fn = version_fn
+        self.version = version_fn()
+
+    def wrap(self, execute):
+        """Put the cache in front of execute(tool_name, parameters)"""
+
+        def cached_execute(tool_name: str, parameters: dict):
+            if tool_name not in CACHEABLE_TOOLS:
+                return execute(tool_name, parameters)
+
+            self.version = self.version_fn()
+            key = self.version + "|" + canonical_key(tool_name, parameters)
+            result = self.cache.get(key)
+            if result is None:
+                result = execute(tool_name, parameters)
+                # Only successful results are worth keeping
+                if result.get("status") != "error" and "error" not in result:
+                    self.cache.set(key, result)
+            return result
+
+        return cached_execute
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "pricing_version": self.version,
+        }
+
+
+# Completion cache settings - off unless COMPLETION_CACHE=1
+COMPLETION_CACHE_ENABLED = os.getenv("COMPLETION_CACHE", "0").lower() in ("1", "true", "yes")
+COMPLETION_CACHE_SIZE = int(os.getenv("COMPLETION_CACHE_SIZE", "512"))
+COMPLETION_CACHE_TTL = float(os.getenv("COMPLETION_CACHE_TTL", "3600"))
+COMPLETION_CACHE_DB = os.getenv("COMPLETION_CACHE_DB")  # optional SQLite file
+COMPLETION_CACHE_DB_ROWS = int(os.getenv("COMPLETION_CACHE_DB_ROWS", "50000"))
+
+# Responses that ran these tools did something - never replay them
+SIDE_EFFECT_TOOLS = {"generate_proposal"}
+
+
+def _normalize(text: str) -> str:
+    """Case and whitespace don't change the question"""
+    return " ".join((text or "").split()).lower()
+
+
+def _canonical_arguments(arguments: str) -> str:
+    """Tool call arguments with key order and spacing removed (as sent if they aren't valid JSON)"""
+    try:
+        return json.dumps(json.loads(arguments), sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return str(arguments)
+
+
+class SQLiteStore:
+    """On-disk JSON key-value table - backs the completion cache (and chat sessions) across restarts"""
+
+    def __init__(self, path: str, max_rows: int = COMPLETION_CACHE_DB_ROWS, table: str = "completions"):
+        self.max_rows = max_rows
+        self.table = table
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT value, expires FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict, ttl: float):
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl),
+            )
+            self._writes += 1
+            # Prune now and then rather than on every write
+            if self._writes % 100 == 0:
+                self._prune()
+            self._db.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _prune(self):
+        self._db.execute(f"DELETE FROM {self.table} WHERE expires < ?", (time.time(),))
+        self._db.execute(
+            f"DELETE FROM {self.table} WHERE key NOT IN "
+            f"(SELECT key FROM {self.table} ORDER BY expires DESC LIMIT ?)",
+            (self.max_rows,),
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CompletionCache:
+    """
+    Caches whole /chat answers for repeated conversations
+
+    The key is a hash of the model, system prompt and tool schemas (fixed at
+    startup), the pricing version, and the normalized message list, including
+    any tool calls (name and canonical arguments) and tool_call_ids. Memory is
+    bounded by an LRU; an optional SQLite file backs it across restarts.
+    """
+
+    def __init__(self, model: str, system_prompt: str, tools: list,
+                 maxsize: int = COMPLETION_CACHE_SIZE, ttl: float = COMPLETION_CACHE_TTL,
+                 db_path: str = COMPLETION_CACHE_DB, enabled: bool = COMPLETION_CACHE_ENABLED):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize, ttl)
+        self.store = SQLiteStore(db_path) if enabled and db_path else None
+        self.bypassed = 0
+        self.disk_hits = 0
+
+        prefix = json.dumps([model, system_prompt, tools], sort_keys=True, separators=(",", ":"))
+        self._prefix = hashlib.sha256(prefix.encode()).hexdigest()
+
+    def key(self, messages: list, pricing_version: str) -> str:
+        """Hash of everything that decides the answer"""
+        digest = hashlib.sha256(self._prefix.encode())
+        digest.update(pricing_version.encode())
+        for message in messages:
+            digest.update(b"\x00" + message["role"].encode() + b"\x01")
+            digest.update(_normalize(message.get("content")).encode())
+            # Session history carries the tool exchange - which tool ran with what, and which result is whose
+            if message.get("tool_call_id"):
+                digest.update(b"\x02" + message["tool_call_id"].encode())
+            for call in message.get("tool_calls") or ():
+                function = call["function"]
+                digest.update(b"\x03" + function["name"].encode() + b"\x01")
+                digest.update(_canonical_arguments(function["arguments"]).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+        value = self.memory.get(key)
+        if value is None and self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: dict):
+        """Store an answer unless it's empty or came from a tool with side effects"""
+        if not self.enabled or not value.get("response"):
+            return
+        if SIDE_EFFECT_TOOLS.intersection(value.get("tools_used", [])):
+            return
+        self.memory.set(key, value)
+        if self.store is not None:
+            self.store.set(key, value, self.ttl)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "persistent": self.store is not None,
+            **self.memory.stats(),
+            "disk_hits": self.disk_hits,
+            "bypassed": self.bypassed,
+        }
@@ -0,0 +1,231 @@
+"""
+contech1 LLM Cassettes
+Record LLM completions to a file and replay them later - no tokens, same answers every run
+
+Plugs in under the OpenAI client as its httpx transport, so plain and
+streamed completions (tool calls included) are captured exactly as the API
+sent them and every code path above - tool calls, rendering, metrics - runs
+unchanged on replay.
+
+- record: calls the API as usual and appends each successful completion to
+  the cassette (one JSON line: request key, kind, latency, response body or
+  stream chunks with their timing)
+- replay: answers from the cassette without touching the network, optionally
+  waiting as long as the recording did (LLM_CASSETTE_LATENCY=1) or a fraction
+  of it (0.5). A request that wasn't recorded fails with a 400, or with
+  LLM_CASSETTE_MISS=cycle gets the next recording of the same kind (plan or
+  render, streamed or not), so unique prompts can replay a traffic shape at
+  any rate. A cassette ending in .gz is compressed.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# LLM_CASSETTE_MODE=record|replay with LLM_CASSETTE=<file>; unset = talk to the API as usual
+LLM_CASSETTE = os.getenv("LLM_CASSETTE")
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "").lower()
+# Replay: fraction of the recorded latency to wait (0 = answer at once, 1 = as recorded)
+LLM_CASSETTE_LATENCY = float(os.getenv("LLM_CASSETTE_LATENCY", "0"))
+# Replay: "error" fails unrecorded requests, "cycle" serves another recording of the same kind
+LLM_CASSETTE_MISS = os.getenv("LLM_CASSETTE_MISS", "error").lower()
+
+COMPLETIONS_PATH = "/chat/completions"
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode + "t", encoding="utf-8") if path.endswith(".gz") else open(path, mode, encoding="utf-8")
+
+
+def request_key(body: dict) -> str:
+    """
+    Hash of everything that decides a completion
+
+    Tool call ids are left out - the API makes up new ones every run, so a
+    replayed conversation wouldn't otherwise match its recording.
+    """
+    messages = []
+    for message in body.get("messages", []):
+        message = {k: v for k, v in message.items() if k != "tool_call_id"}
+        if message.get("tool_calls"):
+            message["tool_calls"] = [{k: v for k, v in call.items() if k != "id"} for call in message["tool_calls"]]
+        messages.append(message)
+    canonical = [body.get("model"), messages, body.get("tools"), bool(body.get("stream"))]
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _kind(body: dict) -> str:
+    # Same split as llm._call_kind: with tools the model plans, without it writes the answer
+    return ("plan" if body.get("tools") else "render") + (":stream" if body.get("stream") else "")
+
+
+class _RecordedStream(httpx.AsyncByteStream):
+    """Passes a streamed completion through while noting each chunk and when it arrived"""
+
+    def __init__(self, stream, on_done):
+        self.stream = stream
+        self.on_done = on_done
+        self.started = time.perf_counter()
+        self.chunks = []
+        self.complete = False
+
+    async def __aiter__(self):
+        async for data in self.stream:
+            self.chunks.append([round(time.perf_counter() - self.started, 4), data.decode("utf-8")])
+            yield data
+        self.complete = True
+
+    async def aclose(self):
+        await self.stream.aclose()
+        # A stream the client abandoned halfway isn't worth replaying
+        if self.complete:
+            self.on_done(self.chunks)
+
+
+class _ReplayedStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: list, speed: float):
+        self.chunks = chunks
+        self.speed = speed
+
+    async def __aiter__(self):
+        elapsed = 0.0
+        for offset, data in self.chunks:
+            if self.speed and offset > elapsed:
+                await asyncio.sleep((offset - elapsed) * self.speed)
+                elapsed = offset
+            yield data.encode("utf-8")
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that records completions to a cassette or replays them from one
+
+    Args:
+        path: Cassette file (JSON lines; .gz to compress)
+        mode: "record" or "replay"
+        transport: Real transport to record through (record mode only)
+        latency: Replay - fraction of the recorded latency to wait
+        miss: Replay - "error" or "cycle" for requests that weren't recorded
+    """
+
+    def __init__(self, path: str, mode: str, transport: httpx.AsyncBaseTransport = None,
+                 latency: float = LLM_CASSETTE_LATENCY, miss: str = LLM_CASSETTE_MISS):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"LLM_CASSETTE_MODE must be record or replay, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.transport = transport
+        self.latency = latency
+        self.miss = miss
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self.entries = {}       # request key -> recordings (repeats are served in turn)
+        self.by_kind = {}       # kind -> every recording, for miss="cycle"
+        self._turns = {}
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with _open(self.path, "r") as cassette:
+            for line in cassette:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], []).append(entry)
+                    self.by_kind.setdefault(entry["kind"], []).append(entry)
+        logger.info(f"LLM cassette: replaying {sum(map(len, self.entries.values()))} completions from {self.path}")
+
+    def _append(self, entry: dict):
+        # Small synchronous append on the event loop - one line per completion
+        with _open(self.path, "a") as cassette:
+            cassette.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.recorded += 1
+
+    def _next(self, key: str, recordings: list) -> dict:
+        turn = self._turns.get(key, 0)
+        self._turns[key] = turn + 1
+        return recordings[turn % len(recordings)]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith(COMPLETIONS_PATH):
+            if self.transport is None:
+                return httpx.Response(404, json={"error": {"message": "Not in the LLM cassette"}})
+            return await self.transport.handle_async_request(request)
+
+        body = json.loads(request.content)
+        key, kind = request_key(body), _kind(body)
+        if self.mode == "record":
+            return await self._record(request, key, kind)
+        return await self._replay(key, kind)
+
+    async def _record(self, request: httpx.Request, key: str, kind: str) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        if response.status_code != 200:
+            return response
+        entry = {"key": key, "kind": kind}
+
+        if kind.endswith(":stream"):
+            def save(chunks):
+                self._append({**entry, "latency": round(time.perf_counter() - started, 4), "chunks": chunks})
+
+            stream = _RecordedStream(response.stream, save)
+            return httpx.Response(200, headers=response.headers, stream=stream, extensions=response.extensions)
+
+        content = await response.aread()
+        self._append({**entry, "latency": round(time.perf_counter() - started, 4), "body": json.loads(content)})
+        return httpx.Response(200, headers=response.headers, content=content, extensions=response.extensions)
+
+    async def _replay(self, key: str, kind: str) -> httpx.Response:
+        recordings = self.entries.get(key)
+        if recordings is None and self.miss == "cycle" and self.by_kind.get(kind):
+            self.misses += 1
+            key, recordings = kind, self.by_kind[kind]
+        if recordings is None:
+            self.misses += 1
+            # 400, not 5xx, so the client doesn't retry a request that can never match
+            return httpx.Response(400, json={"error": {
+                "message": f"No recorded {kind} completion for this request in {self.path}",
+                "type": "cassette_miss",
+            }})
+        entry = self._next(key, recordings)
+        self.replayed += 1
+
+        if "chunks" in entry:
+            return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                                  stream=_ReplayedStream(entry["chunks"], self.latency))
+        if self.latency:
+            await asyncio.sleep(entry["latency"] * self.latency)
+        return httpx.Response(200, json=entry["body"])
+
+    async def aclose(self):
+        if self.transport is not None:
+            await self.transport.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
+
+
+def cassette_transport(limits: httpx.Limits):
+    """The CassetteTransport LLM_CASSETTE_MODE asks for, or None to use the API directly"""
+    if not LLM_CASSETTE_MODE:
+        return None
+    if not LLM_CASSETTE:
+        raise ValueError("LLM_CASSETTE_MODE is set but LLM_CASSETTE (the cassette file) is not")
+    real = httpx.AsyncHTTPTransport(limits=limits) if LLM_CASSETTE_MODE == "record" else None
+    logger.info(f"LLM cassette: {LLM_CASSETTE_MODE} {LLM_CASSETTE}")
+    return CassetteTransport(LLM_CASSETTE, LLM_CASSETTE_MODE, real)
@@ -0,0 +1,314 @@
+"""
+Construction tools available to the AI
+
+Every tool is declared once here - schema, handler, and how it's described to
+users. The model's function list, /tools, and list_available_tools are all
+generated from this registry (see tool_registry.py).
+"""
+
+import os
+import shlex
+
+from jobs import JobQueue
+from tool_registry import ToolRegistry
+
+# Import estimating tools
+try:
+    from estimating_tools import (
+        calculate_material_cost,
+        calculate_labor_cost,
+        calculate_equipment_cost,
+        estimate_project_cost,
+        pricing_version,
+        pin_pricing,
+        PRICING_STORE
+    )
+except ImportError:
+    # If tools not available, define stubs
+    def calculate_material_cost(*args, **kwargs):
+        return {"error": "Estimating tools not loaded"}
+    def calculate_labor_cost(*args, **kwargs):
+        return {"error": "Estimating tools not loaded"}
+    def calculate_equipment_cost(*args, **kwargs):
+        return {"error": "Estimating tools not loaded"}
+    def estimate_project_cost(*args, **kwargs):
+        return {"error": "Estimating tools not loaded"}
+    def pricing_version():
+        return "unavailable"
+    def pin_pricing():
+        return None
+    PRICING_STORE = None
+
+# Swift Proposal Generator, run as a pool of long-lived workers (see integrations/worker_pool.py)...
+PROPOSAL_WORKER_CMD = os.getenv("PROPOSAL_WORKER_CMD")
+
+proposal_workers = None
+if PROPOSAL_WORKER_CMD:
+    from worker_pool import WorkerPool
+
+    proposal_workers = WorkerPool(
+        shlex.split(PROPOSAL_WORKER_CMD),
+        size=int(os.getenv("TOOL_WORKERS", "2")),
+        max_requests=int(os.getenv("TOOL_WORKER_MAX_REQUESTS", "1000")),
+        timeout=float(os.getenv("TOOL_WORKER_TIMEOUT", "30")),
+        health_interval=float(os.getenv("TOOL_WORKER_HEALTH_INTERVAL", "30"))
+    )
+
+# ...or the Proposal Generator exposed as a local web server (takes precedence when set)
+PROPOSAL_URL = os.getenv("PROPOSAL_URL")
+
+proposal_backend = None
+if PROPOSAL_URL:
+    from http_tools import ToolBackend
+
+    proposal_backend = ToolBackend("proposal_generator", PROPOSAL_URL)
+
+# Neither set = mock responses
+
+# Proposals render in the background - the tool call just queues a job
+proposal_jobs = JobQueue()
+
+registry = ToolRegistry()
+
+
+@registry.register(
+    "list_available_tools",
+    "Lists all available construction tools and what they do in simple language. Use when user asks what tools are available, what can you do, or what are my options.",
+    summary="Lists all available construction tools",
+    listed=False
+)
+def list_available_tools(parameters: dict):
+    # Return available tools in simple, straightforward language
+    return registry.menu()
+
+
+@registry.register(
+    "generate_proposal",
+    "Generates a construction proposal PDF. Use when user asks to create, generate, or build a proposal for a construction project.",
+    {
+        "type": "object",
+        "properties": {
+            "project_name": {"type": "string", "description": "Name of the construction project"},
+            "client_name": {"type": "string", "description": "Name of the client"},
+            "project_description": {"type": "string", "description": "Description of the work"},
+            "materials": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "List of materials needed"
+            },
+            "labor_hours": {"type": "number", "description": "Total labor hours"},
+            "total_cost": {"type": "number", "description": "Total project cost"}
+        },
+        "required": ["project_name", "client_name", "total_cost"]
+    },
+    title="Generate Proposal",
+    summary="Generates a construction proposal PDF",
+    help="Creates a construction proposal PDF with project details, materials, labor, and costs.",
+    example="Generate a proposal for a 1000ft waterline project",
+    capability="proposal generation"
+)
+async def generate_proposal(parameters: dict):
+    # Queue the PDF and answer right away; identical in-flight requests share one job
+    job = proposal_jobs.submit("generate_proposal", parameters, render_proposal)
+    return {
+        "status": "queued",
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "message": f"Proposal for {parameters.get('project_name')} is being generated"
+    }
+
+
+def render_proposal(parameters: dict):
+    """Render one proposal PDF (runs on a job worker)"""
+    if proposal_backend is not None:
+        return proposal_backend.post_json("/generate-proposal", parameters)
+    if proposal_workers is not None:
+        # Awaited by the job worker on the event loop
+        return proposal_workers.call("generate_proposal", parameters)
+    
+    # No worker configured - return mock response
+    return {
+        "status": "success",
+        "message": f"Proposal generated for {parameters.get('project_name')}",
+        "pdf_path": f"/proposals/{parameters.get('project_name')}.pdf"
+    }
+
+
+@registry.register(
+    "calculate_materials",
+    "Calculates material quantities needed for a project. Use when user asks about quantities, materials needed, or takeoffs.",
+    {
+        "type": "object",
+        "properties": {
+            "material_type": {"type": "string", "description": "Type of material (pipe, wire, conduit, etc.)"},
+            "length_ft": {"type": "number", "description": "Length in feet"},
+            "diameter_inches": {"type": "number", "description": "Diameter in inches if applicable"}
+        },
+        "required": ["material_type", "length_ft"]
+    },
+    title="Calculate Material Quantities",
+    summary="Calculates material quantities needed",
+    help="Figures out how much material you need for a project (like pipe, wire, or concrete).",
+    example="How much 4-inch pipe do I need for 500 feet?",
+    capability="material calculations"
+)
+def calculate_materials(parameters: dict):
+    # Custom Python tool - calculate materials
+    material_type = parameters.get("material_type", "")
+    length_ft = parameters.get("length_ft", 0)
+
+    # Simple calculation logic
+    if material_type.lower() == "pipe":
+        # Add 10% waste factor
+        quantity = length_ft * 1.1
+        return {
+            "status": "success",
+            "material_type": material_type,
+            "quantity": round(quantity, 2),
+            "unit": "feet",
+            "waste_factor": "10%"
+        }
+    return {
+        "status": "success",
+        "material_type": material_type,
+        "quantity": length_ft,
+        "unit": "feet"
+    }
+
+
+@registry.register(
+    "calculate_material_cost",
+    "Calculates material cost using real pricing data. Use when user asks about material costs, pricing, or cost estimates.",
+    {
+        "type": "object",
+        "properties": {
+            "material_type": {"type": "string", "description": "Type of material (pipe, concrete, rebar, etc.)"},
+            "quantity": {"type": "number", "description": "Quantity needed"},
+            "size": {"type": "string", "description": "Size specification (e.g., '4' or '4 in' for 4-inch pipe, '3000 psi' for concrete, '#4' for rebar)"}
+        },
+        "required": ["material_type", "quantity"]
+    },
+    title="Calculate Material Cost",
+    summary="Calculates material costs using real pricing",
+    help="Tells you how much materials will cost using real pricing data.",
+    example="What's the cost for 1000 feet of 4-inch pipe?",
+    capability="cost estimates"
+)
+def material_cost(parameters: dict):
+    result = calculate_material_cost(
+        parameters.get("material_type"),
+        parameters.get("quantity"),
+        parameters.get("size")
+    )
+    return {"status": "success", **result}
+
+
+@registry.register(
+    "calculate_labor_cost",
+    "Calculates labor cost based on labor rates. Use when user asks about labor costs, crew costs, or hourly rates.",
+    {
+        "type": "object",
+        "properties": {
+            "labor_type": {"type": "string", "description": "Type of laborer (operator, laborer, foreman, electrician, ironworker)"},
+            "hours": {"type": "number", "description": "Number of hours"}
+        },
+        "required": ["labor_type", "hours"]
+    },
+    title="Calculate Labor Cost",
+    summary="Calculates labor costs based on hourly rates",
+    help="Calculates how much labor will cost based on hourly rates for operators, laborers, foremen, electricians, etc.",
+    example="How much will 40 hours of operator time cost?",
+    capability="labor costs"
+)
+def labor_cost(parameters: dict):
+    result = calculate_labor_cost(
+        parameters.get("labor_type"),
+        parameters.get("hours")
+    )
+    return {"status": "success", **result}
+
+
+@registry.register(
+    "calculate_equipment_cost",
+    "Calculates equipment rental cost. Use when user asks about equipment costs or rental rates.",
+    {
+        "type": "object",
+        "properties": {
+            "equipment_type": {"type": "string", "description": "Type of equipment (excavator, auger, compactor)"},
+            "days": {"type": "number", "description": "Number of days needed"}
+        },
+        "required": ["equipment_type", "days"]
+    },
+    title="Calculate Equipment Cost",
+    summary="Calculates equipment rental costs",
+    help="Figures out equipment rental costs for excavators, augers, compactors, etc.",
+    example="How much does it cost to rent an excavator for 5 days?",
+    capability="equipment costs"
+)
+def equipment_cost(parameters: dict):
+    result = calculate_equipment_cost(
+        parameters.get("equipment_type"),
+        parameters.get("days")
+    )
+    return {"status": "success", **result}
+
+
+@registry.register(
+    "estimate_project_cost",
+    "Creates a complete project cost estimate with materials, labor, equipment, and markup. Use when user asks for a full estimate, project cost, or bid estimate.",
+    {
+        "type": "object",
+        "properties": {
+            "materials": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string"},
+                        "quantity": {"type": "number"},
+                        "size": {"type": "string"}
+                    }
+                },
+                "description": "List of materials with type, quantity, and size"
+            },
+            "labor": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string"},
+                        "hours": {"type": "number"}
+                    }
+                },
+                "description": "List of labor with type and hours"
+            },
+            "equipment": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string"},
+                        "days": {"type": "number"}
+                    }
+                },
+                "description": "Optional list of equipment with type and days"
+            },
+            "markup": {"type": "number", "description": "Markup percentage as decimal (default 0.15 for 15%)"}
+        },
+        "required": ["materials", "labor"]
+    },
+    title="Full Project Estimate",
+    summary="Creates a complete project cost estimate",
+    help="Creates a complete project cost estimate with materials, labor, equipment, and markup all included.",
+    example="Give me a full estimate for installing 1000ft of waterline",
+    capability="full project estimates"
+)
+def project_estimate(parameters: dict):
+    # Use estimating tools for full project estimate
+    result = estimate_project_cost(
+        parameters.get("materials", []),
+        parameters.get("labor", []),
+        parameters.get("equipment", []),
+        parameters.get("markup", 0.15)
+    )
+    return {"status": "success", **result}
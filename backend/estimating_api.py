@@ -0,0 +1,318 @@
+"""
+Direct estimating API - typed JSON endpoints that skip the LLM
+
+For ERP, scheduling and other machine clients. Each endpoint takes one
+request, or a batch as {"items": [...]}. Every result in a batch is priced
+from the same pricing version. Whole takeoff files stream through /api/takeoff.
+"""
+
+import asyncio
+import json
+import os
+from typing import List, Optional, Union
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from estimating_tools import (
+    BATCH_MIN_LINES,
+    calculate_equipment_cost,
+    calculate_labor_cost,
+    calculate_material_cost,
+    current_pricing,
+    equipment_costs,
+    estimate_project_cost,
+    labor_costs,
+    material_costs,
+)
+from takeoff_import import TakeoffError, TakeoffTotals, detect_format, iter_row_chunks, price_chunk
+
+# Largest batch accepted in one request
+ESTIMATE_MAX_BATCH = int(os.getenv("ESTIMATE_MAX_BATCH", "10000"))
+
+router = APIRouter(prefix="/api", tags=["estimating"])
+
+
+# Requests
+class MaterialCostRequest(BaseModel):
+    material_type: str
+    quantity: float
+    size: Optional[str] = None
+
+class LaborCostRequest(BaseModel):
+    labor_type: str
+    hours: float
+
+class EquipmentCostRequest(BaseModel):
+    equipment_type: str
+    days: float
+
+class MaterialLine(BaseModel):
+    type: str
+    quantity: float
+    size: Optional[str] = None
+
+class LaborLine(BaseModel):
+    type: str
+    hours: float
+
+class EquipmentLine(BaseModel):
+    type: str
+    days: float
+
+class EstimateRequest(BaseModel):
+    materials: List[MaterialLine]
+    labor: List[LaborLine]
+    equipment: List[EquipmentLine] = []
+    markup: float = 0.15
+
+class MaterialCostBatch(BaseModel):
+    items: List[MaterialCostRequest]
+
+class LaborCostBatch(BaseModel):
+    items: List[LaborCostRequest]
+
+class EquipmentCostBatch(BaseModel):
+    items: List[EquipmentCostRequest]
+
+class EstimateBatch(BaseModel):
+    items: List[EstimateRequest]
+
+
+# Responses
+class LineError(BaseModel):
+    error: str
+
+class MaterialCost(BaseModel):
+    material: str
+    quantity: float
+    unit: str
+    unit_cost: float
+    total_cost: float
+    waste_factor: str
+    total_with_waste: float
+    pricing_version: Optional[str] = None
+
+class LaborCost(BaseModel):
+    labor_type: str
+    hours: float
+    hourly_rate: float
+    total_cost: float
+    pricing_version: Optional[str] = None
+
+class EquipmentCost(BaseModel):
+    equipment: str
+    days: float
+    daily_rate: float
+    total_cost: float
+    pricing_version: Optional[str] = None
+
+class MaterialSection(BaseModel):
+    breakdown: List[Union[MaterialCost, LineError]]
+    subtotal: float
+
+class LaborSection(BaseModel):
+    breakdown: List[Union[LaborCost, LineError]]
+    subtotal: float
+
+class EquipmentSection(BaseModel):
+    breakdown: List[Union[EquipmentCost, LineError]]
+    subtotal: float
+
+class ProjectEstimate(BaseModel):
+    materials: MaterialSection
+    labor: LaborSection
+    equipment: EquipmentSection
+    subtotal: float
+    overhead_profit: float
+    markup_percentage: float
+    total: float
+    pricing_version: Optional[str] = None
+
+class MaterialCostBatchResult(BaseModel):
+    results: List[Union[MaterialCost, LineError]]
+    pricing_version: str
+
+class LaborCostBatchResult(BaseModel):
+    results: List[Union[LaborCost, LineError]]
+    pricing_version: str
+
+class EquipmentCostBatchResult(BaseModel):
+    results: List[Union[EquipmentCost, LineError]]
+    pricing_version: str
+
+class EstimateBatchResult(BaseModel):
+    results: List[ProjectEstimate]
+    pricing_version: str
+
+
+def check_batch(items: list):
+    if len(items) > ESTIMATE_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(items)} items (max {ESTIMATE_MAX_BATCH})")
+
+
+def single(result: dict) -> dict:
+    """A single lookup that didn't price is a 404 - batches report it per item instead"""
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+
+def batch_result(results: list, pricing) -> JSONResponse:
+    """
+    Batch reply, sent as-is
+    
+    The results come straight from the estimating functions, so re-validating
+    thousands of them against the response model would only add latency.
+    The response_model on each route still documents the shape.
+    """
+    return JSONResponse({"results": results, "pricing_version": pricing.version})
+
+
+async def run_priced(lines: int, function, *args):
+    """Small jobs run inline (microseconds); big ones go to a thread so the event loop stays free"""
+    if lines >= BATCH_MIN_LINES:
+        return await asyncio.to_thread(function, *args)
+    return function(*args)
+
+
+@router.post(
+    "/material-cost",
+    response_model=Union[MaterialCost, MaterialCostBatchResult],
+    response_model_exclude_none=True
+)
+async def material_cost(body: Union[MaterialCostRequest, MaterialCostBatch]):
+    """Price a material (or a batch of them) - same math as the calculate_material_cost tool"""
+    pricing = current_pricing()
+    if isinstance(body, MaterialCostRequest):
+        return single(calculate_material_cost(body.material_type, body.quantity, body.size, pricing))
+
+    check_batch(body.items)
+    lines = [{"type": item.material_type, "quantity": item.quantity, "size": item.size} for item in body.items]
+    results = await run_priced(len(lines), material_costs, lines, pricing)
+    return batch_result(results, pricing)
+
+
+@router.post(
+    "/labor-cost",
+    response_model=Union[LaborCost, LaborCostBatchResult],
+    response_model_exclude_none=True
+)
+async def labor_cost(body: Union[LaborCostRequest, LaborCostBatch]):
+    """Price labor hours (or a batch of them)"""
+    pricing = current_pricing()
+    if isinstance(body, LaborCostRequest):
+        return single(calculate_labor_cost(body.labor_type, body.hours, pricing))
+
+    check_batch(body.items)
+    lines = [{"type": item.labor_type, "hours": item.hours} for item in body.items]
+    results = await run_priced(len(lines), labor_costs, lines, pricing)
+    return batch_result(results, pricing)
+
+
+@router.post(
+    "/equipment-cost",
+    response_model=Union[EquipmentCost, EquipmentCostBatchResult],
+    response_model_exclude_none=True
+)
+async def equipment_cost(body: Union[EquipmentCostRequest, EquipmentCostBatch]):
+    """Price equipment days (or a batch of them)"""
+    pricing = current_pricing()
+    if isinstance(body, EquipmentCostRequest):
+        return single(calculate_equipment_cost(body.equipment_type, body.days, pricing))
+
+    check_batch(body.items)
+    lines = [{"type": item.equipment_type, "days": item.days} for item in body.items]
+    results = await run_priced(len(lines), equipment_costs, lines, pricing)
+    return batch_result(results, pricing)
+
+
+def _estimate(request: EstimateRequest, pricing) -> dict:
+    return estimate_project_cost(
+        [line.model_dump() for line in request.materials],
+        [line.model_dump() for line in request.labor],
+        [line.model_dump() for line in request.equipment],
+        request.markup,
+        pricing
+    )
+
+
+def _estimates(items: list, pricing) -> list:
+    return [_estimate(item, pricing) for item in items]
+
+
+def _line_count(request: EstimateRequest) -> int:
+    return len(request.materials) + len(request.labor) + len(request.equipment)
+
+
+@router.post(
+    "/project-estimate",
+    response_model=Union[ProjectEstimate, EstimateBatchResult],
+    response_model_exclude_none=True
+)
+async def project_estimate(body: Union[EstimateRequest, EstimateBatch]):
+    """Full project estimate (or a batch of them) - same math as the estimate_project_cost tool"""
+    pricing = current_pricing()
+    if isinstance(body, EstimateRequest):
+        return await run_priced(_line_count(body), _estimate, body, pricing)
+
+    check_batch(body.items)
+    lines = sum(_line_count(item) for item in body.items)
+    results = await run_priced(lines, _estimates, body.items, pricing)
+    return batch_result(results, pricing)
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for handlers that keep reading the request body while responding
+
+    On servers older than ASGI spec 2.4 (uvicorn's HTTP protocols), StreamingResponse
+    listens on receive() for a disconnect while it streams, which would swallow
+    the upload's remaining body chunks. That listener is held back until
+    `upload_read` is set; until then the body reader sees any disconnect itself
+    (request.stream() raises ClientDisconnect). Streaming, disconnects and
+    background tasks are otherwise Starlette's own.
+    """
+
+    def __init__(self, content, upload_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.upload_read = upload_read
+
+    async def __call__(self, scope, receive, send):
+        async def receive_after_upload():
+            await self.upload_read.wait()
+            return await receive()
+
+        await super().__call__(scope, receive_after_upload, send)
+
+
+@router.post("/takeoff")
+async def import_takeoff(request: Request, markup: float = Query(0.15, allow_inf_nan=False),
+                         format: Optional[str] = None):
+    """
+    Price a takeoff file streamed as the raw request body (CSV or NDJSON)
+    
+    Rows are parsed and priced chunk by chunk while the upload is still arriving.
+    The response is NDJSON: one result per line, {"subtotals": ...} after each
+    chunk, and {"summary": ...} at the end.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "multipart" in content_type.lower():
+        raise HTTPException(status_code=415, detail="Send the file as the raw request body (e.g. curl --data-binary @takeoff.csv)")
+    fmt = detect_format(content_type, format)
+    totals = TakeoffTotals(markup, current_pricing())
+    upload_read = asyncio.Event()
+
+    async def results():
+        try:
+            async for rows in iter_row_chunks(request.stream(), fmt):
+                yield await asyncio.to_thread(price_chunk, rows, totals)
+            upload_read.set()
+            yield json.dumps({"summary": totals.summary()}, allow_nan=False) + "\n"
+        except TakeoffError as exc:
+            yield json.dumps({"error": str(exc), "summary": totals.summary()}, allow_nan=False) + "\n"
+        finally:
+            upload_read.set()
+
+    return UploadStreamingResponse(results(), upload_read, media_type="application/x-ndjson")
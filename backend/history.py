@@ -0,0 +1,216 @@
+"""
+contech1 Conversation History
+Keeps the prompt sent to the model inside a token budget
+
+The client sends the whole conversation with every /chat request, so long
+sessions grow the prompt (and the bill) turn by turn. compact_history() trims
+it before the model sees it:
+1. The system prompt and the most recent messages are always kept as-is
+2. Older tool results are collapsed to their key totals (breakdowns dropped)
+3. If that isn't enough, the oldest turns are dropped and replaced by one
+   short note listing what the user asked about earlier
+
+An assistant message with tool calls is never separated from its tool results.
+"""
+
+import json
+import os
+
+# History settings (override with environment variables)
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))  # 0 = no limit
+HISTORY_KEEP_RECENT = int(os.getenv("HISTORY_KEEP_RECENT", "6"))
+
+# Fixed per-message cost of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+
+# Tool result fields worth keeping once the details are collapsed
+SUMMARY_FIELDS = {
+    "status", "error", "message", "material", "material_type", "labor_type", "equipment",
+    "quantity", "unit", "hours", "days", "total_cost", "total_with_waste", "subtotal",
+    "overhead_profit", "total", "job_id", "status_url", "pdf_path",
+}
+
+# tiktoken encoding, loaded on first use - it reads (or downloads) a large BPE file
+_encoding = None
+_encoding_loaded = False
+
+
+def load_encoding():
+    """The tiktoken encoding, or None when tiktoken isn't available"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # not installed, or the encoding can't be loaded offline
+            _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+HISTORY_STATS = {
+    "requests": 0,
+    "compacted": 0,
+    "tokens_saved": 0,
+    "tool_results_collapsed": 0,
+    "messages_dropped": 0,
+}
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in a piece of text (tiktoken when installed, else ~4 characters per token)"""
+    if not text:
+        return 0
+    encoding = _encoding if _encoding_loaded else load_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: dict) -> int:
+    """Tokens one chat message adds to the prompt"""
+    tokens = MESSAGE_OVERHEAD + count_tokens(message.get("content") or "")
+    for call in message.get("tool_calls") or ():
+        function = call.get("function", {})
+        tokens += count_tokens(function.get("name", "")) + count_tokens(function.get("arguments", ""))
+    return tokens
+
+
+def estimate_prompt_tokens(messages: list) -> int:
+    """Prompt tokens the conversation will cost once compacted (at most the budget)"""
+    tokens = sum(message_tokens(message) for message in messages)
+    return min(tokens, HISTORY_TOKEN_BUDGET) if HISTORY_TOKEN_BUDGET else tokens
+
+
+def collapse_tool_result(content: str) -> str:
+    """
+    Shrink a tool result to the totals a later turn might refer back to
+
+    Args:
+        content: The tool message content (JSON text)
+
+    Returns:
+        Smaller JSON text, or the content unchanged if it isn't a JSON object
+    """
+    try:
+        result = json.loads(content)
+    except (TypeError, ValueError):
+        return content
+    if not isinstance(result, dict):
+        return content
+
+    summary = {}
+    for key, value in result.items():
+        if key in SUMMARY_FIELDS and not isinstance(value, (dict, list)):
+            summary[key] = value
+        elif isinstance(value, dict) and "subtotal" in value:
+            summary[f"{key}_subtotal"] = value["subtotal"]
+        elif isinstance(value, list):
+            summary[f"{key}_count"] = len(value)
+    summary["details"] = "omitted"
+    collapsed = json.dumps(summary)
+    return collapsed if len(collapsed) < len(content) else content
+
+
+def _turns(messages: list) -> list:
+    # Group messages so tool results stay with the assistant message that asked for them
+    turns = []
+    for message in messages:
+        if message.get("role") == "tool" and turns:
+            turns[-1].append(message)
+        else:
+            turns.append([message])
+    return turns
+
+
+def _earlier_note(dropped: list) -> dict:
+    asked = [
+        " ".join(message["content"].split())[:120]
+        for turn in dropped for message in turn
+        if message.get("role") == "user" and message.get("content")
+    ]
+    count = sum(len(turn) for turn in dropped)
+    note = f"{count} earlier messages were left out to save space."
+    if asked:
+        note += " Earlier, the user asked: " + "; ".join(asked[-5:])
+    return {"role": "system", "content": note}
+
+
+def compact_history(messages: list, budget: int = None, keep_recent: int = None):
+    """
+    Fit a conversation into the token budget
+
+    Args:
+        messages: OpenAI-format messages, system prompt first (not modified)
+        budget: Max prompt tokens (default HISTORY_TOKEN_BUDGET, 0 = no limit)
+        keep_recent: Newest messages never collapsed or dropped (default HISTORY_KEEP_RECENT)
+
+    Returns:
+        (messages to send, info) - info has tokens_before, tokens_after,
+        tokens_saved, tool_results_collapsed and messages_dropped
+    """
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+    keep_recent = HISTORY_KEEP_RECENT if keep_recent is None else keep_recent
+
+    sizes = [message_tokens(message) for message in messages]
+    before = sum(sizes)
+    info = {"tokens_before": before, "tokens_after": before, "tokens_saved": 0,
+            "tool_results_collapsed": 0, "messages_dropped": 0}
+    if not budget or before <= budget:
+        return messages, info
+
+    head = 0
+    while head < len(messages) and messages[head].get("role") == "system":
+        head += 1
+    turns = _turns(messages[head:])
+
+    # Whole turns from the end until keep_recent messages are covered
+    recent, kept = len(turns), 0
+    while recent > 0 and kept < keep_recent:
+        recent -= 1
+        kept += len(turns[recent])
+    older, newer = turns[:recent], turns[recent:]
+
+    # 1. Collapse old tool results
+    compacted = []
+    for turn in older:
+        new_turn = []
+        for message in turn:
+            if message.get("role") == "tool":
+                content = collapse_tool_result(message.get("content"))
+                if content != message.get("content"):
+                    message = {**message, "content": content}
+                    info["tool_results_collapsed"] += 1
+            new_turn.append(message)
+        compacted.append(new_turn)
+    total = sum(sizes[:head]) + sum(message_tokens(m) for turn in compacted + newer for m in turn)
+
+    # 2. Drop the oldest turns until the rest (plus the note about them) fits
+    dropped, note = [], None
+    while compacted and total + (message_tokens(note) if note else 0) > budget:
+        turn = compacted.pop(0)
+        dropped.append(turn)
+        total -= sum(message_tokens(message) for message in turn)
+        note = _earlier_note(dropped)
+
+    result = list(messages[:head])
+    if note:
+        result.append(note)
+        total += message_tokens(note)
+        info["messages_dropped"] = sum(len(turn) for turn in dropped)
+    for turn in compacted + newer:
+        result.extend(turn)
+
+    info["tokens_after"] = total
+    info["tokens_saved"] = max(0, before - total)
+    return result, info
+
+
+def record_compaction(info: dict):
+    """Add one request's compaction to HISTORY_STATS"""
+    HISTORY_STATS["requests"] += 1
+    if info["tokens_saved"]:
+        HISTORY_STATS["compacted"] += 1
+        HISTORY_STATS["tokens_saved"] += info["tokens_saved"]
+        HISTORY_STATS["tool_results_collapsed"] += info["tool_results_collapsed"]
+        HISTORY_STATS["messages_dropped"] += info["messages_dropped"]
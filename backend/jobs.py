@@ -0,0 +1,214 @@
+"""
+contech1 Background Jobs
+Slow tools (proposal PDFs) run here instead of inside the /chat request
+
+submit() returns a job right away; a bounded set of workers runs the jobs.
+Identical requests submitted while a job is still queued or running share
+that job instead of rendering twice. Finished jobs stay in an LRU + TTL
+artifact store so /jobs/{id} can report them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from cache import TTLCache, canonical_key
+
+logger = logging.getLogger(__name__)
+
+# Job settings (override with environment variables)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "120"))
+JOB_RESULTS_SIZE = int(os.getenv("JOB_RESULTS_SIZE", "256"))
+JOB_RESULTS_TTL = float(os.getenv("JOB_RESULTS_TTL", "3600"))
+
+
+class QueueFull(RuntimeError):
+    """Too many jobs waiting - try again later"""
+
+
+class Job:
+    """One queued unit of work and, once finished, its result"""
+
+    __slots__ = ("id", "tool", "key", "run", "parameters", "status", "result", "error",
+                 "created_at", "started_at", "finished_at", "done")
+
+    def __init__(self, tool: str, key: str, run, parameters: dict):
+        self.id = uuid.uuid4().hex
+        self.tool = tool
+        self.key = key
+        self.run = run
+        self.parameters = parameters
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = asyncio.Event()
+
+    def info(self) -> dict:
+        info = {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+class JobQueue:
+    """
+    Bounded background job queue
+
+    Args:
+        workers: Jobs run at the same time
+        queue_size: Jobs allowed to wait before submit() raises QueueFull
+        timeout: Seconds a job may run before it fails
+        results_size: Finished jobs kept (LRU)
+        results_ttl: Seconds a finished job is kept
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE,
+                 timeout: float = JOB_TIMEOUT, results_size: int = JOB_RESULTS_SIZE,
+                 results_ttl: float = JOB_RESULTS_TTL):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = {}        # job id -> Job (queued or running)
+        self.by_key = {}        # dedupe key -> Job (queued or running)
+        self.finished = TTLCache(results_size, results_ttl)
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+        self._queue = None
+        self._tasks = []
+
+    def _ensure_started(self):
+        # Started lazily so the workers bind to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, tool: str, parameters: dict, run) -> Job:
+        """
+        Queue run(parameters) - must be called from the event loop
+
+        Args:
+            tool: Tool name (with parameters, the dedupe key)
+            parameters: Tool arguments
+            run: Callable doing the work - sync (runs in a thread) or async
+
+        Returns:
+            The new Job, or the in-flight one for an identical request
+
+        Raises:
+            QueueFull: the queue is at capacity
+        """
+        self._ensure_started()
+        key = canonical_key(tool, parameters)
+        existing = self.by_key.get(key)
+        if existing is not None:
+            self.deduplicated += 1
+            return existing
+
+        job = Job(tool, key, run, parameters)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"Job queue is full ({self.queue_size} waiting)")
+        self.active[job.id] = job
+        self.by_key[key] = job
+        self.submitted += 1
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await asyncio.wait_for(self._run(job), self.timeout)
+                if isinstance(job.result, dict) and job.result.get("status") == "error":
+                    raise RuntimeError(job.result.get("message", "Job failed"))
+                job.status = "done"
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "Cancelled (server shutting down)"
+                self._finish(job)
+                raise
+            except asyncio.TimeoutError:
+                job.status = "failed"
+                job.error = f"Timed out after {self.timeout:g} seconds"
+                self.failed += 1
+            except Exception as exc:
+                logger.error(f"Job {job.id} ({job.tool}) failed: {exc}")
+                job.status = "failed"
+                job.error = str(exc)
+                self.failed += 1
+            self._finish(job)
+
+    @staticmethod
+    async def _run(job: Job):
+        if asyncio.iscoroutinefunction(job.run):
+            return await job.run(job.parameters)
+        result = await asyncio.to_thread(job.run, job.parameters)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    def _finish(self, job: Job):
+        job.finished_at = time.time()
+        job.run = job.parameters = None
+        self.active.pop(job.id, None)
+        if self.by_key.get(job.key) is job:
+            del self.by_key[job.key]
+        self.finished.set(job.id, job)
+        job.done.set()
+
+    def get(self, job_id: str):
+        """The job with this id, if it's still running or still in the artifact store"""
+        return self.active.get(job_id) or self.finished.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float = None):
+        """Wait for a job to finish (None if it doesn't exist)"""
+        job = self.get(job_id)
+        if job is not None:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        return job
+
+    async def close(self):
+        """Stop the workers and fail every job that hadn't finished"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs still queued would otherwise stay "queued" forever
+        for job in list(self.active.values()):
+            job.status = "failed"
+            job.error = "Cancelled (server shutting down)"
+            self._finish(job)
+        # The next submit() starts fresh workers on whatever loop is running then
+        self._queue = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": sum(1 for job in self.active.values() if job.status == "running"),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "failed": self.failed,
+            "stored": len(self.finished),
+        }
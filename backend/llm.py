@@ -0,0 +1,210 @@
+"""
+contech1 LLM Client
+Shared async OpenAI client with per-call timeouts and a bounded connection pool
+
+The openai package takes about half a second to import, so it (and httpx)
+is only imported when the first completion needs the client - see LazyClient.
+"""
+
+import os
+import logging
+import threading
+import time
+
+from metrics import LLM_ERRORS, LLM_FIRST_TOKEN, LLM_LATENCY, LLM_TOKENS
+from tracing import add_span
+
+logger = logging.getLogger(__name__)
+
+# Model and request settings (override with environment variables)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# Connection pool limits - one pool is shared by every request in the worker
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+
+
+class RateLimited(Exception):
+    """The LLM provider answered 429 - retry_after is the wait it asked for, in seconds"""
+
+    def __init__(self, message: str, retry_after: str = "1"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def pool_limits():
+    """Connection pool limits (httpx.Limits) for the LLM API"""
+    import httpx
+
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+
+
+def create_client(api_key: str, transport=None):
+    """
+    Build the async OpenAI client used by the backend
+
+    Args:
+        api_key: OpenAI API key
+        transport: Optional httpx transport to send requests through (e.g. a
+            CassetteTransport that records or replays completions)
+
+    Returns:
+        An openai.AsyncOpenAI client
+    """
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(
+        limits=pool_limits(),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        transport=transport,
+    )
+    logger.info(
+        f"LLM client pool: max_connections={LLM_MAX_CONNECTIONS}, "
+        f"keepalive={LLM_MAX_KEEPALIVE}, timeout={LLM_TIMEOUT}s"
+    )
+    return AsyncOpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+    )
+
+
+class LazyClient:
+    """
+    Stands in for the AsyncOpenAI client and builds it on first use
+
+    Importing openai and opening the connection pool is the slowest part of
+    starting the app, and a cold start that only serves /health or the
+    estimating API never needs it. A missing API key surfaces on the first
+    LLM call instead of stopping the app from starting.
+
+    Args:
+        factory: Zero-argument function returning the real client
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._client = None
+        # A warm-up thread and the first request may both ask at once - build only one
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The real client, built on first call"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    started = time.perf_counter()
+                    self._client = self.factory()
+                    logger.info(f"LLM client ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return self._client
+
+    @property
+    def ready(self) -> bool:
+        return self._client is not None
+
+    @property
+    def chat(self):
+        return self.get().chat
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+
+
+def _rate_limited(exc: Exception):
+    """RateLimited for a provider 429 (openai.RateLimitError), else None"""
+    if getattr(exc, "status_code", None) != 429:
+        return None
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after", "1") if response is not None else "1"
+    return RateLimited(str(exc), retry_after)
+
+
+def _completion_params(messages: list, tools: list = None, timeout: float = None) -> dict:
+    """Build the keyword arguments shared by every completion call"""
+    params = {
+        "model": LLM_MODEL,
+        "messages": messages,
+        "timeout": timeout or LLM_TIMEOUT,
+    }
+    if tools:
+        params["tools"] = tools
+        params["tool_choice"] = "auto"
+    return params
+
+
+def _call_kind(tools: list) -> str:
+    # With tools the model is planning which to call; without, it's writing the answer
+    return "plan" if tools else "render"
+
+
+def record_usage(usage):
+    """Count the tokens a completion used (usage may be missing)"""
+    if usage is not None:
+        LLM_TOKENS.inc("prompt", amount=getattr(usage, "prompt_tokens", 0) or 0)
+        LLM_TOKENS.inc("completion", amount=getattr(usage, "completion_tokens", 0) or 0)
+
+
+async def create_completion(client, messages: list, tools: list = None,
+                            timeout: float = None):
+    """
+    Run one chat completion without blocking the event loop
+
+    Args:
+        client: Async client from create_client() (or a LazyClient)
+        messages: Conversation in OpenAI format
+        tools: Optional tool schemas (enables tool_choice="auto")
+        timeout: Per-call timeout in seconds (defaults to LLM_TIMEOUT)
+
+    Returns:
+        The ChatCompletion response
+    """
+    kind = _call_kind(tools)
+    started = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(**_completion_params(messages, tools, timeout))
+    except Exception as exc:
+        LLM_ERRORS.inc(kind, type(exc).__name__)
+        raise _rate_limited(exc) or exc
+    finally:
+        elapsed = time.perf_counter() - started
+        LLM_LATENCY.observe(elapsed, kind, "false")
+        add_span(f"llm_{kind}", started, elapsed)
+    record_usage(getattr(response, "usage", None))
+    return response
+
+
+async def stream_completion(client, messages: list, tools: list = None,
+                            timeout: float = None):
+    """
+    Stream one chat completion, yielding chunks as the model produces them
+
+    Same arguments as create_completion(). Each chunk carries a delta with
+    either content text or pieces of tool calls.
+    """
+    kind = _call_kind(tools)
+    started = time.perf_counter()
+    first = True
+    try:
+        stream = await client.chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **_completion_params(messages, tools, timeout)
+        )
+        async for chunk in stream:
+            if first:
+                LLM_FIRST_TOKEN.observe(time.perf_counter() - started, kind)
+                first = False
+            # The last chunk carries token usage and no choices
+            record_usage(getattr(chunk, "usage", None))
+            yield chunk
+    except Exception as exc:
+        LLM_ERRORS.inc(kind, type(exc).__name__)
+        raise _rate_limited(exc) or exc
+    finally:
+        elapsed = time.perf_counter() - started
+        LLM_LATENCY.observe(elapsed, kind, "true")
+        add_span(f"llm_{kind}", started, elapsed)
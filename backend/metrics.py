@@ -0,0 +1,213 @@
+"""
+contech1 Metrics
+Prometheus text-format metrics for GET /metrics, with no extra dependency
+
+Recording is a dict lookup and a few additions, cheap enough to leave on in
+the hot path. Recording happens on the event loop (tool threads report back
+through run_tool_call), so no locks are needed.
+
+Counters and histograms are recorded as things happen. Everything the
+components already count in their stats() dicts (caches, sessions, admission,
+jobs...) is read at scrape time and exported as gauges, so those numbers
+match /health exactly.
+"""
+
+import time
+from bisect import bisect_left
+
+# Seconds - LLM calls take 0.3-30 s, tools 1 ms-20 s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name + _labels(self.labels, labels), value
+
+
+class Gauge(Counter):
+    """Value that goes up and down (e.g. requests in flight)"""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+
+class Histogram:
+    """Distribution of observed values (latencies) in fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}    # labels -> [count per bucket..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = 'le="' + (bound if bound == "+Inf" else repr(float(bound))) + '"'
+                yield self.name + "_bucket" + _labels(self.labels, labels, le), cumulative
+            yield self.name + "_sum" + _labels(self.labels, labels), series[-1]
+            yield self.name + "_count" + _labels(self.labels, labels), cumulative
+
+
+class MetricsRegistry:
+    """Every metric plus the stats() sources read at scrape time"""
+
+    def __init__(self, namespace: str = "contech1"):
+        self.namespace = namespace
+        self.metrics = []
+        self.sources = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._add(Counter(f"{self.namespace}_{name}", help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self._add(Gauge(f"{self.namespace}_{name}", help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(f"{self.namespace}_{name}", help, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def register_stats(self, component: str, stats_fn):
+        """
+        Export a component's stats() at scrape time
+
+        Numeric values become gauges named <namespace>_<component>_<key>, and
+        nested dicts are flattened into the name. When stats_fn returns a dict
+        of dicts (one per backend, say), each becomes a series labelled
+        name="<its key>". Anything that isn't a number is skipped.
+        """
+        self.sources.append((component, stats_fn))
+
+    def _stats_samples(self):
+        for component, stats_fn in self.sources:
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            prefix = f"{self.namespace}_{component}"
+            if stats and all(isinstance(child, dict) for child in stats.values()):
+                for name, child in stats.items():
+                    yield from self._flatten(prefix, child, f'{{name="{_escape(name)}"}}')
+            else:
+                yield from self._flatten(prefix, stats or {}, "")
+
+    def _flatten(self, prefix: str, stats: dict, labels: str):
+        for key, value in stats.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                yield f"{prefix}_{key}", labels, value
+            elif isinstance(value, dict):
+                yield from self._flatten(f"{prefix}_{key}", value, labels)
+
+    def render(self) -> str:
+        """The Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{sample} {_number(value)}" for sample, value in metric.samples())
+        # Samples of one metric must be listed together
+        families = {}
+        for name, labels, value in self._stats_samples():
+            families.setdefault(name, []).append(f"{name}{labels} {_number(value)}")
+        for name, samples in families.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Recorded where the work happens (llm.py, tool_runner.py, MetricsMiddleware)
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_call_duration_seconds", "Time for one LLM completion (whole stream for streamed calls)", ("call", "stream"))
+LLM_FIRST_TOKEN = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds", "Time until a streamed completion sends its first chunk", ("call",))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens reported by the LLM provider", ("type",))
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "LLM calls that raised", ("call", "error"))
+TOOL_LATENCY = REGISTRY.histogram("tool_duration_seconds", "Time for one tool call", ("tool",))
+TOOL_CALLS = REGISTRY.counter("tool_calls_total", "Tool calls by outcome (ok, error, timeout)", ("tool", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to answer an HTTP request (streams: until the last byte)", ("route", "method"))
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests answered", ("route", "method", "status"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being handled")
+HTTP_IN_FLIGHT.set(0)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template (/jobs/{job_id}, not the id)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The route is only known once the router has matched it
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_LATENCY.observe(time.perf_counter() - started, route, scope["method"])
+            HTTP_REQUESTS.inc(route, scope["method"], str(status[0]))
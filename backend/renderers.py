@@ -0,0 +1,103 @@
+"""
+contech1 Response Rendering
+Formats deterministic tool results on the server, so simple lookups don't need a
+second LLM round-trip just to turn tool JSON into a sentence.
+
+Each tool can declare a template - either a str.format() string filled from the
+result dict, or a function that takes the result and returns text. Tools without a
+template (like estimate_project_cost) are explained by the model as before.
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "auto" renders with templates when every tool in the turn has one,
+# "llm" always asks the model to write the final answer
+RESPONSE_RENDERING = os.getenv("RESPONSE_RENDERING", "auto").lower()
+
+# How many second completions were skipped vs. made
+RENDER_STATS = {
+    "completions_saved": 0,
+    "completions_made": 0,
+}
+
+
+def _render_tool_list(result: dict) -> str:
+    lines = [result["summary"], ""]
+    for tool in result["tools"]:
+        lines.append(f"- {tool['name']}: {tool['description']} (e.g. \"{tool['example']}\")")
+    return "\n".join(lines)
+
+
+def _render_materials(result: dict) -> str:
+    text = f"You need {result['quantity']:,} {result['unit']} of {result['material_type']}"
+    if "waste_factor" in result:
+        text += f" (includes {result['waste_factor']} waste)"
+    return text + "."
+
+
+TOOL_TEMPLATES = {
+    "list_available_tools": _render_tool_list,
+    "calculate_materials": _render_materials,
+    "calculate_material_cost": (
+        "{quantity:,} {unit} of {material} at ${unit_cost:,.2f} per unit comes to ${total_cost:,.2f}. "
+        "With {waste_factor} waste, plan on ${total_with_waste:,.2f}."
+    ),
+    "calculate_labor_cost": (
+        "{hours:,} hours of {labor_type} time at ${hourly_rate:,.2f}/hr costs ${total_cost:,.2f}."
+    ),
+    "calculate_equipment_cost": (
+        "{equipment} rental for {days:,} days at ${daily_rate:,.2f}/day costs ${total_cost:,.2f}."
+    ),
+    "generate_proposal": "{message}. Track its progress at {status_url}.",
+}
+
+
+def render_tool_result(tool_name: str, result: dict):
+    """
+    Render one tool result with its template
+
+    Returns:
+        The text, or None if the tool has no template or the result
+        doesn't fit it (errors, missing fields) and needs the model
+    """
+    template = TOOL_TEMPLATES.get(tool_name)
+    if template is None or result.get("status") == "error" or "error" in result:
+        return None
+
+    try:
+        if callable(template):
+            return template(result)
+        return template.format(**result)
+    except (KeyError, ValueError, TypeError) as exc:
+        logger.warning(f"Template for {tool_name} didn't fit result: {exc}")
+        return None
+
+
+def render_tool_results(results: list):
+    """
+    Render every tool result from one turn
+
+    Args:
+        results: Tool call results from tool_runner.run_tool_calls()
+
+    Returns:
+        The final answer text, or None if the model should write it
+    """
+    if RESPONSE_RENDERING != "auto":
+        return None
+
+    rendered = []
+    for item in results:
+        text = render_tool_result(item["name"], item["result"])
+        if text is None:
+            return None
+        rendered.append(text)
+    return "\n\n".join(rendered)
+
+
+def record_render(saved: bool):
+    """Count whether a turn skipped its second completion"""
+    RENDER_STATS["completions_saved" if saved else "completions_made"] += 1
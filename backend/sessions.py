@@ -0,0 +1,188 @@
+"""
+contech1 Chat Sessions
+Server-held conversation history, so a client sends only its newest message
+
+Sessions live in an in-memory LRU bounded by count and by total size. Idle
+sessions expire after SESSION_TTL. With SESSION_DB set, sessions pushed out of
+memory (and all of them at shutdown) spill to SQLite and are loaded back on
+their next message; without it they're simply forgotten.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+from cache import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Session settings (override with environment variables)
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "200"))
+SESSION_DB = os.getenv("SESSION_DB")  # optional SQLite file
+SESSION_DB_ROWS = int(os.getenv("SESSION_DB_ROWS", "100000"))
+
+
+def _size(messages: list) -> int:
+    return sum(len(json.dumps(message)) for message in messages)
+
+
+class Session:
+    """One conversation: OpenAI-format messages without the system prompt"""
+
+    __slots__ = ("id", "messages", "size", "last_used")
+
+    def __init__(self, session_id: str, messages: list = None):
+        self.id = session_id
+        self.messages = messages or []
+        self.size = _size(self.messages)
+        self.last_used = time.time()
+
+
+class SessionStore:
+    """
+    Bounded store of chat sessions - used from the event loop only
+
+    Args:
+        ttl: Seconds a session may sit idle before it's dropped
+        max_sessions: Sessions kept in memory (least recently used go first)
+        max_bytes: Total size of the messages kept in memory
+        max_messages: Messages kept per session (oldest turns are trimmed)
+        db_path: Optional SQLite file sessions spill to
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX,
+                 max_bytes: int = SESSION_MAX_BYTES, max_messages: int = SESSION_MAX_MESSAGES,
+                 db_path: str = SESSION_DB):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.store = SQLiteStore(db_path, SESSION_DB_ROWS, table="sessions") if db_path else None
+        self.bytes = 0
+        self.counters = {"created": 0, "expired": 0, "evicted": 0, "spilled": 0, "restored": 0}
+        self._sessions = OrderedDict()
+
+    def create(self) -> str:
+        """Start an empty session and return its id"""
+        session = Session(uuid.uuid4().hex)
+        self._sessions[session.id] = session
+        self.counters["created"] += 1
+        self._evict()
+        return session.id
+
+    def _load(self, session_id: str):
+        session = self._sessions.get(session_id)
+        if session is not None and session.last_used + self.ttl < time.time():
+            self._drop(session_id)
+            self.counters["expired"] += 1
+            session = None
+        if session is None and self.store is not None:
+            # SQLiteStore only returns rows that haven't expired
+            messages = self.store.get(session_id)
+            if messages is not None:
+                self.store.delete(session_id)
+                session = Session(session_id, messages)
+                self._sessions[session_id] = session
+                self.bytes += session.size
+                self.counters["restored"] += 1
+        if session is not None:
+            session.last_used = time.time()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get(self, session_id: str):
+        """The session's messages (treat as read-only), or None if unknown or expired"""
+        session = self._load(session_id)
+        if session is None:
+            return None
+        self._evict()
+        return session.messages
+
+    def append(self, session_id: str, messages: list) -> bool:
+        """
+        Add a finished turn to a session
+
+        Returns:
+            False if the session no longer exists (deleted or expired meanwhile)
+        """
+        session = self._load(session_id)
+        if session is None:
+            return False
+        session.messages.extend(messages)
+        added = _size(messages)
+        session.size += added
+        self.bytes += added
+        self._trim(session)
+        self._evict()
+        return True
+
+    def delete(self, session_id: str) -> bool:
+        found = self._drop(session_id) is not None
+        if self.store is not None and self.store.get(session_id) is not None:
+            self.store.delete(session_id)
+            found = True
+        return found
+
+    def _trim(self, session: Session):
+        # Drop the oldest messages, never leaving tool results without their request
+        excess = len(session.messages) - self.max_messages
+        if self.max_messages <= 0 or excess <= 0:
+            return
+        while excess < len(session.messages) and session.messages[excess].get("role") == "tool":
+            excess += 1
+        removed = _size(session.messages[:excess])
+        del session.messages[:excess]
+        session.size -= removed
+        self.bytes -= removed
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.bytes -= session.size
+        return session
+
+    def _spill(self, session: Session):
+        remaining = session.last_used + self.ttl - time.time()
+        if self.store is not None and remaining > 0:
+            self.store.set(session.id, session.messages, remaining)
+            self.counters["spilled"] += 1
+
+    def _evict(self):
+        now = time.time()
+        # Least recently used first, so expired sessions are at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used + self.ttl < now:
+                self._drop(session.id)
+                self.counters["expired"] += 1
+            elif len(self._sessions) > self.max_sessions or (self.bytes > self.max_bytes and len(self._sessions) > 1):
+                self._drop(session.id)
+                self._spill(session)
+                self.counters["evicted"] += 1
+            else:
+                break
+
+    def close(self):
+        """Spill every live session so they survive a restart"""
+        if self.store is None:
+            return
+        for session in list(self._sessions.values()):
+            self._spill(session)
+        self.store.close()
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "persistent": self.store is not None,
+            **self.counters,
+        }
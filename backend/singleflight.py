@@ -0,0 +1,132 @@
+"""
+contech1 Request Coalescing
+Identical requests that arrive while one is already running share its result
+
+When a dashboard refreshes or a team asks for the same estimate at once, only
+the first request runs; the others wait for it and get the same answer. Unlike
+a cache, nothing is kept once the shared computation finishes.
+
+Cancellation: a waiter that goes away (client disconnected, tool timeout)
+stops waiting without cancelling the work for the others. Only when every
+waiter has gone is the shared computation cancelled.
+"""
+
+import asyncio
+import inspect
+import os
+
+from cache import canonical_key
+from tracing import span
+
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1").lower() in ("1", "true", "yes")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time - used from the event loop only
+
+    Args:
+        enabled: When False, every call runs on its own
+    """
+
+    def __init__(self, enabled: bool = COALESCE_REQUESTS):
+        self.enabled = enabled
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self._flights = {}
+
+    async def do(self, key: str, fn):
+        """
+        Run fn() - or join the identical call already running
+
+        Args:
+            key: Requests with equal keys share one computation
+            fn: No-argument coroutine function doing the work
+
+        Returns:
+            (result, shared) - shared is True when this call joined another's
+            computation. The result is shared between waiters; treat it as read-only.
+        """
+        self.calls += 1
+        if not self.enabled:
+            return await fn(), False
+
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            flight = _Flight(asyncio.get_running_loop().create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            # shield: cancelling this waiter must not cancel the others' work
+            if shared:
+                # The work's own spans land in the first caller's trace
+                with span("coalesced_wait"):
+                    return await asyncio.shield(flight.task), shared
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Everyone waiting has gone - nobody needs the result
+                self.cancelled += 1
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def wrap(self, execute, version_fn=None):
+        """
+        Coalesce identical tool calls in front of execute(tool_name, parameters)
+
+        The key is the tool name and canonical parameters, so the same call
+        with its arguments in a different order is still shared. Sync execute
+        functions run in a thread, as run_tool_call would run them.
+
+        Args:
+            execute: The tool executor to put coalescing in front of
+            version_fn: Optional - returns the pricing version in use, so
+                requests pinned to different versions never share a result
+        """
+
+        async def coalesced_execute(tool_name: str, parameters: dict):
+            async def run():
+                if inspect.iscoroutinefunction(execute):
+                    result = await execute(tool_name, parameters)
+                else:
+                    result = await asyncio.to_thread(execute, tool_name, parameters)
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+
+            key = canonical_key(tool_name, parameters)
+            if version_fn is not None:
+                key = version_fn() + "|" + key
+            result, _ = await self.do(key, run)
+            return result
+
+        return coalesced_execute
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "coalesce_rate": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+        }
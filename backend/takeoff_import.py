@@ -0,0 +1,259 @@
+"""
+Streaming takeoff import
+
+Reads a takeoff upload (CSV or NDJSON) incrementally and prices it in chunks,
+streaming NDJSON back as it goes:
+- one result per line item
+- running subtotals after each chunk
+- a final summary
+
+Only one chunk of rows is held at a time, so memory stays flat whatever the file
+size. Totals match estimate_project_cost() on the same lines.
+
+Each line item has a kind (material, labor, equipment - default material), a
+type, and an amount: quantity (plus optional size) for materials, hours for
+labor, days for equipment. Labor and equipment also accept "quantity".
+"""
+
+import codecs
+import csv
+import json
+import math
+
+from estimating_tools import equipment_costs, labor_costs, material_costs
+
+# Rows priced per chunk (bounds memory; big enough for the batch engine)
+TAKEOFF_CHUNK_ROWS = 5000
+
+# Longest single line/record accepted, in characters
+TAKEOFF_MAX_LINE = 1 << 20
+
+KINDS = {
+    "material": "material", "materials": "material",
+    "labor": "labor", "labour": "labor",
+    "equipment": "equipment",
+}
+
+AMOUNT_FIELDS = {
+    "material": ("quantity",),
+    "labor": ("hours", "quantity"),
+    "equipment": ("days", "quantity"),
+}
+
+
+class TakeoffError(ValueError):
+    """The upload can't be read at all (as opposed to one bad line)"""
+
+
+def detect_format(content_type: str = None, requested: str = None):
+    """'csv' or 'ndjson' from an explicit format or the content type (None = sniff the first line)"""
+    hint = (requested or content_type or "").lower()
+    if "csv" in hint:
+        return "csv"
+    if "ndjson" in hint or "jsonl" in hint or "json" in hint:
+        return "ndjson"
+    return None
+
+
+async def iter_lines(chunks):
+    """Decode a byte stream into lines without ever holding more than one partial line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        text = pending + decoder.decode(chunk)
+        lines = text.split("\n")
+        pending = lines.pop()
+        if len(pending) > TAKEOFF_MAX_LINE:
+            raise TakeoffError(f"Line longer than {TAKEOFF_MAX_LINE} characters")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+async def iter_csv_records(lines):
+    """Join physical lines into CSV records (a quoted field may span lines)"""
+    record = None
+    async for line in lines:
+        record = line if record is None else record + "\n" + line
+        if record.count('"') % 2 == 0:
+            yield record
+            record = None
+        elif len(record) > TAKEOFF_MAX_LINE:
+            raise TakeoffError(f"Record longer than {TAKEOFF_MAX_LINE} characters (unclosed quote?)")
+    if record is not None:
+        yield record
+
+
+def parse_line(row: dict):
+    """
+    One takeoff row -> (kind, {"type", "size", amount}) or an error message
+
+    Returns:
+        (kind, line dict) or (None, error message)
+    """
+    kind = KINDS.get(str(row.get("kind") or "material").strip().lower())
+    if kind is None:
+        return None, f"Unknown kind '{row.get('kind')}' (use material, labor, or equipment)"
+    item_type = row.get("type")
+    if item_type is None or not str(item_type).strip():
+        return None, "Missing type"
+
+    amount = None
+    for field in AMOUNT_FIELDS[kind]:
+        value = row.get(field)
+        if value is not None and value != "":
+            amount = value
+            break
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError, OverflowError):
+        return None, f"Missing or invalid {AMOUNT_FIELDS[kind][0]}"
+    # 'nan' / 'inf' parse as floats, but can't be priced (or written as JSON)
+    if not math.isfinite(amount):
+        return None, f"Missing or invalid {AMOUNT_FIELDS[kind][0]}"
+
+    if kind == "material":
+        size = row.get("size")
+        return kind, {"type": str(item_type), "quantity": amount, "size": str(size) if size not in (None, "") else None}
+    if kind == "labor":
+        return kind, {"type": str(item_type), "hours": amount}
+    return kind, {"type": str(item_type), "days": amount}
+
+
+async def iter_row_chunks(chunks, fmt=None, chunk_rows: int = TAKEOFF_CHUNK_ROWS):
+    """
+    Parse an upload into lists of (line number, row dict or error message)
+
+    Line numbers count data rows from 1 (the CSV header isn't counted).
+    """
+    lines = iter_lines(chunks)
+    header = None
+    batch = []
+    number = 0
+
+    if fmt is None:
+        # Sniff: first non-blank line starting with '{' means NDJSON
+        first = None
+        async for line in lines:
+            if line.strip():
+                first = line
+                break
+        if first is None:
+            return
+        fmt = "ndjson" if first.lstrip().startswith("{") else "csv"
+        lines = _prepend(first, lines)
+
+    records = iter_csv_records(lines) if fmt == "csv" else lines
+    async for record in records:
+        if not record.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([record]), [])
+            if header is None:
+                header = [name.strip().lower() for name in values]
+                if "type" not in header:
+                    raise TakeoffError("CSV header must include a 'type' column")
+                continue
+            row = dict(zip(header, (value.strip() for value in values)))
+        else:
+            try:
+                row = json.loads(record)
+            except json.JSONDecodeError as exc:
+                row = f"Invalid JSON: {exc.msg}"
+            else:
+                if not isinstance(row, dict):
+                    row = "Each line must be a JSON object"
+
+        number += 1
+        batch.append((number, row))
+        if len(batch) >= chunk_rows:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def _prepend(first, lines):
+    yield first
+    async for line in lines:
+        yield line
+
+
+class TakeoffTotals:
+    """Running totals across chunks - summed line by line, in file order"""
+
+    def __init__(self, markup: float, pricing):
+        self.markup = markup
+        self.pricing = pricing
+        self.materials = 0
+        self.labor = 0
+        self.equipment = 0
+        self.lines = 0
+        self.errors = 0
+
+    def subtotals(self) -> dict:
+        return {
+            "lines": self.lines,
+            "errors": self.errors,
+            "materials": round(self.materials, 2),
+            "labor": round(self.labor, 2),
+            "equipment": round(self.equipment, 2),
+            "subtotal": round(self.materials + self.labor + self.equipment, 2),
+        }
+
+    def summary(self) -> dict:
+        subtotal = self.materials + self.labor + self.equipment
+        overhead_profit = subtotal * self.markup
+        return {
+            **self.subtotals(),
+            "overhead_profit": round(overhead_profit, 2),
+            "markup_percentage": self.markup * 100,
+            "total": round(subtotal + overhead_profit, 2),
+            "pricing_version": self.pricing.version,
+        }
+
+
+def price_chunk(rows: list, totals: TakeoffTotals) -> str:
+    """
+    Price one chunk of parsed rows and update the running totals
+
+    Returns:
+        NDJSON text: one result per row, then the running subtotals
+    """
+    parsed = []
+    by_kind = {"material": [], "labor": [], "equipment": []}
+    for number, row in rows:
+        kind, line = parse_line(row) if isinstance(row, dict) else (None, row)
+        parsed.append((number, kind, line))
+        if kind is not None:
+            by_kind[kind].append(line)
+
+    priced = {
+        "material": iter(material_costs(by_kind["material"], totals.pricing)),
+        "labor": iter(labor_costs(by_kind["labor"], totals.pricing)),
+        "equipment": iter(equipment_costs(by_kind["equipment"], totals.pricing)),
+    }
+
+    out = []
+    for number, kind, line in parsed:
+        totals.lines += 1
+        if kind is None:
+            totals.errors += 1
+            out.append(json.dumps({"line": number, "error": line}, allow_nan=False))
+            continue
+        result = next(priced[kind])
+        if "error" in result:
+            totals.errors += 1
+        elif kind == "material":
+            totals.materials += result["total_with_waste"]
+        elif kind == "labor":
+            totals.labor += result["total_cost"]
+        else:
+            totals.equipment += result["total_cost"]
+        out.append(json.dumps({"line": number, "kind": kind, **result}, allow_nan=False))
+
+    out.append(json.dumps({"subtotals": totals.subtotals()}, allow_nan=False))
+    return "\n".join(out) + "\n"
@@ -0,0 +1,114 @@
+"""
+POST /api/takeoff end to end, in-process (no server)
+
+Run from the repo root: python -m pytest backend
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "tools"))
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from starlette.requests import ClientDisconnect  # noqa: E402
+
+from estimating_api import router  # noqa: E402
+from takeoff_import import TAKEOFF_CHUNK_ROWS  # noqa: E402
+
+app = FastAPI()
+app.include_router(router)
+
+
+def post(body: bytes, **params) -> httpx.Response:
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/takeoff", content=body, params=params,
+                                     headers={"content-type": "text/csv"})
+
+    # ASGITransport has no timeouts of its own - a lost body chunk would hang forever
+    return asyncio.run(asyncio.wait_for(send(), 10))
+
+
+def ndjson(response: httpx.Response) -> list:
+    """Every line of the reply, parsed strictly (NaN / Infinity aren't JSON)"""
+    def strict(token):
+        raise ValueError(f"Not valid JSON: {token}")
+
+    assert response.status_code == 200, response.text
+    return [json.loads(line, parse_constant=strict) for line in response.text.splitlines()]
+
+
+def test_non_finite_amounts_are_row_errors():
+    rows = ndjson(post(b"type,quantity\nconcrete,nan\nconcrete,inf\nconcrete,-Infinity\nconcrete,1e400\nconcrete,3\n"))
+    assert [row.get("error") for row in rows[:4]] == ["Missing or invalid quantity"] * 4
+    assert rows[4]["total_with_waste"] == 547.8
+    assert rows[-1]["summary"]["errors"] == 4
+    assert rows[-1]["summary"]["subtotal"] == 547.8
+
+
+def test_non_finite_markup_is_rejected():
+    assert post(b"type,quantity\nconcrete,3\n", markup="nan").status_code == 422
+
+
+def stream_upload(parts: list, wait_after: int, end=None):
+    """
+    Call the app the way uvicorn does (ASGI spec 2.3) with the body in `parts`
+
+    Holds the parts after the first `wait_after` back until the response has
+    started streaming results, so this only finishes if the upload is priced
+    while it's still arriving. `end` replaces the last message (e.g. a disconnect).
+    """
+    messages = [{"type": "http.request", "body": part, "more_body": True} for part in parts]
+    messages.append(end or {"type": "http.request", "body": b"", "more_body": False})
+    streaming = asyncio.Event()
+    sent = []
+    delivered = 0
+
+    async def receive():
+        nonlocal delivered
+        if delivered >= wait_after:
+            await streaming.wait()
+        delivered += 1
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()    # nothing more from the client
+
+    async def send(message):
+        sent.append(message)
+        if message.get("body"):
+            streaming.set()
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": "/api/takeoff", "raw_path": b"/api/takeoff",
+             "root_path": "", "query_string": b"", "headers": [(b"content-type", b"text/csv")],
+             "server": ("test", 80), "client": ("127.0.0.1", 1)}
+
+    async def run():
+        await asyncio.wait_for(app(scope, receive, send), 10)
+
+    return run, sent
+
+
+def test_upload_is_priced_while_it_streams():
+    # More than a chunk in the first part, so results can stream before the rest arrives
+    first, rest = b"type,quantity\n" + b"concrete,1\n" * (TAKEOFF_CHUNK_ROWS + 10), b"concrete,1\n" * 500
+    rows = TAKEOFF_CHUNK_ROWS + 510
+    run, sent = stream_upload([first, rest], wait_after=1)
+    asyncio.run(run())
+
+    lines = b"".join(message.get("body", b"") for message in sent).decode().splitlines()
+    summary = json.loads(lines[-1])["summary"]
+    # Every row arrived - the disconnect listener didn't swallow the second part
+    assert summary["lines"] == rows and summary["errors"] == 0
+
+
+def test_disconnect_mid_upload_ends_the_response():
+    body = b"type,quantity\n" + b"concrete,1\n" * (TAKEOFF_CHUNK_ROWS + 10)
+    run, sent = stream_upload([body], wait_after=1, end={"type": "http.disconnect"})
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(run())
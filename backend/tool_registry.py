@@ -0,0 +1,133 @@
+"""
+Tool registry: one declaration per tool
+
+Each tool is registered once with its schema, handler, description and
+example. Everything else derives from the registry:
+- the function schemas sent to the model
+- the /tools catalog
+- the list_available_tools menu
+- dispatch by name
+
+Schemas and the catalog are built and serialized once, not per request, and
+dispatch is a single dict lookup. That holds however large the catalog gets.
+"""
+
+import json
+import logging
+from typing import Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Tool(NamedTuple):
+    name: str
+    description: str          # what the model sees - when to use the tool
+    parameters: dict          # JSON schema for the arguments
+    handler: Callable         # handler(parameters) -> result dict
+    title: str = ""           # user-facing name, e.g. "Calculate Labor Cost"
+    summary: str = ""         # short description for the /tools catalog
+    help: str = ""            # plain-language description for the tool menu
+    example: str = ""         # example request for the tool menu
+    capability: str = ""      # phrase for the menu summary, e.g. "labor costs"
+    listed: bool = True       # show in the list_available_tools menu
+
+
+class ToolRegistry:
+    """Tools by name, with schemas and catalog prebuilt"""
+
+    def __init__(self):
+        self._tools = {}
+        self._built = None
+
+    def register(self, name: str, description: str, parameters: dict = None, **info):
+        """
+        Decorator registering a handler as a tool
+
+        Args:
+            name: Tool name the model calls
+            description: Model-facing description
+            parameters: JSON schema properties/required (default: no arguments)
+            **info: title, summary, help, example, capability, listed
+        """
+        def decorator(handler: Callable) -> Callable:
+            if name in self._tools:
+                raise ValueError(f"Tool already registered: {name}")
+            schema = parameters or {"type": "object", "properties": {}, "required": []}
+            self._tools[name] = Tool(name, description, schema, handler, **info)
+            self._built = None
+            return handler
+        return decorator
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def names(self) -> list:
+        return list(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def execute(self, tool_name: str, parameters: dict):
+        """Run a tool by name - unknown names get an error result, not an exception"""
+        tool = self._tools.get(tool_name)
+        if tool is None:
+            logger.warning(f"Unknown tool requested: {tool_name}")
+            return {"status": "error", "message": f"Unknown tool: {tool_name}"}
+        return tool.handler(parameters)
+
+    def _build(self) -> dict:
+        """Build (once per catalog change) everything derived from the tools"""
+        if self._built is None:
+            tools = list(self._tools.values())
+            schemas = [
+                {
+                    "type": "function",
+                    "function": {"name": t.name, "description": t.description, "parameters": t.parameters}
+                }
+                for t in tools
+            ]
+            catalog = {"tools": [{"name": t.name, "description": t.summary or t.description} for t in tools]}
+            listed = [t for t in tools if t.listed]
+            capabilities = [t.capability for t in listed if t.capability]
+            if len(capabilities) > 1:
+                capabilities = ", ".join(capabilities[:-1]) + ", and " + capabilities[-1]
+            else:
+                capabilities = "".join(capabilities)
+            menu = {
+                "status": "success",
+                "tools": [
+                    {"name": t.title or t.name, "description": t.help or t.description, "example": t.example}
+                    for t in listed
+                ],
+                "summary": (
+                    f"I have {len(listed)} tools available: {capabilities}. "
+                    "Just tell me what you need and I'll use the right tool."
+                )
+            }
+            self._built = {
+                "schemas": schemas,
+                "schemas_json": json.dumps(schemas, sort_keys=True),
+                "catalog_json": json.dumps(catalog).encode(),
+                "menu": menu,
+            }
+        return self._built
+
+    def schemas(self) -> list:
+        """Function schemas for the model (shared list - don't modify it)"""
+        return self._build()["schemas"]
+
+    def schemas_json(self) -> str:
+        """The schemas serialized once, canonically (for hashing and caching)"""
+        return self._build()["schemas_json"]
+
+    def catalog_json(self) -> bytes:
+        """The /tools response body, serialized once"""
+        return self._build()["catalog_json"]
+
+    def menu(self) -> dict:
+        """The list_available_tools result: friendly names, descriptions and examples"""
+        menu = self._build()["menu"]
+        return {**menu, "tools": list(menu["tools"])}
@@ -0,0 +1,127 @@
+"""
+contech1 Tool Runner
+Runs the tool calls from one model turn concurrently, each with its own timeout
+and error capture, so one slow or broken tool can't hold up or break the others.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import time
+
+from metrics import TOOL_CALLS, TOOL_LATENCY
+from tracing import add_span
+
+logger = logging.getLogger(__name__)
+
+# Default per-tool timeout in seconds (override with TOOL_TIMEOUT)
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "20"))
+
+# Per-tool overrides for tools that are known to be slow
+# (proposal PDFs run as background jobs - see jobs.py)
+TOOL_TIMEOUTS = {}
+
+
+def tool_timeout(tool_name: str) -> float:
+    """Timeout for one tool in seconds"""
+    return TOOL_TIMEOUTS.get(tool_name, TOOL_TIMEOUT)
+
+
+async def run_tool_call(execute, call: dict) -> dict:
+    """
+    Run one tool call and capture its result - never raises
+
+    Args:
+        execute: execute_tool(tool_name, parameters) - may be sync or async
+        call: {"id", "name", "arguments"} with arguments as the model's JSON string
+
+    Returns:
+        The call dict plus "result" and "elapsed_ms"
+    """
+    tool_name = call["name"]
+    timeout = tool_timeout(tool_name)
+    started = time.perf_counter()
+    status = "ok"
+
+    try:
+        parameters = json.loads(call["arguments"] or "{}")
+        if inspect.iscoroutinefunction(execute):
+            pending = execute(tool_name, parameters)
+        else:
+            # Sync tools run in a thread so slow I/O doesn't block the event loop
+            pending = asyncio.to_thread(execute, tool_name, parameters)
+        result = await asyncio.wait_for(pending, timeout)
+        if inspect.isawaitable(result):
+            result = await asyncio.wait_for(result, timeout)
+        if isinstance(result, dict) and (result.get("status") == "error" or "error" in result):
+            status = "error"
+    except asyncio.TimeoutError:
+        logger.warning(f"Tool {tool_name} timed out after {timeout}s")
+        result = {"status": "error", "message": f"{tool_name} timed out after {timeout:g} seconds"}
+        status = "timeout"
+    except json.JSONDecodeError as exc:
+        logger.warning(f"Tool {tool_name} got invalid arguments: {exc}")
+        result = {"status": "error", "message": f"Invalid arguments for {tool_name}: {exc}"}
+        status = "error"
+    except Exception as exc:
+        logger.error(f"Tool {tool_name} failed: {exc}")
+        result = {"status": "error", "message": f"{tool_name} failed: {exc}"}
+        status = "error"
+
+    elapsed = time.perf_counter() - started
+    TOOL_LATENCY.observe(elapsed, tool_name)
+    TOOL_CALLS.inc(tool_name, status)
+    add_span(f"tool:{tool_name}", started, elapsed)
+    return {
+        **call,
+        "result": result,
+        "elapsed_ms": round(elapsed * 1000, 2),
+    }
+
+
+async def run_tool_calls(execute, calls: list) -> list:
+    """Run independent tool calls concurrently, returning results in call order"""
+    return await asyncio.gather(*[run_tool_call(execute, call) for call in calls])
+
+
+def tool_calls_from_message(message) -> list:
+    """Convert the model's tool_calls to plain {"id", "name", "arguments"} dicts"""
+    return [
+        {
+            "id": tool_call.id,
+            "name": tool_call.function.name,
+            "arguments": tool_call.function.arguments,
+        }
+        for tool_call in message.tool_calls or []
+    ]
+
+
+def append_tool_results(messages: list, results: list):
+    """
+    Add one assistant message carrying every tool call from the turn,
+    followed by one tool message per result
+    """
+    messages.append({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {
+                "id": item["id"],
+                "type": "function",
+                "function": {
+                    "name": item["name"],
+                    "arguments": item["arguments"]
+                }
+            }
+            for item in results
+        ]
+    })
+
+    for item in results:
+        messages.append({
+            "role": "tool",
+            "tool_call_id": item["id"],
+            "content": json.dumps(item["result"])
+        })
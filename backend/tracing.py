@@ -0,0 +1,141 @@
+"""
+contech1 Request Tracing
+Times the phases of each request and reports them per request
+
+Code marks phases with span("llm_plan") (or add_span for work it already
+times). TraceMiddleware gives each request a correlation id (the client's
+X-Request-Id, or a new one) and at the end:
+- adds a Server-Timing header, so browser dev tools and curl -v show where
+  the time went (for streams, only the spans finished before the first byte)
+- writes one JSON log line with every span, for finding slow requests later
+
+A span is a ContextVar lookup and a list append, so tracing stays on for
+every request. Tool calls running concurrently in their own tasks inherit
+the request's trace and add their spans to it.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+
+# Set TRACE_LOG=0 to keep the Server-Timing header but skip the log line
+TRACE_LOG = os.getenv("TRACE_LOG", "1").lower() in ("1", "true", "yes")
+
+trace_logger = logging.getLogger("contech1.trace")
+
+_current = contextvars.ContextVar("trace", default=None)
+
+# Server-Timing names must be HTTP tokens - "tool:x" is sent as "tool.x" with the real name as desc
+_NOT_TOKEN = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+# desc is a quoted-string; tool names come from the model, so keep printable ASCII only
+_NOT_PRINTABLE = re.compile(r"[^\x20-\x7e]")
+DESC_MAX = 100
+
+
+def _quote(text: str) -> str:
+    text = _NOT_PRINTABLE.sub("?", text[:DESC_MAX])
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    __slots__ = ("request_id", "started", "spans")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans = []     # (name, start offset, duration) in seconds
+
+    def add(self, name: str, started: float, duration: float):
+        self.spans.append((name, started - self.started, duration))
+
+    def server_timing(self) -> str:
+        entries = []
+        for name, _, duration in self.spans:
+            token = _NOT_TOKEN.sub(".", name)
+            desc = f";desc={_quote(name)}" if token != name else ""
+            entries.append(f"{token}{desc};dur={duration * 1000:.1f}")
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def record(self, **fields) -> dict:
+        return {
+            "request_id": self.request_id,
+            **fields,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "spans": [
+                {"name": name, "start_ms": round(offset * 1000, 2), "duration_ms": round(duration * 1000, 2)}
+                for name, offset, duration in self.spans
+            ],
+        }
+
+
+def current_trace():
+    """The running request's Trace (None outside a request)"""
+    return _current.get()
+
+
+def add_span(name: str, started: float, duration: float):
+    """Record work timed elsewhere (started is a time.perf_counter() value)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, started, duration)
+
+
+@contextmanager
+def span(name: str):
+    """with span("llm_plan"): ... - time a block as part of the current request"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, started, time.perf_counter() - started)
+
+
+class TraceMiddleware:
+    """ASGI middleware: correlation id, Server-Timing header and one JSON log line per request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        trace = Trace(request_id or uuid.uuid4().hex)
+        token = _current.set(trace)
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", trace.request_id.encode("latin-1")))
+                headers.append((b"server-timing", trace.server_timing().encode("ascii", errors="replace")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if TRACE_LOG:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                trace_logger.info(json.dumps(trace.record(
+                    method=scope["method"], route=route, path=scope["path"], status=status[0]
+                )))
@@ -0,0 +1,86 @@
+"""
+Benchmark Baselines
+Save benchmark results as JSON and compare new runs against them
+
+Each result is {"value": number, "unit": "ms", "better": "lower" | "higher"}.
+A result is a regression when it's worse than the baseline by more than the
+tolerance (a fraction - 0.2 = 20%). Baselines are only comparable on the same
+machine, so save your own before changing code.
+"""
+
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+def result(value: float, unit: str, better: str = "lower") -> dict:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def save(path: Path, results: dict, settings: dict = None):
+    """Write results (name -> result) with enough context to judge later comparisons"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "machine": f"{platform.system()} {platform.machine()} ({platform.processor() or 'unknown cpu'})",
+        "settings": settings or {},
+        "results": results,
+    }, indent=2) + "\n")
+    print(f"\nSaved baseline to {path}")
+
+
+def compare(path: Path, results: dict, tolerance: float = 0.2) -> list:
+    """
+    Print new results next to the baseline's
+
+    Returns:
+        Names of the results that regressed by more than `tolerance`
+    """
+    if not path.exists():
+        print(f"\nNo baseline at {path} - run with --save first")
+        return []
+    baseline = json.loads(path.read_text())
+    print(f"\nCompared with baseline from {baseline['created']} ({baseline['machine']}):")
+    print(f"{'result':<44} {'unit':<6} {'baseline':>10} {'now':>10} {'change':>8}")
+
+    regressions = []
+    for name, new in results.items():
+        old = baseline["results"].get(name)
+        if old is None or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        worse = change > tolerance if new["better"] == "lower" else change < -tolerance
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<44} {new['unit']:<6} {old['value']:>10.3f} {new['value']:>10.3f} {change:>+8.0%}{flag}")
+        if worse:
+            regressions.append(name)
+
+    if regressions:
+        print(f"\n{len(regressions)} result(s) regressed by more than {tolerance:.0%}")
+    else:
+        print(f"\nNo regressions beyond {tolerance:.0%}")
+    return regressions
+
+
+def add_arguments(parser, default_name: str):
+    """--save / --compare / --tolerance, shared by every benchmark"""
+    default = BASELINE_DIR / default_name
+    parser.add_argument("--save", nargs="?", const=default, type=Path,
+                        help=f"Save results as the baseline (default {default.relative_to(BASELINE_DIR.parent.parent)})")
+    parser.add_argument("--compare", nargs="?", const=default, type=Path,
+                        help="Compare with a saved baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+
+
+def finish(args, results: dict, settings: dict = None):
+    """Save and/or compare as the command line asked; exit 1 if anything regressed"""
+    regressions = compare(args.compare, results, args.tolerance) if args.compare else []
+    if args.save:
+        save(args.save, results, settings)
+    if regressions:
+        sys.exit(1)
@@ -0,0 +1,190 @@
+"""
+/chat Benchmark
+Throughput and latency percentiles of the real backend at increasing concurrency,
+fully offline - the LLM is mock_openai.py with a fixed latency and scripted tool calls
+
+Starts the mock LLM and the backend (uvicorn) as subprocesses on local ports,
+then runs a closed loop at each concurrency level: N virtual users, each sending
+its next request as soon as the last one is answered. Prompts cycle through the
+tool paths (material, labor, equipment, full estimate, plain answer) and are
+made unique, so the completion cache and request coalescing don't flatter the
+numbers (use --identical to measure those instead).
+
+Usage:
+    python benchmarks/bench_chat.py
+    python benchmarks/bench_chat.py --levels 1 8 32 --duration 10 --latency 0.5
+    python benchmarks/bench_chat.py --save                 # record a baseline
+    python benchmarks/bench_chat.py --compare              # flag regressions against it
+    python benchmarks/bench_chat.py --url http://localhost:8000   # an already running backend
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+import baseline
+
+ROOT = Path(__file__).parent.parent
+
+PROMPTS = [
+    "What does 1000 feet of 4 inch pipe cost?",
+    "How much for 40 hours of operator labor?",
+    "What does it cost to rent an excavator for 5 days?",
+    "Give me a full estimate for 1000 ft of waterline",
+    "Hi there",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:g}s")
+
+
+def start_servers(args) -> tuple:
+    """Start the mock LLM and the backend; returns (backend url, processes)"""
+    mock_port, backend_port = free_port(), free_port()
+    # The backend logs every request at INFO - keep it out of the results table
+    output = None if args.server_logs else subprocess.DEVNULL
+    mock = subprocess.Popen([
+        sys.executable, str(ROOT / "benchmarks" / "mock_openai.py"), "--port", str(mock_port),
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+    ], stdout=output, stderr=output)
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{mock_port}/v1",
+        "TRACE_LOG": "0",
+        # Every virtual user is its own client (X-Client-Id), so only the global caps apply
+        "ADMIT_MAX_CONCURRENT": str(args.admit),
+    }
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(backend_port), "--log-level", "warning"],
+        cwd=ROOT / "backend", env=env, stdout=output, stderr=output,
+    )
+    try:
+        wait_until_up(f"http://127.0.0.1:{mock_port}/stats")
+        wait_until_up(f"http://127.0.0.1:{backend_port}/health")
+    except Exception:
+        stop_servers([mock, backend])
+        raise
+    return f"http://127.0.0.1:{backend_port}", [mock, backend]
+
+
+def stop_servers(processes: list):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_level(http: httpx.AsyncClient, concurrency: int, duration: float, identical: bool) -> dict:
+    """Closed loop: `concurrency` users send back-to-back requests for `duration` seconds"""
+    latencies = []
+    errors = {}
+    counter = 0
+    deadline = time.perf_counter() + duration
+
+    async def user(index: int):
+        nonlocal counter
+        while time.perf_counter() < deadline:
+            counter += 1
+            prompt = PROMPTS[counter % len(PROMPTS)]
+            if not identical:
+                prompt += f" (request {counter})"
+            started = time.perf_counter()
+            try:
+                response = await http.post(
+                    "/chat", json={"messages": [{"role": "user", "content": prompt}]},
+                    headers={"X-Client-Id": f"bench-{index}"},
+                )
+                status = response.status_code
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[user(index) for index in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50) if latencies else 0.0,
+        "p99": percentile(latencies, 0.99) if latencies else 0.0,
+    }
+
+
+async def main(args):
+    processes = []
+    url = args.url
+    if url is None:
+        url, processes = start_servers(args)
+    try:
+        limits = httpx.Limits(max_connections=max(args.levels) * 2, max_keepalive_connections=max(args.levels))
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as http:
+            # Warm up imports, pools and caches before measuring
+            await run_level(http, 2, 1.0, args.identical)
+
+            where = url if args.url else f"mock LLM {args.latency * 1000:.0f} ms per completion"
+            print(f"/chat benchmark - {where}, {args.duration:g} s per level")
+            print(f"{'users':>6} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  errors")
+            results = {}
+            for concurrency in args.levels:
+                level = await run_level(http, concurrency, args.duration, args.identical)
+                errors = ", ".join(f"{status}: {count}" for status, count in level["errors"].items()) or "-"
+                print(f"{concurrency:>6} {level['requests']:>9} {level['throughput']:>8.1f} "
+                      f"{level['p50'] * 1000:>8.1f} {level['p99'] * 1000:>8.1f}  {errors}")
+                results[f"chat c={concurrency} throughput"] = baseline.result(level["throughput"], "req/s", "higher")
+                results[f"chat c={concurrency} p50"] = baseline.result(level["p50"] * 1000, "ms")
+                results[f"chat c={concurrency} p99"] = baseline.result(level["p99"] * 1000, "ms")
+    finally:
+        stop_servers(processes)
+
+    settings = {"latency": args.latency, "jitter": args.jitter, "duration": args.duration,
+                "identical": args.identical, "admit": args.admit}
+    baseline.finish(args, results, settings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/chat throughput and latency benchmark (offline)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64], help="Concurrent users per level")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per level")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock LLM seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mock LLM random extra latency (fraction)")
+    parser.add_argument("--admit", type=int, default=64, help="ADMIT_MAX_CONCURRENT for the backend")
+    parser.add_argument("--identical", action="store_true", help="Send identical prompts (measures coalescing)")
+    parser.add_argument("--url", help="Benchmark a running backend instead of starting one")
+    parser.add_argument("--server-logs", action="store_true", help="Show the mock LLM's and backend's output")
+    baseline.add_arguments(parser, "chat.json")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,83 @@
+"""
+Batch Estimating Benchmark
+Times estimate_project_cost on the line-by-line path vs. the vectorized batch engine
+at 10k and 1M line items, and checks that both produce identical results.
+
+Usage:
+    python benchmarks/bench_estimating.py
+    python benchmarks/bench_estimating.py --sizes 10000 100000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "tools"))
+
+import estimating_tools  # noqa: E402
+from batch_estimating import estimate_batch  # noqa: E402
+
+MATERIALS = [("pipe", "4"), ("pipe", "6"), ("pipe", "8"), ("concrete", "3000_psi"),
+             ("concrete", "4000_psi"), ("rebar", "4")]
+LABOR = ["operator", "laborer", "foreman", "electrician", "ironworker"]
+EQUIPMENT = ["excavator", "auger", "compactor"]
+
+
+def make_takeoff(lines: int, seed: int = 42):
+    """Random takeoff: 60% material lines, 30% labor, 10% equipment"""
+    rng = random.Random(seed)
+    materials = []
+    for _ in range(lines * 6 // 10):
+        material_type, size = rng.choice(MATERIALS)
+        materials.append({"type": material_type, "size": size, "quantity": round(rng.uniform(1, 5000), 2)})
+    labor = [{"type": rng.choice(LABOR), "hours": round(rng.uniform(1, 200), 1)} for _ in range(lines * 3 // 10)]
+    equipment = [{"type": rng.choice(EQUIPMENT), "days": rng.randint(1, 30)} for _ in range(lines // 10)]
+    return materials, labor, equipment
+
+
+def to_columns(materials, labor, equipment):
+    return (
+        {"type": [m["type"] for m in materials], "size": [m["size"] for m in materials],
+         "quantity": [m["quantity"] for m in materials]},
+        {"type": [lab["type"] for lab in labor], "hours": [lab["hours"] for lab in labor]},
+        {"type": [eq["type"] for eq in equipment], "days": [eq["days"] for eq in equipment]},
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(lines: int):
+    materials, labor, equipment = make_takeoff(lines)
+    columns = to_columns(materials, labor, equipment)
+
+    # Line-by-line path (force it by raising the batch threshold)
+    threshold = estimating_tools.BATCH_MIN_LINES
+    estimating_tools.BATCH_MIN_LINES = float("inf")
+    scalar, scalar_s = timed(estimating_tools.estimate_project_cost, materials, labor, equipment, 0.15)
+    estimating_tools.BATCH_MIN_LINES = threshold
+
+    dicts, dicts_s = timed(estimating_tools.estimate_project_cost, materials, labor, equipment, 0.15)
+    batch, batch_s = timed(estimate_batch, *columns, 0.15)
+
+    assert dicts == scalar, "batch engine breakdown differs from the scalar path"
+    for key in ("subtotal", "overhead_profit", "total"):
+        assert batch[key] == scalar[key], f"batch {key} differs from the scalar path"
+
+    print(f"{lines:>10,} lines  total ${scalar['total']:,.2f}")
+    print(f"{'':>12}scalar loop          {scalar_s * 1000:>10.1f} ms")
+    print(f"{'':>12}batch (dict lines)   {dicts_s * 1000:>10.1f} ms  {scalar_s / dicts_s:>6.1f}x")
+    print(f"{'':>12}batch (columns)      {batch_s * 1000:>10.1f} ms  {scalar_s / batch_s:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch estimating benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size)
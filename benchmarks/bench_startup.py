@@ -0,0 +1,138 @@
+"""
+Cold Start Benchmark
+How long a fresh process takes from `import app` to answering its first request -
+what every serverless cold start (Vercel) pays before the first byte
+
+Each run is a new Python process that imports backend/app.py, runs the startup
+hooks and serves GET /health in-process (no server, no network). Also times
+GET /warmup, the first-use work deferred out of startup (openai import, client,
+tokenizer), so moving cost back into the import shows up either way.
+
+Exits 1 when the median import-to-ready time is over --budget, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --budget 500
+    python benchmarks/bench_startup.py --profile          # slowest imports of one run
+    python benchmarks/bench_startup.py --save / --compare
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import baseline
+
+BACKEND = Path(__file__).parent.parent / "backend"
+
+# Runs in the fresh process: timings in ms, printed as one JSON line
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+
+async def get(path):
+    sent = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        sent.append(message)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [], "server": ("bench", 80), "client": ("127.0.0.1", 1)}
+    await app.app(scope, receive, send)
+    return sent[0]["status"]
+
+async def main():
+    # ASGI lifespan, as a server would run it: startup hooks, requests, shutdown hooks
+    events, started_up = asyncio.Queue(), asyncio.Event()
+    async def send(message):
+        if message["type"].startswith("lifespan.startup"):
+            started_up.set()
+    await events.put({"type": "lifespan.startup"})
+    lifespan = asyncio.create_task(app.app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}},
+                                           events.get, send))
+    await started_up.wait()
+    status = await get("/health")
+    ready = time.perf_counter()
+    assert status == 200, f"/health answered {status}"
+    llm_imported = "openai" in sys.modules
+    await get("/warmup")
+    warm = time.perf_counter()
+    await events.put({"type": "lifespan.shutdown"})
+    await lifespan
+    print(json.dumps({"import": (imported - started) * 1000, "ready": (ready - started) * 1000,
+                      "warmup": (warm - ready) * 1000, "llm_imported": llm_imported}))
+
+asyncio.run(main())
+"""
+
+
+def run_once(env: dict) -> dict:
+    child = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND, env=env, capture_output=True, text=True)
+    if child.returncode != 0:
+        sys.exit(f"Starting the app failed:\n{child.stderr}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def profile(env: dict, top: int = 15):
+    """Print the slowest imports (cumulative) of one `import app`"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"], cwd=BACKEND, env=env,
+        capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        # Skip the header and the app's own log lines
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    print("\nSlowest imports (cumulative ms):")
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>10.1f}  {name}")
+
+
+def main(args):
+    env = {
+        **os.environ,
+        # A key so /warmup can build the client - nothing is sent to the API
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-bench-startup"),
+        "STARTUP_WARMUP": "0",
+        "TRACE_LOG": "0",
+    }
+    runs = [run_once(env) for _ in range(args.runs)]
+    if any(run["llm_imported"] for run in runs):
+        print("warning: openai was imported before the first LLM call - check for a new top-level import")
+
+    print(f"Cold start - {args.runs} fresh processes, budget {args.budget:g} ms import-to-ready")
+    print(f"{'phase':<28} {'median ms':>10} {'max ms':>10}")
+    results = {}
+    for key, label in (("import", "import app"), ("ready", "import-to-ready (/health)"),
+                       ("warmup", "deferred warm-up (/warmup)")):
+        values = [run[key] for run in runs]
+        print(f"{label:<28} {statistics.median(values):>10.1f} {max(values):>10.1f}")
+        results[f"startup {key}"] = baseline.result(statistics.median(values), "ms")
+
+    if args.profile:
+        profile(env)
+
+    ready = results["startup ready"]["value"]
+    print(f"\nimport-to-ready {ready:.0f} ms: " + ("within budget" if ready <= args.budget else "OVER BUDGET"))
+    baseline.finish(args, results, {"runs": args.runs, "budget": args.budget})
+    if ready > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start (import-to-ready) benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to time")
+    parser.add_argument("--budget", type=float, default=750, help="Max median import-to-ready time in ms")
+    parser.add_argument("--profile", action="store_true", help="Also list the slowest imports")
+    baseline.add_arguments(parser, "startup.json")
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+Estimating Tools Microbenchmark
+Per-call cost of calculate_material_cost and estimate_project_cost across input
+sizes, with save/compare against a baseline to catch regressions
+
+Each case runs repeatedly for about --budget seconds and reports the median
+time per call (the median is steadier than the mean on a busy machine).
+
+Usage:
+    python benchmarks/bench_tools.py
+    python benchmarks/bench_tools.py --sizes 10 100 1000 10000 100000
+    python benchmarks/bench_tools.py --save                # record a baseline
+    python benchmarks/bench_tools.py --compare             # flag regressions against it
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "tools"))
+
+import baseline  # noqa: E402
+from bench_estimating import make_takeoff  # noqa: E402
+from estimating_tools import calculate_material_cost, estimate_project_cost, material_costs  # noqa: E402
+
+
+def measure(fn, budget: float) -> float:
+    """Median seconds per call of fn(), calling it for about `budget` seconds"""
+    fn()
+    # Group fast calls into batches so timer overhead doesn't dominate
+    started = time.perf_counter()
+    fn()
+    once = max(time.perf_counter() - started, 1e-7)
+    batch = max(1, int(0.01 / once))
+    samples = []
+    deadline = time.perf_counter() + budget
+    while time.perf_counter() < deadline or len(samples) < 5:
+        started = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        samples.append((time.perf_counter() - started) / batch)
+    return statistics.median(samples)
+
+
+def run(args) -> dict:
+    results = {}
+
+    def report(name: str, seconds: float, lines: int = None):
+        per_line = f"{seconds / lines * 1e6:>10.2f} us/line" if lines else ""
+        print(f"{name:<40} {seconds * 1e6:>12.1f} us {per_line}")
+        results[name] = baseline.result(seconds * 1e6, "us")
+
+    print(f"{'case':<40} {'per call':>15}")
+    report("calculate_material_cost", measure(lambda: calculate_material_cost("pipe", 1000, "4"), args.budget))
+    report("calculate_material_cost unknown",
+           measure(lambda: calculate_material_cost("unobtainium", 10), args.budget))
+
+    for size in args.sizes:
+        materials, labor, equipment = make_takeoff(size)
+        report(f"material_costs n={size}",
+               measure(lambda: material_costs(materials), args.budget), len(materials))
+        report(f"estimate_project_cost n={size}",
+               measure(lambda: estimate_project_cost(materials, labor, equipment, 0.15), args.budget), size)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimating tools microbenchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000],
+                        help="Takeoff line counts for estimate_project_cost")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds to spend on each case")
+    baseline.add_arguments(parser, "tools.json")
+    args = parser.parse_args()
+    baseline.finish(args, run(args), {"sizes": args.sizes, "budget": args.budget})
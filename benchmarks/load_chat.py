@@ -0,0 +1,100 @@
+"""
+/chat Load Test
+Fires concurrent /chat requests at the backend with a fake LLM that takes a fixed
+amount of time per completion, and reports how throughput scales with concurrency.
+
+With an async client, N in-flight requests should finish in roughly the time of one,
+so requests/sec grows with concurrency. Run with --blocking to simulate the old
+synchronous client and see throughput stay flat.
+
+Usage:
+    python benchmarks/load_chat.py
+    python benchmarks/load_chat.py --latency 0.2 --levels 1 4 16 64
+    python benchmarks/load_chat.py --blocking
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+os.environ.setdefault("OPENAI_API_KEY", "sk-load-test")
+
+import httpx  # noqa: E402
+
+import app as backend  # noqa: E402
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions with a fixed per-call latency"""
+
+    def __init__(self, latency: float, blocking: bool):
+        self.latency = latency
+        self.blocking = blocking
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content="Load test response", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeClient:
+    def __init__(self, latency: float, blocking: bool):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency, blocking))
+
+    async def close(self):
+        pass
+
+
+async def run_level(http: httpx.AsyncClient, concurrency: int, rounds: int):
+    """Send `rounds` waves of `concurrency` simultaneous requests"""
+    start = time.perf_counter()
+    for wave in range(rounds):
+        # Unique prompts and clients, so coalescing, caching and per-client limits don't kick in
+        responses = await asyncio.gather(*[
+            http.post(
+                "/chat",
+                json={"messages": [{"role": "user", "content": f"What tools are available? ({wave}.{index})"}]},
+                headers={"X-Client-Id": f"load-{index}"},
+            )
+            for index in range(concurrency)
+        ])
+        for response in responses:
+            response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return concurrency * rounds, elapsed
+
+
+async def main(args):
+    backend.client = FakeClient(args.latency, args.blocking)
+    transport = httpx.ASGITransport(app=backend.app)
+    mode = "blocking (sync client)" if args.blocking else "async client"
+
+    print(f"/chat load test - {mode}, {args.latency * 1000:.0f} ms per completion")
+    print(f"{'in-flight':>10} {'requests':>10} {'seconds':>10} {'req/s':>10} {'speedup':>10}")
+
+    baseline = None
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as http:
+        for concurrency in args.levels:
+            count, elapsed = await run_level(http, concurrency, args.rounds)
+            rate = count / elapsed
+            baseline = baseline or rate
+            print(f"{concurrency:>10} {count:>10} {elapsed:>10.2f} {rate:>10.1f} {rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent /chat load test")
+    parser.add_argument("--latency", type=float, default=0.1, help="Fake completion latency in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--rounds", type=int, default=3, help="Waves per concurrency level")
+    parser.add_argument("--blocking", action="store_true", help="Simulate the old synchronous client")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,177 @@
+"""
+Mock OpenAI Server
+A local stand-in for the chat completions API, for offline benchmarks
+
+Answers POST /v1/chat/completions (plain and streamed) after a configurable
+delay, with scripted tool calls: the first rule whose pattern matches the
+last user message decides the reply. When the last message is a tool result,
+it answers with a short summary (the "render" call). Point the backend at it
+with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Usage:
+    python benchmarks/mock_openai.py --port 8100 --latency 0.2
+    python benchmarks/mock_openai.py --latency 0.5 --jitter 0.3 --token-delay 0.01
+    python benchmarks/mock_openai.py --script my_rules.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# [{"match": regex, "tool_calls": [{"name", "arguments"}]} or {"match": regex, "content": text}]
+DEFAULT_SCRIPT = [
+    {"match": r"estimate|bid", "tool_calls": [{"name": "estimate_project_cost", "arguments": {
+        "materials": [{"type": "pipe", "quantity": 1000, "size": "4"},
+                      {"type": "concrete", "quantity": 20, "size": "3000_psi"}],
+        "labor": [{"type": "operator", "hours": 40}, {"type": "laborer", "hours": 80}],
+        "equipment": [{"type": "excavator", "days": 5}],
+    }}]},
+    {"match": r"pipe|material", "tool_calls": [{"name": "calculate_material_cost", "arguments": {
+        "material_type": "pipe", "quantity": 1000, "size": "4"}}]},
+    {"match": r"labor|operator|crew", "tool_calls": [{"name": "calculate_labor_cost", "arguments": {
+        "labor_type": "operator", "hours": 40}}]},
+    {"match": r"excavator|equipment|rent", "tool_calls": [{"name": "calculate_equipment_cost", "arguments": {
+        "equipment_type": "excavator", "days": 5}}]},
+    {"match": r"tools|what can you do", "tool_calls": [{"name": "list_available_tools", "arguments": {}}]},
+    {"match": r"", "content": "I can help with material, labor and equipment costs, full estimates and proposals."},
+]
+
+RENDER_REPLY = "Here are the results of that calculation."
+
+
+class MockLLM:
+    """
+    Scripted replies with simulated latency
+
+    Args:
+        script: Rules as in DEFAULT_SCRIPT
+        latency: Seconds before the reply (before the first chunk when streaming)
+        jitter: Random extra latency, as a fraction of `latency`
+        token_delay: Seconds between streamed chunks
+    """
+
+    def __init__(self, script: list = None, latency: float = 0.2, jitter: float = 0.0, token_delay: float = 0.0):
+        self.rules = [(re.compile(rule["match"], re.IGNORECASE), rule) for rule in script or DEFAULT_SCRIPT]
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.requests = 0
+        self._ids = itertools.count(1)
+
+    def delay(self) -> float:
+        return self.latency * (1 + random.uniform(0, self.jitter))
+
+    def reply(self, messages: list, tools: list) -> dict:
+        """{"content": ...} or {"tool_calls": [...]} for this conversation"""
+        if messages and messages[-1].get("role") == "tool":
+            return {"content": RENDER_REPLY}
+        text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        offered = {tool["function"]["name"] for tool in tools or []}
+        for pattern, rule in self.rules:
+            if not pattern.search(text):
+                continue
+            calls = [call for call in rule.get("tool_calls", []) if call["name"] in offered]
+            if calls:
+                return {"tool_calls": [
+                    {"id": f"call_{next(self._ids)}", "type": "function",
+                     "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}}
+                    for call in calls
+                ]}
+            if "content" in rule:
+                return {"content": rule["content"]}
+        return {"content": RENDER_REPLY}
+
+    @staticmethod
+    def usage(messages: list, reply: dict) -> dict:
+        prompt = sum(len(json.dumps(message)) for message in messages) // 4
+        completion = len(json.dumps(reply)) // 4
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def create_app(llm: MockLLM) -> FastAPI:
+    app = FastAPI(title="Mock OpenAI")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": llm.requests}
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        llm.requests += 1
+        messages = body.get("messages", [])
+        reply = llm.reply(messages, body.get("tools"))
+        model = body.get("model", "mock")
+        completion_id = f"chatcmpl-mock-{next(llm._ids)}"
+        finish = "tool_calls" if "tool_calls" in reply else "stop"
+        await asyncio.sleep(llm.delay())
+
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply.get("content"),
+                                "tool_calls": reply.get("tool_calls")},
+                    "finish_reason": finish,
+                }],
+                "usage": MockLLM.usage(messages, reply),
+            })
+
+        def chunk(delta: dict, finish_reason=None, usage=None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            if "tool_calls" in reply:
+                for index, call in enumerate(reply["tool_calls"]):
+                    yield chunk({"tool_calls": [{"index": index, **call}]})
+            else:
+                for word in re.findall(r"\S+\s*", reply["content"]):
+                    if llm.token_delay:
+                        await asyncio.sleep(llm.token_delay)
+                    yield chunk({"content": word})
+            yield chunk({}, finish)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({}, usage=MockLLM.usage(messages, reply))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, fraction of --latency")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--script", help="JSON file of reply rules (default: DEFAULT_SCRIPT)")
+    args = parser.parse_args()
+
+    script = json.loads(open(args.script).read()) if args.script else None
+    llm = MockLLM(script, args.latency, args.jitter, args.token_delay)
+    uvicorn.run(create_app(llm), host=args.host, port=args.port, log_level="warning")
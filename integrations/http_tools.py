@@ -0,0 +1,232 @@
+"""
+HTTP Tool Backends
+Shared, pooled clients for Swift tools exposed as local web servers
+
+One ToolBackend per tool server keeps a long-lived httpx.AsyncClient, so calls
+reuse keep-alive connections instead of opening a connection per call
+(HTTP/2 is opt-in with TOOL_HTTP2=1 and needs the h2 package). On top of that:
+- a concurrency cap, so a slow server can't tie up every request
+- retries with jittered exponential backoff for transient failures
+- a circuit breaker - after repeated failures, calls fail fast until the
+  server has had time to recover
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - httpx needs it for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Defaults (override with environment variables or per backend)
+TOOL_HTTP_TIMEOUT = float(os.getenv("TOOL_HTTP_TIMEOUT", "30"))
+TOOL_HTTP_CONNECT_TIMEOUT = float(os.getenv("TOOL_HTTP_CONNECT_TIMEOUT", "2"))
+TOOL_HTTP_MAX_CONCURRENCY = int(os.getenv("TOOL_HTTP_MAX_CONCURRENCY", "8"))
+TOOL_HTTP_RETRIES = int(os.getenv("TOOL_HTTP_RETRIES", "2"))
+TOOL_HTTP_QUEUE_TIMEOUT = float(os.getenv("TOOL_HTTP_QUEUE_TIMEOUT", "1"))
+TOOL_HTTP_BREAKER_FAILURES = int(os.getenv("TOOL_HTTP_BREAKER_FAILURES", "5"))
+TOOL_HTTP_BREAKER_RESET = float(os.getenv("TOOL_HTTP_BREAKER_RESET", "30"))
+# HTTP/2 needs `pip install h2` (and, from httpx, an https:// tool server)
+TOOL_HTTP2 = os.getenv("TOOL_HTTP2", "0").lower() in ("1", "true", "yes")
+
+# Server answers worth retrying (the server is overloaded or restarting)
+RETRY_STATUSES = {502, 503, 504}
+
+
+class BackendUnavailable(RuntimeError):
+    """The tool server is failing (circuit open) or too busy - fail fast"""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failures` consecutive failures; open -> half-open
+    after `reset_timeout` seconds, when one trial call decides which way it goes.
+    """
+
+    def __init__(self, failures: int = TOOL_HTTP_BREAKER_FAILURES, reset_timeout: float = TOOL_HTTP_BREAKER_RESET):
+        self.failure_threshold = failures
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._trial_started = None
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        # One trial at a time (a trial that never reported back expires after reset_timeout)
+        if self.state == "half_open" and (self._trial_started is None or now - self._trial_started >= self.reset_timeout):
+            self._trial_started = now
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_started = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_started = None
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+                logger.warning(f"Circuit opened after {self.consecutive_failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def is_open(self) -> bool:
+        """Open and not yet due for a trial call"""
+        return self.state == "open" and self.retry_after() > 0
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class ToolBackend:
+    """
+    One HTTP tool server
+
+    Args:
+        name: Label for logs and stats
+        base_url: e.g. "http://localhost:8080"
+        timeout: Per-request timeout in seconds
+        max_concurrency: Requests in flight at once (also the connection pool size)
+        retries: Extra attempts for transient failures
+        queue_timeout: Seconds to wait for a free slot before failing fast
+        http2: Use HTTP/2 (falls back to HTTP/1.1 if h2 isn't installed)
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float = TOOL_HTTP_TIMEOUT,
+                 max_concurrency: int = TOOL_HTTP_MAX_CONCURRENCY, retries: int = TOOL_HTTP_RETRIES,
+                 queue_timeout: float = None, breaker: CircuitBreaker = None, http2: bool = TOOL_HTTP2):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.queue_timeout = queue_timeout if queue_timeout is not None else TOOL_HTTP_QUEUE_TIMEOUT
+        self.breaker = breaker or CircuitBreaker()
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning(f"{name}: HTTP/2 requested but the h2 package isn't installed - using HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.counters = {"requests": 0, "failures": 0, "retries": 0, "rejected": 0}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._client = None
+        self._slots = None
+
+    def _ensure_client(self):
+        # Created lazily so the client and semaphore bind to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=TOOL_HTTP_CONNECT_TIMEOUT),
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def request(self, method: str, path: str, idempotent: bool = None, **kwargs) -> httpx.Response:
+        """
+        Send a request through the pool, breaker and retry policy
+
+        Connection failures (the request never reached the server) are always
+        retried. Timeouts and 502/503/504 are only retried for idempotent
+        requests (GET by default), so a POST that may have run isn't repeated.
+
+        Raises:
+            BackendUnavailable: circuit open or no free slot in time
+            httpx.HTTPError: the request failed after all retries
+        """
+        self._ensure_client()
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "PUT", "DELETE")
+        if self.breaker.is_open():
+            self.counters["rejected"] += 1
+            raise BackendUnavailable(f"{self.name} is failing - not calling it for {self.breaker.retry_after():.0f}s")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters["rejected"] += 1
+            raise BackendUnavailable(f"{self.name} is busy ({self.max_concurrency} requests in flight)")
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if not self.breaker.allow():
+                self.counters["rejected"] += 1
+                raise BackendUnavailable(
+                    f"{self.name} is failing - not calling it for {self.breaker.retry_after():.0f}s"
+                )
+            for attempt in range(self.retries + 1):
+                self.counters["requests"] += 1
+                try:
+                    response = await self._client.request(method, path, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as exc:
+                    error, retryable = exc, True
+                except httpx.TimeoutException as exc:
+                    error, retryable = exc, idempotent
+                except httpx.HTTPError as exc:
+                    error, retryable = exc, False
+                else:
+                    if response.status_code < 500:
+                        self.breaker.record_success()
+                        return response
+                    error = httpx.HTTPStatusError(
+                        f"{self.name} returned {response.status_code}", request=response.request, response=response
+                    )
+                    retryable = idempotent and response.status_code in RETRY_STATUSES
+
+                self.counters["failures"] += 1
+                if not retryable or attempt == self.retries:
+                    self.breaker.record_failure()
+                    raise error
+                self.counters["retries"] += 1
+                # Full jitter: spread retries out so clients don't retry in lockstep
+                await asyncio.sleep(random.uniform(0, min(2.0, 0.1 * 2 ** attempt)))
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def post_json(self, path: str, payload: dict, idempotent: bool = False) -> dict:
+        """POST JSON and return the JSON reply (4xx replies raise httpx.HTTPStatusError)"""
+        response = await self.request("POST", path, idempotent=idempotent, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "circuit": self.breaker.state,
+            "circuit_opens": self.breaker.opens,
+            **self.counters,
+        }
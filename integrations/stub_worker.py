@@ -0,0 +1,88 @@
+"""
+Stand-in tool worker
+Speaks the worker_pool JSON-lines protocol so the pool can run without Swift
+
+Run it as the worker command, e.g. PROPOSAL_WORKER_CMD="python integrations/stub_worker.py".
+Answers the same mock results as the Swift tool stubs in src/example_integration.py.
+
+Test helpers:
+- STUB_WORKER_DELAY: seconds to sleep before each tool call (default 0)
+- the "sleep" tool sleeps for params["seconds"]
+- the "crash" tool exits without answering
+"""
+
+import json
+import os
+import sys
+import time
+
+DELAY = float(os.getenv("STUB_WORKER_DELAY", "0"))
+
+
+def generate_proposal(params: dict) -> dict:
+    project_name = params.get("project_name", "proposal")
+    return {
+        "status": "success",
+        "message": f"Proposal generated for {project_name}",
+        "pdf_path": f"/proposals/{project_name}.pdf"
+    }
+
+
+def calculate_takeoff(params: dict) -> dict:
+    return {
+        "status": "success",
+        "quantities": {
+            "material": params.get("material_type"),
+            "total_length": 1000,
+            "unit": "feet"
+        }
+    }
+
+
+def calculate_stakes(params: dict) -> dict:
+    return {
+        "status": "success",
+        "stakes": [],
+        "message": "Staking data calculated"
+    }
+
+
+def sleep(params: dict) -> dict:
+    time.sleep(float(params.get("seconds", 1)))
+    return {"status": "success", "slept": params.get("seconds", 1)}
+
+
+TOOLS = {
+    "ping": lambda params: {"pid": os.getpid()},
+    "generate_proposal": generate_proposal,
+    "calculate_takeoff": calculate_takeoff,
+    "calculate_stakes": calculate_stakes,
+    "sleep": sleep,
+}
+
+
+def main():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        tool = request.get("tool")
+        if tool == "crash":
+            sys.exit(3)
+        if DELAY and tool != "ping":
+            time.sleep(DELAY)
+
+        handler = TOOLS.get(tool)
+        if handler is None:
+            response = {"id": request.get("id"), "error": f"Unknown tool: {tool}"}
+        else:
+            try:
+                response = {"id": request.get("id"), "result": handler(request.get("params") or {})}
+            except Exception as exc:
+                response = {"id": request.get("id"), "error": str(exc)}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Tool Worker Pool
+Long-lived tool processes instead of spawning a CLI for every call
+
+Each worker is a process (a Swift CLI, or stub_worker.py for testing) that
+reads one JSON request per line on stdin and writes one JSON response per line
+on stdout:
+
+    -> {"id": 1, "tool": "generate_proposal", "params": {...}}
+    <- {"id": 1, "result": {...}}           or  {"id": 1, "error": "message"}
+
+Every worker must also answer {"tool": "ping"} (any result) - that's the
+health check.
+
+The pool keeps up to `size` workers running, and each worker handles one
+request at a time. A worker that crashes, times out, or sends garbage is
+killed and replaced on next use. Workers are also retired after
+`max_requests` calls, so leaks in the tool can't build up.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Longest response line accepted from a worker
+MAX_LINE = 16 * 1024 * 1024
+
+
+class WorkerError(RuntimeError):
+    """The worker crashed or broke the protocol - it gets replaced"""
+
+
+class ToolError(WorkerError):
+    """The tool reported an error for this request - the worker itself is fine"""
+
+
+class ToolWorker:
+    """One worker process and its pipes"""
+
+    def __init__(self, command: list, env: dict = None):
+        self.command = command
+        self.env = env
+        self.process = None
+        self.served = 0
+        self.started_at = None
+        self._next_id = 0
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env={**os.environ, **(self.env or {})},
+            limit=MAX_LINE,
+        )
+        self.started_at = time.time()
+        logger.info(f"Started tool worker pid={self.process.pid}: {' '.join(self.command)}")
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def call(self, tool: str, params: dict = None, timeout: float = None):
+        """
+        Send one request and wait for its response
+
+        Raises:
+            ToolError: the tool reported an error
+            WorkerError: crash or bad response
+            asyncio.TimeoutError: no response in time (the worker must be discarded)
+        """
+        if not self.alive:
+            raise WorkerError("Worker is not running")
+        self._next_id += 1
+        request_id = self._next_id
+        line = json.dumps({"id": request_id, "tool": tool, "params": params or {}}) + "\n"
+
+        async def exchange():
+            self.process.stdin.write(line.encode())
+            await self.process.stdin.drain()
+            raw = await self.process.stdout.readline()
+            if not raw:
+                raise WorkerError(f"Worker exited (code {await self.process.wait()})")
+            return raw
+
+        try:
+            raw = await asyncio.wait_for(exchange(), timeout)
+        except (BrokenPipeError, ConnectionResetError) as exc:
+            raise WorkerError(f"Worker pipe closed: {exc}")
+        except ValueError as exc:
+            raise WorkerError(f"Worker response too long: {exc}")
+        self.served += 1
+
+        try:
+            response = json.loads(raw)
+        except json.JSONDecodeError:
+            raise WorkerError(f"Worker sent invalid JSON: {raw[:200]!r}")
+        if not isinstance(response, dict) or response.get("id") != request_id:
+            raise WorkerError(f"Worker response out of sync: {raw[:200]!r}")
+        if "error" in response:
+            raise ToolError(str(response["error"]))
+        return response.get("result")
+
+    async def stop(self, grace: float = 2.0):
+        """Close stdin (asks the worker to exit), then kill it if it lingers"""
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), grace)
+        except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+            self.kill()
+            await self.process.wait()
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+
+
+class WorkerPool:
+    """
+    Pool of long-lived tool workers
+
+    Args:
+        command: argv that starts one worker, e.g. ["ProposalGenerator", "--serve"]
+        size: Max workers (= max concurrent requests)
+        max_requests: Retire a worker after this many calls (0 = never)
+        timeout: Default per-request timeout in seconds
+        health_interval: Seconds between pings of idle workers (0 = off)
+        env: Extra environment variables for the workers
+    """
+
+    def __init__(self, command: list, size: int = 2, max_requests: int = 1000,
+                 timeout: float = 30.0, health_interval: float = 30.0, env: dict = None):
+        self.command = list(command)
+        self.size = size
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.env = env
+        self._slots = None
+        self._idle = set()      # workers sitting in _slots, for stats()
+        self._health_task = None
+        self._closed = False
+        self.stats_counters = {
+            "started": 0,
+            "restarts": 0,
+            "recycled": 0,
+            "requests": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "health_checks": 0,
+        }
+
+    def _ensure_started(self):
+        # Created lazily so the pool binds to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(None)
+            if self.health_interval:
+                self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _spawn(self) -> ToolWorker:
+        worker = ToolWorker(self.command, self.env)
+        await worker.start()
+        self.stats_counters["started"] += 1
+        return worker
+
+    async def _acquire(self) -> ToolWorker:
+        worker = await self._slots.get()
+        self._idle.discard(worker)
+        if worker is not None and not worker.alive:
+            logger.warning(f"Tool worker pid={worker.process.pid} died (code {worker.process.returncode}), restarting")
+            self.stats_counters["restarts"] += 1
+            worker = None
+        if worker is None:
+            try:
+                worker = await self._spawn()
+            except Exception:
+                self._slots.put_nowait(None)
+                raise
+        return worker
+
+    async def _release(self, worker: ToolWorker):
+        if self._closed:
+            await worker.stop()
+        self._idle.add(worker)
+        self._slots.put_nowait(worker)
+
+    async def _discard(self, worker: ToolWorker):
+        # Free the slot first so a second cancellation can't leak it
+        worker.kill()
+        self._slots.put_nowait(None)
+        if worker.process is not None:
+            await worker.process.wait()
+
+    async def call(self, tool: str, params: dict = None, timeout: float = None):
+        """
+        Run one tool request on a pooled worker
+
+        Waits for a free worker if all are busy. A worker that fails is
+        replaced, so the next call gets a fresh process.
+        """
+        if self._closed:
+            raise WorkerError("Worker pool is closed")
+        self._ensure_started()
+        worker = await self._acquire()
+        self.stats_counters["requests"] += 1
+        try:
+            result = await worker.call(tool, params, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # The worker may still be busy with this request - it can't be reused
+            self.stats_counters["timeouts"] += 1
+            await self._discard(worker)
+            raise
+        except ToolError:
+            self.stats_counters["failures"] += 1
+            await self._release(worker)
+            raise
+        except WorkerError:
+            self.stats_counters["failures"] += 1
+            await self._discard(worker)
+            raise
+        except BaseException:
+            # Cancelled mid-request: same as a timeout, the worker's state is unknown
+            await self._discard(worker)
+            raise
+
+        if self.max_requests and worker.served >= self.max_requests:
+            self.stats_counters["recycled"] += 1
+            await worker.stop()
+            self._slots.put_nowait(None)
+        else:
+            await self._release(worker)
+        return result
+
+    async def _health_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health()
+
+    async def check_health(self):
+        """Ping idle workers; replace any that are dead or don't answer"""
+        if self._slots is None:
+            return
+        for _ in range(self._slots.qsize()):
+            try:
+                worker = self._slots.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            self._idle.discard(worker)
+            if worker is None:
+                self._slots.put_nowait(None)
+                continue
+            self.stats_counters["health_checks"] += 1
+            try:
+                await worker.call("ping", timeout=min(self.timeout, 5.0))
+            except (asyncio.TimeoutError, WorkerError) as exc:
+                logger.warning(f"Tool worker pid={worker.process.pid} failed health check: {exc}")
+                self.stats_counters["restarts"] += 1
+                await self._discard(worker)
+                continue
+            except BaseException:
+                # Cancelled mid-ping (shutdown): the worker's state is unknown, don't leak its slot
+                await self._discard(worker)
+                raise
+            await self._release(worker)
+
+    async def close(self):
+        """Stop all idle workers (busy ones are stopped as they come back)"""
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+        if self._slots is None:
+            return
+        while not self._slots.empty():
+            worker = self._slots.get_nowait()
+            self._idle.discard(worker)
+            if worker is not None:
+                await worker.stop()
+
+    def stats(self) -> dict:
+        return {
+            "command": " ".join(self.command),
+            "size": self.size,
+            "idle_workers": sum(1 for worker in self._idle if worker.alive),
+            "busy": self.size - (self._slots.qsize() if self._slots is not None else self.size),
+            "max_requests": self.max_requests,
+            **self.stats_counters,
+        }
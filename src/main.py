@@ -7,8 +7,10 @@ import os
 import sys
 from pathlib import Path
 
-# Add tools directory to path for custom library loading
+# Add tools and backend directories to path for custom library loading
 sys.path.append(str(Path(__file__).parent.parent / "tools"))
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+sys.path.append(str(Path(__file__).parent.parent / "integrations"))
 
 class ConTech1:
     """
@@ -26,11 +28,12 @@ class ConTech1:
         self.load_tools()
     
     def load_tools(self):
-        """Discover and load available tools"""
+        """Load available tools from the shared registry (see backend/construction_tools.py)"""
         # TODO: Auto-discover Swift tool APIs
-        # TODO: Auto-discover custom Python tools
-        # TODO: Register tools with AI model
-        pass
+        from construction_tools import registry
+        
+        self.registry = registry
+        self.tools = registry.schemas()
     
     def query(self, user_input: str):
         """Process user query and use appropriate tools"""
@@ -42,5 +45,6 @@ class ConTech1:
 if __name__ == "__main__":
     assistant = ConTech1()
     print("ConTech1 Construction AI Assistant")
+    print(f"Loaded {len(assistant.tools)} tools: {', '.join(assistant.registry.names())}")
     print("Ready to integrate your Swift tools!")
 
@@ -0,0 +1,255 @@
+"""
+Batch Estimating Engine
+Vectorized pricing for large takeoffs - thousands to millions of line items
+
+Line items come in as columns (type, size, quantity) instead of one dict per line.
+Each distinct (type, size) pair is priced once, then unit costs are gathered onto
+every line with an array lookup, and waste, subtotals and markup are computed with
+NumPy. Totals match the scalar calculate_* / estimate_project_cost path exactly.
+"""
+
+import numpy as np
+
+from estimating_tools import (
+    WASTE_MULTIPLIER,
+    amount_error,
+    current_pricing,
+    resolve_equipment_rate,
+    resolve_labor_rate,
+    resolve_material,
+    valid_amount,
+)
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly like Python's round(x, 2)
+
+    np.round scales by 100 first, which can land on a different side of a
+    half-cent tie than Python's exact rounding. Those rare near-ties are
+    re-rounded one at a time so results match the scalar path bit for bit.
+    """
+    scaled = values * 100
+    rounded = np.round(values, 2)
+    distance = np.abs(scaled - np.floor(scaled) - 0.5)
+    for i in np.flatnonzero(distance < np.maximum(1e-6, np.abs(scaled) * 1e-12)):
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def running_total(values: np.ndarray) -> float:
+    """Left-to-right sum, same order (and float result) as a Python += loop"""
+    if len(values) == 0:
+        return 0
+    return float(np.cumsum(values)[-1])
+
+
+def _factorize(keys):
+    """
+    Give each distinct key a small integer code
+
+    Returns:
+        (codes array, list of distinct keys in code order)
+    """
+    distinct = list(dict.fromkeys(keys))
+    lookup = {key: code for code, key in enumerate(distinct)}
+    codes = np.fromiter(map(lookup.__getitem__, keys), dtype=np.intp, count=len(keys))
+    return codes, distinct
+
+
+def _column(columns: dict, name: str, length: int):
+    values = columns.get(name)
+    return [None] * length if values is None else values
+
+
+def _amounts(values):
+    """
+    Amounts as a float array, plus a mask of the lines whose amount passes valid_amount()
+
+    Invalid amounts (None, strings, NaN, ...) become 0 and are left out of the
+    subtotals, so they get an error line just like on the scalar path.
+    """
+    amount = None
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iuf":
+        amount = values.astype(np.float64)
+    elif set(map(type, values)) <= {int, float}:
+        try:
+            amount = np.asarray(values, dtype=np.float64)
+        except OverflowError:
+            pass    # an int too big for a float - check line by line
+    if amount is None:
+        # Mixed or odd types: check each line the way the scalar path does
+        amount = np.array([value if valid_amount(value) else np.nan for value in values], dtype=np.float64)
+    valid = np.isfinite(amount)
+    amount[~valid] = 0.0
+    return amount, valid
+
+
+def price_materials(columns: dict, pricing=None) -> dict:
+    """
+    Price material lines
+
+    Args:
+        columns: {"type": [...], "size": [...], "quantity": [...]}, size optional
+        pricing: PricingVersion to use (default: the current one)
+
+    Returns:
+        Per-line arrays (unit_cost, total_cost, total_with_waste, valid, priced)
+        plus the codes/keys needed to rebuild per-line labels, and the subtotal.
+        A line is priced when its material is known and its quantity is valid.
+    """
+    pricing = pricing or current_pricing()
+    quantity, valid = _amounts(columns["quantity"])
+    types = columns["type"]
+    sizes = _column(columns, "size", len(types))
+
+    # Factorize each column on its own, then combine into (type, size) pair codes
+    type_codes, type_keys = _factorize(types)
+    size_codes, size_keys = _factorize(sizes)
+    pairs, codes = np.unique(type_codes * len(size_keys) + size_codes, return_inverse=True)
+    keys = [(type_keys[pair // len(size_keys)], size_keys[pair % len(size_keys)]) for pair in pairs.tolist()]
+    resolved = [resolve_material(material_type or "", size, pricing) for material_type, size in keys]
+    key_cost = np.array([r[0] if r else 0.0 for r in resolved], dtype=np.float64)
+    key_priced = np.array([r is not None for r in resolved], dtype=bool)
+
+    unit_cost = key_cost[codes]
+    priced = key_priced[codes] & valid
+    raw = quantity * unit_cost
+    total_cost = round_cents(raw)
+    total_with_waste = round_cents(raw * WASTE_MULTIPLIER)
+
+    return {
+        "quantity": quantity,
+        "unit_cost": unit_cost,
+        "total_cost": total_cost,
+        "total_with_waste": total_with_waste,
+        "valid": valid,
+        "priced": priced,
+        "codes": codes,
+        "keys": keys,
+        "resolved": resolved,
+        "subtotal": running_total(total_with_waste[priced]),
+    }
+
+
+def _price_rates(types, amounts, resolve, pricing) -> dict:
+    """Shared path for labor (hours x hourly) and equipment (days x daily)"""
+    pricing = pricing or current_pricing()
+    amount, valid = _amounts(amounts)
+    codes, keys = _factorize(types)
+    rates = [resolve(key or "", pricing) for key in keys]
+    key_rate = np.array([r if r is not None else 0.0 for r in rates], dtype=np.float64)
+    key_priced = np.array([r is not None for r in rates], dtype=bool)
+
+    rate = key_rate[codes]
+    priced = key_priced[codes] & valid
+    total_cost = round_cents(amount * rate)
+
+    return {
+        "amount": amount,
+        "rate": rate,
+        "total_cost": total_cost,
+        "valid": valid,
+        "priced": priced,
+        "codes": codes,
+        "keys": keys,
+        "rates": rates,
+        "subtotal": running_total(total_cost[priced]),
+    }
+
+
+def price_labor(columns: dict, pricing=None) -> dict:
+    """Price labor lines - columns: {"type": [...], "hours": [...]}"""
+    return _price_rates(columns["type"], columns["hours"], resolve_labor_rate, pricing)
+
+
+def price_equipment(columns: dict, pricing=None) -> dict:
+    """Price equipment lines - columns: {"type": [...], "days": [...]}"""
+    return _price_rates(columns["type"], columns["days"], resolve_equipment_rate, pricing)
+
+
+def estimate_batch(materials: dict = None, labor: dict = None, equipment: dict = None,
+                   markup: float = 0.15, pricing=None):
+    """
+    Price a whole takeoff from columnar line items
+
+    Args:
+        materials: {"type", "size", "quantity"} columns
+        labor: {"type", "hours"} columns
+        equipment: {"type", "days"} columns
+        markup: Markup percentage as decimal (default 15%)
+        pricing: PricingVersion to use (default: the current one)
+
+    Returns:
+        Totals in the same shape as estimate_project_cost, with per-line
+        arrays under materials/labor/equipment instead of breakdown dicts
+    """
+    pricing = pricing or current_pricing()
+    material_lines = price_materials(materials or {"type": [], "quantity": []}, pricing)
+    labor_lines = price_labor(labor or {"type": [], "hours": []}, pricing)
+    equipment_lines = price_equipment(equipment or {"type": [], "days": []}, pricing)
+
+    subtotal = material_lines["subtotal"] + labor_lines["subtotal"] + equipment_lines["subtotal"]
+    overhead_profit = subtotal * markup
+    total = subtotal + overhead_profit
+
+    return {
+        "materials": material_lines,
+        "labor": labor_lines,
+        "equipment": equipment_lines,
+        "subtotal": round(subtotal, 2),
+        "overhead_profit": round(overhead_profit, 2),
+        "markup_percentage": markup * 100,
+        "total": round(total, 2),
+        "pricing_version": pricing.version,
+    }
+
+
+def material_breakdown(lines: dict, types, quantities) -> list:
+    """Rebuild calculate_material_cost()-style dicts from priced material lines"""
+    breakdown = []
+    unit_cost = lines["unit_cost"].tolist()
+    total_cost = lines["total_cost"].tolist()
+    total_with_waste = lines["total_with_waste"].tolist()
+    valid = lines["valid"].tolist()
+    for i, code in enumerate(lines["codes"].tolist()):
+        priced = lines["resolved"][code]
+        if priced is None:
+            breakdown.append({"error": f"Material type '{types[i]}' not found in pricing database"})
+            continue
+        if not valid[i]:
+            breakdown.append({"error": amount_error("quantity", quantities[i], types[i])})
+            continue
+        breakdown.append({
+            "material": priced[1],
+            "quantity": quantities[i],
+            "unit": priced[2],
+            "unit_cost": unit_cost[i],
+            "total_cost": total_cost[i],
+            "waste_factor": "10%",
+            "total_with_waste": total_with_waste[i]
+        })
+    return breakdown
+
+
+def rate_breakdown(lines: dict, types, amounts, type_field: str, amount_field: str,
+                   rate_field: str, error: str) -> list:
+    """Rebuild calculate_labor_cost()/calculate_equipment_cost()-style dicts"""
+    breakdown = []
+    rate = lines["rate"].tolist()
+    total_cost = lines["total_cost"].tolist()
+    valid = lines["valid"].tolist()
+    for i, code in enumerate(lines["codes"].tolist()):
+        if lines["rates"][code] is None:
+            breakdown.append({"error": error.format(types[i])})
+            continue
+        if not valid[i]:
+            breakdown.append({"error": amount_error(amount_field, amounts[i], types[i])})
+            continue
+        breakdown.append({
+            type_field: types[i],
+            amount_field: amounts[i],
+            rate_field: rate[i],
+            "total_cost": total_cost[i]
+        })
+    return breakdown
@@ -3,9 +3,18 @@ Construction Estimating Tools
 Custom Python tools for ConTech1 that use your real estimating data
 """
 
+import contextvars
 import json
+import logging
+import math
+import numbers
+import os
 from pathlib import Path
 
+from pricing_store import PricingStore
+
+logger = logging.getLogger(__name__)
+
 # Material pricing data (you can load from your Excel files)
 MATERIAL_PRICING = {
     "pipe": {
@@ -39,7 +48,106 @@ EQUIPMENT_RATES = {
     "compactor": {"daily": 100.00},
 }
 
-def calculate_material_cost(material_type: str, quantity: float, size: str = None):
+# Live pricing: immutable versions built from the tables above (plus the HCSS
+# exports when PRICING_DATA_DIR is set), hot-swapped on reload
+PRICING_STORE = PricingStore(
+    MATERIAL_PRICING, LABOR_RATES, EQUIPMENT_RATES,
+    data_dir=os.getenv("PRICING_DATA_DIR"),
+    snapshot_path=os.getenv("PRICING_SNAPSHOT")
+)
+
+if PRICING_STORE.data_dir is not None:
+    try:
+        PRICING_STORE.reload()
+    except Exception as exc:
+        logger.error(f"Could not load HCSS pricing from {PRICING_STORE.data_dir}: {exc}")
+
+# Version pinned for the current request (copied into tool threads with the context)
+_pinned_pricing = contextvars.ContextVar("pinned_pricing", default=None)
+
+def current_pricing():
+    """Pricing version for this request - the pinned one if any, else the live one"""
+    return _pinned_pricing.get() or PRICING_STORE.current()
+
+def pin_pricing():
+    """
+    Pin the live pricing version for the rest of the current request
+    
+    A reload that lands mid-request won't change the prices it sees.
+    """
+    pricing = PRICING_STORE.current()
+    _pinned_pricing.set(pricing)
+    return pricing
+
+def pricing_version():
+    """
+    Fingerprint of the pricing tables in use
+    
+    Changes whenever any material, labor, or equipment rate changes, so
+    cached results computed from old prices can be told apart.
+    """
+    return current_pricing().version
+
+def rebuild_pricing_index():
+    """Publish a new pricing version after the module tables above were edited"""
+    return PRICING_STORE.reload()
+
+def load_hcss_pricing(data_dir, snapshot_path=None):
+    """
+    Merge the HCSS pricing exports over the built-in rates and publish the result
+    
+    Uses the binary snapshot when the source files haven't changed (see hcss_loader).
+    Rows from the exports override the built-in rates with the same name.
+    
+    Returns:
+        The new live PricingVersion
+    """
+    PRICING_STORE.data_dir = Path(data_dir)
+    PRICING_STORE.snapshot_path = snapshot_path
+    return PRICING_STORE.reload()
+
+# Waste allowance applied to material totals (10%)
+WASTE_MULTIPLIER = 1.1
+
+# Estimates with at least this many line items use the batch engine
+BATCH_MIN_LINES = 200
+
+def valid_amount(value) -> bool:
+    """A quantity/hours/days we can price: a finite real number (not a string, bool or None)"""
+    if not isinstance(value, numbers.Real) or isinstance(value, bool):
+        return False
+    try:
+        return math.isfinite(value)
+    except OverflowError:
+        return False     # an int too big for a float
+
+def amount_error(field: str, value, item: str) -> str:
+    """Error for a line whose amount isn't valid_amount() - same text on the scalar and batch paths"""
+    return f"Invalid {field} {value!r} for '{item}' - expected a number"
+
+def resolve_material(material_type: str, size: str = None, pricing=None):
+    """
+    Look up how a material is priced
+    
+    Accepts any alias or size spelling the index knows ('4"', '4 in', '#4', '4000psi').
+    
+    Returns:
+        (unit_cost, material label, unit) or None if it isn't in the pricing data
+    """
+    record = (pricing or current_pricing()).index.material(material_type, size)
+    if record is None:
+        return None
+    return record.unit_cost, record.label, record.unit
+
+def resolve_labor_rate(labor_type: str, pricing=None):
+    """Hourly rate for a labor type, or None if it isn't in the rates data"""
+    return (pricing or current_pricing()).index.labor_rate(labor_type)
+
+def resolve_equipment_rate(equipment_type: str, pricing=None):
+    """Daily rate for a piece of equipment, or None if it isn't in the rates data"""
+    return (pricing or current_pricing()).index.equipment_rate(equipment_type)
+
+def calculate_material_cost(material_type: str, quantity: float, size: str = None, pricing=None):
     """
     Calculate material cost based on your pricing data
     
@@ -47,79 +155,86 @@ def calculate_material_cost(material_type: str, quantity: float, size: str = Non
         material_type: Type of material (pipe, concrete, rebar, etc.)
         quantity: Quantity needed
         size: Size specification if applicable
+        pricing: PricingVersion to use (default: the current one)
     
     Returns:
-        dict with cost breakdown
-    """
-    if material_type.lower() == "pipe":
-        if size:
-            size_key = f"{size}_inch"
-            if size_key in MATERIAL_PRICING["pipe"]:
-                unit_cost = MATERIAL_PRICING["pipe"][size_key]["cost"]
-                total_cost = quantity * unit_cost
-                return {
-                    "material": f"{size}-inch pipe",
-                    "quantity": quantity,
-                    "unit": "linear feet",
-                    "unit_cost": unit_cost,
-                    "total_cost": round(total_cost, 2),
-                    "waste_factor": "10%",
-                    "total_with_waste": round(total_cost * 1.1, 2)
-                }
-    
-    elif material_type.lower() == "concrete":
-        psi = size or "3000_psi"
-        if psi in MATERIAL_PRICING["concrete"]:
-            unit_cost = MATERIAL_PRICING["concrete"][psi]["cost"]
-            total_cost = quantity * unit_cost
-            return {
-                "material": f"Concrete {psi.replace('_', ' ')}",
-                "quantity": quantity,
-                "unit": "cubic yards",
-                "unit_cost": unit_cost,
-                "total_cost": round(total_cost, 2),
-                "waste_factor": "10%",
-                "total_with_waste": round(total_cost * 1.1, 2)
-            }
-    
-    return {"error": f"Material type '{material_type}' not found in pricing database"}
+        dict with cost breakdown and the pricing_version that produced it
+    """
+    pricing = pricing or current_pricing()
+    return {**_material_line(pricing, material_type, quantity, size), "pricing_version": pricing.version}
 
-def calculate_labor_cost(labor_type: str, hours: float):
+def calculate_labor_cost(labor_type: str, hours: float, pricing=None):
     """
     Calculate labor cost based on your rates
     
     Args:
         labor_type: Type of laborer (operator, laborer, foreman, etc.)
         hours: Number of hours
+        pricing: PricingVersion to use (default: the current one)
     
     Returns:
-        dict with labor cost breakdown
+        dict with labor cost breakdown and the pricing_version that produced it
     """
-    if labor_type.lower() in LABOR_RATES:
-        hourly_rate = LABOR_RATES[labor_type.lower()]["hourly"]
-        total_cost = hours * hourly_rate
-        return {
-            "labor_type": labor_type,
-            "hours": hours,
-            "hourly_rate": hourly_rate,
-            "total_cost": round(total_cost, 2)
-        }
-    
-    return {"error": f"Labor type '{labor_type}' not found in rates database"}
+    pricing = pricing or current_pricing()
+    return {**_labor_line(pricing, labor_type, hours), "pricing_version": pricing.version}
 
-def calculate_equipment_cost(equipment_type: str, days: float):
+def calculate_equipment_cost(equipment_type: str, days: float, pricing=None):
     """
     Calculate equipment rental cost
     
     Args:
         equipment_type: Type of equipment
         days: Number of days needed
+        pricing: PricingVersion to use (default: the current one)
     
     Returns:
-        dict with equipment cost breakdown
+        dict with equipment cost breakdown and the pricing_version that produced it
     """
-    if equipment_type.lower() in EQUIPMENT_RATES:
-        daily_rate = EQUIPMENT_RATES[equipment_type.lower()]["daily"]
+    pricing = pricing or current_pricing()
+    return {**_equipment_line(pricing, equipment_type, days), "pricing_version": pricing.version}
+
+def _material_line(pricing, material_type: str, quantity: float, size: str = None):
+    """One priced material line (no version - estimates record it once at the top)"""
+    priced = resolve_material(material_type, size, pricing)
+    if priced and not valid_amount(quantity):
+        return {"error": amount_error("quantity", quantity, material_type)}
+    if priced:
+        unit_cost, material, unit = priced
+        total_cost = quantity * unit_cost
+        return {
+            "material": material,
+            "quantity": quantity,
+            "unit": unit,
+            "unit_cost": unit_cost,
+            "total_cost": round(total_cost, 2),
+            "waste_factor": "10%",
+            "total_with_waste": round(total_cost * WASTE_MULTIPLIER, 2)
+        }
+    
+    return {"error": f"Material type '{material_type}' not found in pricing database"}
+
+def _labor_line(pricing, labor_type: str, hours: float):
+    """One priced labor line"""
+    hourly_rate = resolve_labor_rate(labor_type, pricing)
+    if hourly_rate is not None and not valid_amount(hours):
+        return {"error": amount_error("hours", hours, labor_type)}
+    if hourly_rate is not None:
+        total_cost = hours * hourly_rate
+        return {
+            "labor_type": labor_type,
+            "hours": hours,
+            "hourly_rate": hourly_rate,
+            "total_cost": round(total_cost, 2)
+        }
+    
+    return {"error": f"Labor type '{labor_type}' not found in rates database"}
+
+def _equipment_line(pricing, equipment_type: str, days: float):
+    """One priced equipment line"""
+    daily_rate = resolve_equipment_rate(equipment_type, pricing)
+    if daily_rate is not None and not valid_amount(days):
+        return {"error": amount_error("days", days, equipment_type)}
+    if daily_rate is not None:
         total_cost = days * daily_rate
         return {
             "equipment": equipment_type,
@@ -130,7 +245,64 @@ def calculate_equipment_cost(equipment_type: str, days: float):
     
     return {"error": f"Equipment type '{equipment_type}' not found in rates database"}
 
-def estimate_project_cost(materials: list, labor: list, equipment: list = None, markup: float = 0.15):
+def material_costs(materials: list, pricing=None) -> list:
+    """
+    Price many material lines at once
+
+    Args:
+        materials: List of material dicts with type, quantity, size
+        pricing: PricingVersion to use (default: the current one)
+
+    Returns:
+        One calculate_material_cost()-style dict per line (no pricing_version -
+        the caller records it once), in order
+    """
+    pricing = pricing or current_pricing()
+    if len(materials) >= BATCH_MIN_LINES:
+        try:
+            from batch_estimating import material_breakdown, price_materials
+
+            types = [mat.get("type") for mat in materials]
+            quantities = [mat.get("quantity") for mat in materials]
+            sizes = [mat.get("size") for mat in materials]
+            lines = price_materials({"type": types, "size": sizes, "quantity": quantities}, pricing)
+            return material_breakdown(lines, types, quantities)
+        except ImportError:
+            pass
+    return [_material_line(pricing, mat.get("type"), mat.get("quantity"), mat.get("size")) for mat in materials]
+
+def labor_costs(labor: list, pricing=None) -> list:
+    """Price many labor lines ({type, hours} dicts) at once - see material_costs()"""
+    pricing = pricing or current_pricing()
+    if len(labor) >= BATCH_MIN_LINES:
+        try:
+            from batch_estimating import price_labor, rate_breakdown
+
+            types = [lab.get("type") for lab in labor]
+            hours = [lab.get("hours") for lab in labor]
+            return rate_breakdown(price_labor({"type": types, "hours": hours}, pricing), types, hours,
+                                  "labor_type", "hours", "hourly_rate", "Labor type '{}' not found in rates database")
+        except ImportError:
+            pass
+    return [_labor_line(pricing, lab.get("type"), lab.get("hours")) for lab in labor]
+
+def equipment_costs(equipment: list, pricing=None) -> list:
+    """Price many equipment lines ({type, days} dicts) at once - see material_costs()"""
+    pricing = pricing or current_pricing()
+    if len(equipment) >= BATCH_MIN_LINES:
+        try:
+            from batch_estimating import price_equipment, rate_breakdown
+
+            types = [eq.get("type") for eq in equipment]
+            days = [eq.get("days") for eq in equipment]
+            return rate_breakdown(price_equipment({"type": types, "days": days}, pricing), types, days,
+                                  "equipment", "days", "daily_rate", "Equipment type '{}' not found in rates database")
+        except ImportError:
+            pass
+    return [_equipment_line(pricing, eq.get("type"), eq.get("days")) for eq in equipment]
+
+def estimate_project_cost(materials: list, labor: list, equipment: list = None, markup: float = 0.15,
+                          pricing=None):
     """
     Create a complete project cost estimate
     
@@ -139,10 +311,21 @@ def estimate_project_cost(materials: list, labor: list, equipment: list = None,
         labor: List of labor dicts with type, hours
         equipment: Optional list of equipment dicts with type, days
         markup: Markup percentage (default 15%)
+        pricing: PricingVersion to use (default: the current one). Every line
+            is priced from this one version, even if a reload lands mid-estimate.
     
     Returns:
-        Complete cost breakdown
+        Complete cost breakdown, with the pricing_version that produced it
     """
+    pricing = pricing or current_pricing()
+    
+    # Large takeoffs go through the vectorized engine (same results, much faster)
+    if len(materials) + len(labor) + len(equipment or []) >= BATCH_MIN_LINES:
+        try:
+            return _estimate_project_cost_batch(materials, labor, equipment or [], markup, pricing)
+        except ImportError:
+            pass  # NumPy not installed - fall back to the line-by-line path
+    
     material_total = 0
     labor_total = 0
     equipment_total = 0
@@ -150,7 +333,8 @@ def estimate_project_cost(materials: list, labor: list, equipment: list = None,
     # Calculate material costs
     material_breakdown = []
     for mat in materials:
-        result = calculate_material_cost(
+        result = _material_line(
+            pricing,
             mat.get("type"),
             mat.get("quantity"),
             mat.get("size")
@@ -162,7 +346,8 @@ def estimate_project_cost(materials: list, labor: list, equipment: list = None,
     # Calculate labor costs
     labor_breakdown = []
     for lab in labor:
-        result = calculate_labor_cost(
+        result = _labor_line(
+            pricing,
             lab.get("type"),
             lab.get("hours")
         )
@@ -174,7 +359,8 @@ def estimate_project_cost(materials: list, labor: list, equipment: list = None,
     equipment_breakdown = []
     if equipment:
         for eq in equipment:
-            result = calculate_equipment_cost(
+            result = _equipment_line(
+                pricing,
                 eq.get("type"),
                 eq.get("days")
             )
@@ -203,6 +389,47 @@ def estimate_project_cost(materials: list, labor: list, equipment: list = None,
         "subtotal": round(subtotal, 2),
         "overhead_profit": round(overhead_profit, 2),
         "markup_percentage": markup * 100,
-        "total": round(total, 2)
+        "total": round(total, 2),
+        "pricing_version": pricing.version
     }
 
+def _estimate_project_cost_batch(materials: list, labor: list, equipment: list, markup: float, pricing):
+    """estimate_project_cost() on the batch engine - converts dict lines to columns and back"""
+    from batch_estimating import estimate_batch, material_breakdown, rate_breakdown
+    
+    material_types = [mat.get("type") for mat in materials]
+    material_quantities = [mat.get("quantity") for mat in materials]
+    labor_types = [lab.get("type") for lab in labor]
+    labor_hours = [lab.get("hours") for lab in labor]
+    equipment_types = [eq.get("type") for eq in equipment]
+    equipment_days = [eq.get("days") for eq in equipment]
+    
+    result = estimate_batch(
+        {"type": material_types, "size": [mat.get("size") for mat in materials], "quantity": material_quantities},
+        {"type": labor_types, "hours": labor_hours},
+        {"type": equipment_types, "days": equipment_days},
+        markup,
+        pricing
+    )
+    
+    return {
+        "materials": {
+            "breakdown": material_breakdown(result["materials"], material_types, material_quantities),
+            "subtotal": round(result["materials"]["subtotal"], 2)
+        },
+        "labor": {
+            "breakdown": rate_breakdown(result["labor"], labor_types, labor_hours, "labor_type", "hours",
+                                        "hourly_rate", "Labor type '{}' not found in rates database"),
+            "subtotal": round(result["labor"]["subtotal"], 2)
+        },
+        "equipment": {
+            "breakdown": rate_breakdown(result["equipment"], equipment_types, equipment_days, "equipment", "days",
+                                        "daily_rate", "Equipment type '{}' not found in rates database"),
+            "subtotal": round(result["equipment"]["subtotal"], 2)
+        },
+        "subtotal": result["subtotal"],
+        "overhead_profit": result["overhead_profit"],
+        "markup_percentage": result["markup_percentage"],
+        "total": result["total"],
+        "pricing_version": result["pricing_version"]
+    }
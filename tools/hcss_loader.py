@@ -0,0 +1,414 @@
+"""
+HCSS Pricing Loader
+Loads the real pricing exports (HCSSMaterials.xlsx, TrenchSafetyPricing.xlsx,
+HCSS/Labor.csv) into a compact columnar snapshot file.
+
+Parsing XLSX on every cold start is slow, so the first load writes a binary
+snapshot: all strings are interned into one table and every column is a flat
+int32 / float64 array. Later starts memory-map the snapshot instead of parsing
+anything. It is only rebuilt when a source file really changed: a new mtime
+triggers a content hash, and only a different hash forces a re-parse. The
+snapshot is just a cache - it lives in the temp directory by default, and if it
+can't be written the freshly parsed copy is used from memory.
+
+Column headers are matched loosely (case, spacing and common synonyms), since
+the exports don't all use the same names.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from pricing_index import normalize_name, normalize_unit
+
+logger = logging.getLogger(__name__)
+
+# Source files, relative to the pricing data directory
+DEFAULT_SOURCES = {
+    "materials": ["HCSSMaterials.xlsx", "TrenchSafetyPricing.xlsx"],
+    "labor": ["HCSS/Labor.csv"],
+    "equipment": ["HCSS/Equipment.csv"],
+}
+
+SNAPSHOT_PREFIX = "contech1_pricing_snapshot_"
+SNAPSHOT_MAGIC = b"CT1PRICE"
+SNAPSHOT_FORMAT = 1
+_ALIGN = 64
+
+# Accepted header names for each field we need
+HEADER_ALIASES = {
+    "category": ["category", "material", "material type", "type", "class", "group"],
+    "size": ["size", "spec", "specification", "diameter", "dia"],
+    "description": ["description", "desc", "item", "item description", "name", "material description"],
+    "unit": ["unit", "units", "uom", "unit of measure"],
+    "cost": ["cost", "unit cost", "price", "unit price", "material cost"],
+    "trade": ["trade", "craft", "labor", "labor type", "classification", "type", "description", "name"],
+    "hourly": ["hourly", "hourly rate", "rate", "wage", "cost", "unit cost"],
+    "equipment": ["equipment", "equipment type", "type", "description", "name"],
+    "daily": ["daily", "daily rate", "day rate", "rate", "cost"],
+}
+
+# Which fields each table needs (first) and may have (rest)
+TABLE_FIELDS = {
+    "materials": (["cost"], ["category", "size", "description", "unit"]),
+    "labor": (["trade", "hourly"], []),
+    "equipment": (["equipment", "daily"], []),
+}
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def _read_rows(path: Path):
+    """Yield each row of a CSV or XLSX file as a list of cell values, header first"""
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError as exc:
+            raise ImportError("openpyxl is required to read XLSX pricing files (pip install openpyxl)") from exc
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+
+
+def _match_headers(header: list, fields: list) -> dict:
+    """Map each wanted field to the column index whose header matches one of its aliases"""
+    normalized = [normalize_name(cell) for cell in header]
+    columns = {}
+    for field in fields:
+        for alias in HEADER_ALIASES[field]:
+            if alias in normalized and normalized.index(alias) not in columns.values():
+                columns[field] = normalized.index(alias)
+                break
+    return columns
+
+
+def _number(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def parse_source(path: Path, table: str) -> list:
+    """
+    Parse one pricing file into row dicts for a table
+
+    Returns:
+        materials: [{"category", "size", "unit", "cost"}]
+        labor:     [{"trade", "hourly"}]
+        equipment: [{"equipment", "daily"}]
+    """
+    required, optional = TABLE_FIELDS[table]
+    rows = _read_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return []
+
+    columns = _match_headers(header, required + optional)
+    missing = [field for field in required if field not in columns]
+    if missing or (table == "materials" and not {"category", "description"} & set(columns)):
+        raise ValueError(f"{path.name}: can't find columns for {missing or ['category/description']} in {header}")
+
+    def cell(row, field):
+        index = columns.get(field)
+        if index is None or index >= len(row) or row[index] is None:
+            return ""
+        return str(row[index]).strip()
+
+    parsed = []
+    for row in rows:
+        if table == "materials":
+            cost = _number(row[columns["cost"]] if columns["cost"] < len(row) else None)
+            name = cell(row, "category") or cell(row, "description")
+            if cost is None or not name:
+                continue
+            unit = cell(row, "unit")
+            parsed.append({
+                "category": normalize_name(name),
+                "size": cell(row, "size"),
+                "unit": normalize_unit(unit) or normalize_name(unit).replace(" ", "_") or "each",
+                "cost": cost,
+            })
+        else:
+            name_field, rate_field = required
+            rate = _number(row[columns[rate_field]] if columns[rate_field] < len(row) else None)
+            name = cell(row, name_field)
+            if rate is None or not name:
+                continue
+            parsed.append({name_field: normalize_name(name), rate_field: rate})
+    return parsed
+
+
+# ---------------------------------------------------------------------------
+# Snapshot file
+# ---------------------------------------------------------------------------
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_sources(data_dir: Path, sources: dict, previous: dict = None) -> dict:
+    """
+    {relative path: {"mtime_ns", "size", "sha256"}} for every source that exists
+
+    The content hash is only recomputed when mtime or size moved, so an
+    unchanged tree costs one stat() per file.
+    """
+    previous = previous or {}
+    fingerprints = {}
+    for table, names in sources.items():
+        for name in names:
+            path = data_dir / name
+            if not path.is_file():
+                continue
+            stat = path.stat()
+            old = previous.get(name)
+            if old and old["mtime_ns"] == stat.st_mtime_ns and old["size"] == stat.st_size:
+                fingerprints[name] = old
+            else:
+                fingerprints[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": _file_hash(path)}
+    return fingerprints
+
+
+def _same_sources(current: dict, stored: dict) -> bool:
+    """Sources match if the set of files and each file's content hash are the same"""
+    if set(current) != set(stored):
+        return False
+    return all(current[name]["sha256"] == stored[name]["sha256"] for name in current)
+
+
+class StringTable:
+    """Interns strings so columns can store small integer codes"""
+
+    def __init__(self, strings: list = None):
+        self.strings = list(strings or [])
+        self._codes = {s: i for i, s in enumerate(self.strings)}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+
+class PricingSnapshot:
+    """
+    Columnar pricing data, usually memory-mapped from a snapshot file
+
+    materials: category, size, unit (int32 string codes) + cost (float64)
+    labor:     trade (code) + hourly (float64)
+    equipment: equipment (code) + daily (float64)
+    """
+
+    def __init__(self, strings: list, tables: dict, sources: dict, version: str, buffer=None):
+        self.strings = strings
+        self.tables = tables
+        self.sources = sources
+        self.version = version
+        self._buffer = buffer  # keeps the mmap alive while arrays point into it
+
+    @classmethod
+    def from_rows(cls, rows: dict, sources: dict):
+        """Build a snapshot in memory from parsed rows"""
+        strings = StringTable()
+        tables = {
+            "materials": {
+                "category": np.array([strings.code(r["category"]) for r in rows["materials"]], dtype=np.int32),
+                "size": np.array([strings.code(r["size"]) for r in rows["materials"]], dtype=np.int32),
+                "unit": np.array([strings.code(r["unit"]) for r in rows["materials"]], dtype=np.int32),
+                "cost": np.array([r["cost"] for r in rows["materials"]], dtype=np.float64),
+            },
+            "labor": {
+                "trade": np.array([strings.code(r["trade"]) for r in rows["labor"]], dtype=np.int32),
+                "hourly": np.array([r["hourly"] for r in rows["labor"]], dtype=np.float64),
+            },
+            "equipment": {
+                "equipment": np.array([strings.code(r["equipment"]) for r in rows["equipment"]], dtype=np.int32),
+                "daily": np.array([r["daily"] for r in rows["equipment"]], dtype=np.float64),
+            },
+        }
+        version = hashlib.sha1(
+            json.dumps({name: info["sha256"] for name, info in sorted(sources.items())}).encode()
+        ).hexdigest()[:12]
+        return cls(strings.strings, tables, sources, version)
+
+    def write(self, path: Path):
+        """Write the snapshot atomically: header JSON, then 64-byte aligned raw arrays"""
+        layout = {}
+        offset = 0
+        for table, columns in self.tables.items():
+            layout[table] = {}
+            for column, values in columns.items():
+                offset = -(-offset // _ALIGN) * _ALIGN
+                layout[table][column] = {"dtype": values.dtype.str, "count": len(values), "offset": offset}
+                offset += values.nbytes
+
+        header = json.dumps({
+            "format": SNAPSHOT_FORMAT,
+            "version": self.version,
+            "sources": self.sources,
+            "strings": self.strings,
+            "layout": layout,
+        }).encode()
+        data_start = -(-(len(SNAPSHOT_MAGIC) + 4 + len(header)) // _ALIGN) * _ALIGN
+
+        # Each writer gets its own temp file - workers rebuilding at once must not share one
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + ".", suffix=".tmp",
+                                         delete=False) as f:
+            try:
+                f.write(SNAPSHOT_MAGIC + struct.pack("<I", len(header)) + header)
+                for table, columns in self.tables.items():
+                    for column, values in columns.items():
+                        f.seek(data_start + layout[table][column]["offset"])
+                        f.write(np.ascontiguousarray(values).tobytes())
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        try:
+            # NamedTemporaryFile is private (0600) - make the snapshot readable like any other file
+            os.chmod(f.name, 0o644)
+            os.replace(f.name, path)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+
+    @staticmethod
+    def read_header(path: Path):
+        """Read just the header (sources + layout) without mapping the data"""
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            (length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+        if header.get("format") != SNAPSHOT_FORMAT:
+            return None
+        header["data_start"] = -(-(len(SNAPSHOT_MAGIC) + 4 + length) // _ALIGN) * _ALIGN
+        return header
+
+    @classmethod
+    def open(cls, path: Path, header: dict = None):
+        """Memory-map a snapshot file - arrays are zero-copy views into the file"""
+        header = header or cls.read_header(path)
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tables = {}
+        for table, columns in header["layout"].items():
+            tables[table] = {
+                column: np.frombuffer(
+                    buffer, dtype=np.dtype(spec["dtype"]), count=spec["count"],
+                    offset=header["data_start"] + spec["offset"],
+                ) if spec["count"] else np.empty(0, dtype=np.dtype(spec["dtype"]))
+                for column, spec in columns.items()
+            }
+        return cls(header["strings"], tables, header["sources"], header["version"], buffer)
+
+    def __len__(self):
+        return sum(len(next(iter(columns.values()))) for columns in self.tables.values())
+
+    # Labor and equipment are a few dozen rows - plain dicts like LABOR_RATES / EQUIPMENT_RATES
+
+    def material_rows(self):
+        """
+        (category, size, unit, cost) per material row, read straight from the columns
+
+        PricingIndex is built from these directly - no intermediate dict tables.
+        """
+        columns = self.tables["materials"]
+        strings = self.strings
+        categories = [strings[code] for code in columns["category"].tolist()]
+        sizes = [strings[code] for code in columns["size"].tolist()]
+        units = [strings[code] for code in columns["unit"].tolist()]
+        return zip(categories, sizes, units, columns["cost"].tolist())
+
+    def labor_table(self) -> dict:
+        """{trade: {"hourly"}} like LABOR_RATES"""
+        columns = self.tables["labor"]
+        return {self.strings[trade]: {"hourly": rate}
+                for trade, rate in zip(columns["trade"].tolist(), columns["hourly"].tolist())}
+
+    def equipment_table(self) -> dict:
+        """{equipment: {"daily"}} like EQUIPMENT_RATES"""
+        columns = self.tables["equipment"]
+        return {self.strings[name]: {"daily": rate}
+                for name, rate in zip(columns["equipment"].tolist(), columns["daily"].tolist())}
+
+
+def default_snapshot_path(data_dir: Path) -> Path:
+    """
+    Snapshot file for a data directory, in the temp directory
+
+    The data directory may be read-only (Vercel), the temp directory never is.
+    Named after the data directory, so different ones don't share a snapshot.
+    """
+    key = hashlib.sha1(str(Path(data_dir).resolve()).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"{SNAPSHOT_PREFIX}{key}.bin"
+
+
+def load_pricing(data_dir, snapshot_path=None, sources: dict = None):
+    """
+    Load HCSS pricing, using the snapshot when the sources haven't changed
+
+    Args:
+        data_dir: Directory holding the HCSS exports
+        snapshot_path: Where to keep the snapshot (default: default_snapshot_path(data_dir))
+        sources: {table: [relative file paths]} (default: DEFAULT_SOURCES)
+
+    Returns:
+        PricingSnapshot, or None if none of the source files exist
+    """
+    data_dir = Path(data_dir)
+    sources = sources or DEFAULT_SOURCES
+    snapshot_path = Path(snapshot_path) if snapshot_path else default_snapshot_path(data_dir)
+
+    try:
+        header = PricingSnapshot.read_header(snapshot_path) if snapshot_path.is_file() else None
+    except (OSError, ValueError, struct.error) as exc:
+        logger.warning(f"Ignoring unreadable pricing snapshot {snapshot_path}: {exc}")
+        header = None
+    current = fingerprint_sources(data_dir, sources, header["sources"] if header else None)
+    if not current:
+        return None
+
+    if header and _same_sources(current, header["sources"]):
+        logger.info(f"Mapping pricing snapshot {snapshot_path} (version {header['version']})")
+        return PricingSnapshot.open(snapshot_path, header)
+
+    logger.info(f"Pricing sources changed - rebuilding snapshot from {len(current)} files")
+    rows = {table: [] for table in TABLE_FIELDS}
+    for table, names in sources.items():
+        for name in names:
+            if name in current:
+                rows[table].extend(parse_source(data_dir / name, table))
+
+    snapshot = PricingSnapshot.from_rows(rows, current)
+    try:
+        snapshot.write(snapshot_path)
+    except OSError as exc:
+        # Read-only filesystem etc. - the snapshot is only a cache, price from the copy in memory
+        logger.warning(f"Could not write pricing snapshot {snapshot_path} ({exc}) - using it from memory")
+        return snapshot
+    return PricingSnapshot.open(snapshot_path)
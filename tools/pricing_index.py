@@ -0,0 +1,268 @@
+"""
+Pricing Index
+Normalized, alias-aware lookups over the pricing tables
+
+Built once from MATERIAL_PRICING, LABOR_RATES and EQUIPMENT_RATES. Every way of
+writing a material and size that we accept ("pipe"/"pipes", "4"/'4"'/"4 in"/"4_inch",
+"#4", "4000psi", '3/4"', "1-1/2 in", "2x4", ...) is normalized to the same key, and each (material, size) key
+maps straight to a compact record - so a lookup is one hash probe, and every
+category in the tables can be priced.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MaterialRecord(NamedTuple):
+    category: str     # table category, e.g. "pipe"
+    key: str          # table key, e.g. "4_inch"
+    label: str        # what we call it in results, e.g. "4-inch pipe"
+    unit: str         # display unit, e.g. "linear feet"
+    unit_cost: float
+
+
+# Other names people (and the model) use for each category
+MATERIAL_ALIASES = {
+    "pipe": ["pipe", "piping", "water pipe", "waterline", "water line"],
+    "concrete": ["concrete", "ready mix", "readymix", "ready mix concrete"],
+    "rebar": ["rebar", "reinforcing bar", "reinforcing steel", "reinforcement"],
+}
+
+LABOR_ALIASES = {
+    "operator": ["operator", "equipment operator", "heavy equipment operator"],
+    "laborer": ["laborer", "labourer", "general laborer", "labor"],
+    "foreman": ["foreman", "foremen", "supervisor"],
+    "electrician": ["electrician"],
+    "ironworker": ["ironworker", "iron worker", "rebar worker"],
+}
+
+EQUIPMENT_ALIASES = {
+    "excavator": ["excavator", "trackhoe", "track hoe"],
+    "auger": ["auger", "auger rig"],
+    "compactor": ["compactor", "plate compactor", "jumping jack"],
+}
+
+# Table units -> the unit we show, plus the ways people write them
+UNIT_NAMES = {
+    "linear_foot": "linear feet",
+    "cubic_yard": "cubic yards",
+    "square_foot": "square feet",
+    "square_yard": "square yards",
+    "ton": "tons",
+    "each": "each",
+    "lump_sum": "lump sum",
+}
+
+UNIT_ALIASES = {
+    "linear_foot": ["lf", "ft", "feet", "foot", "linear foot", "linear feet", "lin ft"],
+    "cubic_yard": ["cy", "yd3", "cubic yard", "cubic yards", "cu yd", "yards"],
+    "square_foot": ["sf", "sq ft", "ft2", "square foot", "square feet"],
+    "square_yard": ["sy", "sq yd", "yd2", "square yard", "square yards"],
+    "ton": ["ton", "tons", "tn"],
+    "each": ["ea", "each", "unit", "units", "pc", "pcs"],
+    "lump_sum": ["ls", "lump sum", "lump"],
+}
+
+# Size used when none is given (matches the old calculate_material_cost defaults)
+DEFAULT_SIZES = {
+    "concrete": "3000",
+}
+
+# One size number: mixed ("1-1/2", "1 1/2"), fraction ("3/4") or decimal ("1.5")
+_QUANTITY = r"\d+(?:\.\d+)?[\s_-]+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?"
+_UNIT_MARK = r'(?:"|-?\s*inch(?:es)?|in\b)?'
+_NUMBER = re.compile(_QUANTITY)
+_FRACTION = re.compile(r"^(?:(\d+(?:\.\d+)?)[\s_-]+)?(\d+)/(\d+)$")
+# Dimension sizes: "2x4", '2" x 4"', "4 x 8"
+_DIMENSION = re.compile(rf"({_QUANTITY})\s*{_UNIT_MARK}\s*[x\u00d7]\s*({_QUANTITY})")
+_LEADING_SIZE = re.compile(
+    rf'^\s*(#?\s*(?:{_QUANTITY})(?:\s*{_UNIT_MARK}\s*x\s*(?:{_QUANTITY}))?\s*(?:"|-?\s*inch(?:es)?|in\b|psi)?)[\s_-]*(.+)$'
+)
+
+
+@lru_cache(maxsize=4096)
+def normalize_name(text) -> str:
+    """'Ready-Mix  Concrete' -> 'ready mix concrete'"""
+    if text is None:
+        return ""
+    return " ".join(re.split(r"[\s_\-]+", str(text).strip().lower())).strip()
+
+
+@lru_cache(maxsize=4096)
+def normalize_size(size) -> Optional[str]:
+    """
+    Reduce a size to its canonical number: '4"', '4 in', '4_inch', '#4' -> '4',
+    '3/4"' -> '0.75', '1-1/2 in' / '1 1/2' -> '1.5', '2" x 4"' -> '2x4'
+
+    Returns:
+        The canonical size as text ('4', '0.75', '2x4'), or None if there isn't one
+    """
+    if size is None:
+        return None
+    text = str(size).lower()
+    match = _DIMENSION.search(text)
+    if match:
+        width, length = _parse_quantity(match.group(1)), _parse_quantity(match.group(2))
+        if width is None or length is None:
+            return None
+        return f"{_format_number(width)}x{_format_number(length)}"
+    match = _NUMBER.search(text)
+    if not match:
+        return None
+    value = _parse_quantity(match.group())
+    return None if value is None else _format_number(value)
+
+
+def _parse_quantity(text: str) -> Optional[float]:
+    """'1-1/2' / '1 1/2' -> 1.5, '3/4' -> 0.75, '4' -> 4.0 (None for a zero denominator)"""
+    match = _FRACTION.match(text)
+    if match is None:
+        return float(text)
+    whole, numerator, denominator = match.groups()
+    if int(denominator) == 0:
+        return None
+    return float(whole or 0) + int(numerator) / int(denominator)
+
+
+def normalize_unit(unit) -> Optional[str]:
+    """'LF' / 'feet' / 'linear feet' -> 'linear_foot'"""
+    return _UNIT_LOOKUP.get(normalize_name(unit))
+
+
+def _format_number(value: float) -> str:
+    # Round away float noise (1/3 -> '0.3333') so equal sizes always share a key
+    value = round(value, 4)
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+@lru_cache(maxsize=1024)
+def _names(category: str) -> tuple:
+    """Every normalized name a material category is looked up by"""
+    aliases = MATERIAL_ALIASES.get(category, [category]) + [category]
+    return tuple({normalize_name(name) for name in _plurals(aliases)})
+
+
+def _plurals(names):
+    """Accept simple plurals too ('pipes', 'excavators')"""
+    for name in names:
+        yield name
+        yield name + "es" if name.endswith(("s", "x", "ch", "sh")) else name + "s"
+
+
+_UNIT_LOOKUP = {
+    normalize_name(alias): unit
+    for unit, aliases in UNIT_ALIASES.items()
+    for alias in list(aliases) + [unit]
+}
+
+
+def _label(category: str, size: str) -> str:
+    if size is None:
+        return category
+    if category == "pipe":
+        return f"{size}-inch pipe"
+    if category == "concrete":
+        return f"Concrete {size} psi"
+    if category == "rebar":
+        return f"#{size} rebar"
+    return f"{category} {size}"
+
+
+class PricingIndex:
+    """
+    Flat hash maps from normalized names to pricing records
+
+    Args:
+        materials: MATERIAL_PRICING-shaped dict {category: {size_key: {unit, cost}}}
+        labor: LABOR_RATES-shaped dict {type: {hourly}}
+        equipment: EQUIPMENT_RATES-shaped dict {type: {daily}}
+        material_rows: Optional (category, size_key, unit, cost) rows that take
+            precedence over `materials` (HCSS exports, read straight from the
+            snapshot columns - see PricingSnapshot.material_rows)
+        rows_version: Identifies material_rows in the version hash
+    """
+
+    def __init__(self, materials: dict, labor: dict, equipment: dict,
+                 material_rows=None, rows_version: str = None):
+        tables = json.dumps([materials, labor, equipment, rows_version], sort_keys=True)
+        self.version = hashlib.sha1(tables.encode()).hexdigest()[:12]
+
+        self.materials = {}
+        self.collisions = set()     # (kept, ignored) record pairs that share a key
+        for category, size_key, unit, cost in material_rows or ():
+            self._add_row(category, size_key, unit, cost)
+        # Built-in rows only fill the sizes the exports don't price
+        overridden = set(self.materials)
+        for category, sizes in materials.items():
+            for size_key, entry in sizes.items():
+                self._add_row(category, size_key, entry["unit"], entry["cost"], overridden)
+
+        self.labor = self._rates(labor, "hourly", LABOR_ALIASES)
+        self.equipment = self._rates(equipment, "daily", EQUIPMENT_ALIASES)
+
+    def _add_row(self, category: str, size_key: str, unit: str, cost: float, overridden: set = frozenset()):
+        size = normalize_size(size_key)
+        record = MaterialRecord(
+            category=category,
+            key=size_key,
+            label=_label(category, size),
+            unit=UNIT_NAMES.get(unit, unit.replace("_", " ")),
+            unit_cost=cost,
+        )
+        for name in _names(category):
+            keys = [(name, size)]
+            if size is None or DEFAULT_SIZES.get(category) == size:
+                keys.append((name, None))
+            for key in keys:
+                if key not in overridden:
+                    self._add_material(key, record)
+
+    def _add_material(self, key: tuple, record: MaterialRecord):
+        """Index a record under key - the first record for a key wins, and a clash is logged"""
+        existing = self.materials.get(key)
+        if existing is None:
+            self.materials[key] = record
+        elif existing != record and (existing, record) not in self.collisions:
+            # Once per pair, not once per alias
+            self.collisions.add((existing, record))
+            logger.warning(
+                f"Pricing index: {record.category} '{record.key}' normalizes to the same size as "
+                f"{existing.category} '{existing.key}' ({key[1]!r}) - keeping '{existing.key}'"
+            )
+
+    @staticmethod
+    def _rates(table: dict, field: str, aliases: dict) -> dict:
+        rates = {}
+        for name, entry in table.items():
+            for alias in _plurals(aliases.get(name, [name]) + [name]):
+                rates[normalize_name(alias)] = entry[field]
+        return rates
+
+    def material(self, material_type, size=None) -> Optional[MaterialRecord]:
+        """Look up a material - accepts any alias and any size spelling"""
+        name = normalize_name(material_type)
+        record = self.materials.get((name, normalize_size(size)))
+        if record is None and size is None:
+            # Size written into the type: '4" pipe', '#4 rebar', '4000 psi concrete'
+            match = _LEADING_SIZE.match(name)
+            if match:
+                record = self.materials.get((normalize_name(match.group(2)), normalize_size(match.group(1))))
+        return record
+
+    def labor_rate(self, labor_type) -> Optional[float]:
+        return self.labor.get(normalize_name(labor_type))
+
+    def equipment_rate(self, equipment_type) -> Optional[float]:
+        return self.equipment.get(normalize_name(equipment_type))
+
+
+def build_pricing_index(materials: dict, labor: dict, equipment: dict,
+                        material_rows=None, rows_version: str = None) -> PricingIndex:
+    """Build the lookup index for a set of pricing tables (plus optional export rows)"""
+    return PricingIndex(materials, labor, equipment, material_rows, rows_version)
@@ -0,0 +1,157 @@
+"""
+Pricing Store
+Immutable, versioned pricing snapshots with atomic hot-swap
+
+Each PricingVersion holds its own copy of the tables and the lookup index built
+from them, and is never modified after it's published. Reloading builds a new
+version in the background and swaps one reference, so:
+- requests already running keep the version they started with (see pin_pricing)
+- new requests see the new version immediately
+- nobody ever sees half-updated tables
+"""
+
+import copy
+import logging
+import threading
+import time
+from pathlib import Path
+
+from pricing_index import build_pricing_index
+
+logger = logging.getLogger(__name__)
+
+
+class PricingVersion:
+    """One immutable set of pricing tables plus its lookup index"""
+
+    __slots__ = ("materials", "labor", "equipment", "index", "version", "source", "loaded_at")
+
+    def __init__(self, materials: dict, labor: dict, equipment: dict, source: str = "builtin", snapshot=None):
+        self.materials = copy.deepcopy(materials)
+        self.labor = copy.deepcopy(labor)
+        self.equipment = copy.deepcopy(equipment)
+        # HCSS material rows go from the snapshot's columns straight into the index
+        self.index = build_pricing_index(
+            self.materials, self.labor, self.equipment,
+            snapshot.material_rows() if snapshot is not None else None,
+            snapshot.version if snapshot is not None else None,
+        )
+        self.version = self.index.version
+        self.source = source
+        self.loaded_at = time.time()
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "materials": len(set(self.index.materials.values())),
+            "labor": len(self.labor),
+            "equipment": len(self.equipment),
+            # Material rows ignored because another row normalized to the same size
+            "size_collisions": len(self.index.collisions),
+        }
+
+
+class PricingStore:
+    """
+    Holds the live PricingVersion and swaps in new ones atomically
+
+    Args:
+        materials, labor, equipment: Built-in tables every version starts from
+        data_dir: Optional HCSS export folder merged on top (see hcss_loader)
+        snapshot_path: Optional snapshot file location for the HCSS loader
+    """
+
+    def __init__(self, materials: dict, labor: dict, equipment: dict,
+                 data_dir=None, snapshot_path=None):
+        self.base = (materials, labor, equipment)
+        self.data_dir = Path(data_dir) if data_dir else None
+        self.snapshot_path = snapshot_path
+        self.reloads = 0
+        self.reloads_collapsed = 0
+        self._builds_started = 0    # rebuilds begun, numbered in order
+        self._last_build = 0        # number of the last rebuild that finished
+        self._current = PricingVersion(materials, labor, equipment)
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def current(self) -> PricingVersion:
+        """The live version - a single reference read, safe from any thread"""
+        return self._current
+
+    def publish(self, pricing: PricingVersion) -> PricingVersion:
+        """Swap in a new version (no-op if nothing actually changed)"""
+        if pricing.version != self._current.version:
+            logger.info(f"Pricing {self._current.version} -> {pricing.version} ({pricing.source})")
+            self._current = pricing
+        return self._current
+
+    def build(self) -> PricingVersion:
+        """Build a fresh version from the built-in tables plus the HCSS exports, if any"""
+        materials, labor, equipment = self.base
+        source = "builtin"
+        snapshot = None
+
+        if self.data_dir is not None:
+            from hcss_loader import load_pricing
+
+            snapshot = load_pricing(self.data_dir, self.snapshot_path)
+            if snapshot is not None:
+                labor = {**labor, **snapshot.labor_table()}
+                equipment = {**equipment, **snapshot.equipment_table()}
+                source = f"hcss:{snapshot.version}"
+
+        return PricingVersion(materials, labor, equipment, source, snapshot)
+
+    def reload(self) -> PricingVersion:
+        """
+        Rebuild and publish - concurrent reloads are collapsed
+
+        A caller that arrives while a rebuild is running waits for it, then
+        runs one more (that rebuild may have read the files before the change
+        the caller is reloading for). Callers arriving together share that
+        next rebuild, so N concurrent reloads cost at most two builds.
+        """
+        arrived = self._builds_started
+        with self._reload_lock:
+            if self._last_build > arrived:
+                # A rebuild that started after this call arrived has already published
+                self.reloads_collapsed += 1
+                return self._current
+            self._builds_started += 1
+            build = self._builds_started
+            self.reloads += 1
+            pricing = self.publish(self.build())
+            self._last_build = build
+            return pricing
+
+    def watch(self, interval: float = 5.0):
+        """
+        Poll the HCSS source files in a background thread and reload on change
+
+        Only stat() calls run while nothing changes (see fingerprint_sources).
+        """
+        if self.data_dir is None or self._watcher is not None:
+            return
+
+        from hcss_loader import DEFAULT_SOURCES, fingerprint_sources
+
+        def loop():
+            seen = fingerprint_sources(self.data_dir, DEFAULT_SOURCES)
+            while not self._stop.wait(interval):
+                try:
+                    current = fingerprint_sources(self.data_dir, DEFAULT_SOURCES, seen)
+                    if current != seen:
+                        seen = current
+                        self.reload()
+                except Exception as exc:
+                    logger.error(f"Pricing watcher failed to reload: {exc}")
+
+        self._watcher = threading.Thread(target=loop, name="pricing-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.data_dir} for pricing changes every {interval}s")
+
+    def stop(self):
+        self._stop.set()
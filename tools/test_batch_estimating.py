@@ -0,0 +1,72 @@
+"""
+The batch engine must give exactly what the line-by-line path gives -
+including for lines it can't price
+
+Run from the repo root: python -m pytest tools
+"""
+
+import math
+
+import estimating_tools
+from estimating_tools import BATCH_MIN_LINES, estimate_project_cost
+
+# Missing, non-numeric and non-finite amounts - each must become an error line on both paths
+BAD_AMOUNTS = [None, "5", "", float("nan"), float("inf"), -float("inf"), True, 10 ** 400, [5]]
+
+
+def scalar_estimate(materials, labor, equipment, markup=0.15):
+    """estimate_project_cost forced onto the line-by-line path"""
+    threshold = estimating_tools.BATCH_MIN_LINES
+    estimating_tools.BATCH_MIN_LINES = float("inf")
+    try:
+        return estimate_project_cost(materials, labor, equipment, markup)
+    finally:
+        estimating_tools.BATCH_MIN_LINES = threshold
+
+
+def takeoff():
+    """Big enough for the batch engine, with a few unknown types mixed in"""
+    materials = [{"type": "concrete", "size": "3000", "quantity": 10 + i * 0.25} for i in range(BATCH_MIN_LINES)]
+    materials += [{"type": "pipe", "size": '4"', "quantity": 1000}, {"type": "unobtainium", "quantity": 5},
+                  {"type": "rebar", "size": "#5", "quantity": 7}]
+    labor = [{"type": "operator", "hours": 40}, {"type": "plumber", "hours": 8}, {"type": "laborer", "hours": 12.5}]
+    equipment = [{"type": "excavator", "days": 5}, {"type": "crane", "days": 1}]
+    return materials, labor, equipment
+
+
+def test_valid_lines_match():
+    materials, labor, equipment = takeoff()
+    batch = estimate_project_cost(materials, labor, equipment)
+    assert batch == scalar_estimate(materials, labor, equipment)
+
+
+def test_missing_amounts_match():
+    materials, labor, equipment = takeoff()
+    del materials[3]["quantity"], labor[0]["hours"], equipment[0]["days"]
+    batch = estimate_project_cost(materials, labor, equipment)
+    assert batch == scalar_estimate(materials, labor, equipment)
+    assert batch["materials"]["breakdown"][3] == {"error": "Invalid quantity None for 'concrete' - expected a number"}
+    assert math.isfinite(batch["total"])
+
+
+def test_bad_amounts_match():
+    for bad_amount in BAD_AMOUNTS:
+        materials, labor, equipment = takeoff()
+        materials[3]["quantity"] = materials[-1]["quantity"] = bad_amount
+        labor[0]["hours"] = bad_amount
+        equipment[0]["days"] = bad_amount
+        batch = estimate_project_cost(materials, labor, equipment)
+        assert batch == scalar_estimate(materials, labor, equipment), bad_amount
+        assert "error" in batch["materials"]["breakdown"][3]
+        assert "error" in batch["labor"]["breakdown"][0]
+        assert "error" in batch["equipment"]["breakdown"][0]
+        assert math.isfinite(batch["total"])
+
+
+def test_unknown_type_reported_before_bad_amount():
+    materials, labor, equipment = takeoff()
+    materials[-2]["quantity"] = labor[1]["hours"] = None
+    batch = estimate_project_cost(materials, labor, equipment)
+    assert batch == scalar_estimate(materials, labor, equipment)
+    assert batch["materials"]["breakdown"][-2] == {"error": "Material type 'unobtainium' not found in pricing database"}
+    assert batch["labor"]["breakdown"][1] == {"error": "Labor type 'plumber' not found in rates database"}